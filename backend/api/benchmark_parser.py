@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import List, Dict, Any
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.pdf_parser import StatementParser, PARSER_ENGINES
+from api.statement_corpus import generate_statement
+
+# parse_transactions throughput per engine (lines per second) on large synthetic
+# statements, plus a fuzz check that the compiled engine returns exactly what the
+# legacy engine returns on adversarial lines, and the same for the merchant
+# categorizer against the original keyword loop
+
+FUZZ_TOKENS = [
+    '07/12', '12/31/2025', '7-4-2025', '1-15-2024', '01/02', '/', '-', '$', ',', '.',
+    '1,234.56', '0.00', '$12.34', '5.5', '99.999', '123/456', '2025', 'AMAZON', 'UBER TRIP',
+    'SHELL', 'TST* MOMS KITCHEN', '#1234', ' ', '  ', '\t', 'a', 'Z', ' ', '٣'
+]
+
+
+def statement_text(n_pages: int, date_format: str = 'MM/DD', seed: int = 0) -> str:
+    # same lines PyPDF2 extracts from the rendered statement, without the pdf round trip
+    statement = generate_statement(n_pages, date_format, seed)
+    return '\n'.join('\n'.join(page) for page in statement['pages'])
+
+
+def time_engine(parser: StatementParser, text: str, engine: str, repeats: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        parser.parse_transactions(text, engine=engine)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def fuzz_lines(n_lines: int = 100000, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(n_lines):
+        tokens = [rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(1, 8))]
+        separator = rng.choice([' ', '', '  '])
+        lines.append(separator.join(tokens))
+    return lines
+
+
+def check_equivalence(parser: StatementParser, lines: List[str]) -> Dict[str, Any]:
+    # line by line, so a mismatch points at the exact input
+    mismatches = []
+    for line in lines:
+        legacy = parser.parse_transactions(line, engine='legacy')
+        compiled = parser.parse_transactions(line, engine='compiled')
+        if legacy != compiled:
+            mismatches.append({'line': line, 'legacy': legacy, 'compiled': compiled})
+    return {'lines': len(lines), 'mismatches': len(mismatches), 'examples': mismatches[:10]}
+
+
+def fuzz_merchants(parser: StatementParser, n_merchants: int = 100000, seed: int = 0) -> List[str]:
+    # keyword fragments glued together, so overlapping and nested keywords are common
+    rng = random.Random(seed)
+    pieces = [k for keywords in parser.categories.values() for k in keywords]
+    pieces += [k[:len(k) // 2 + 1] for k in pieces] + ['', ' ', '*', '#12', 'x', 'Ş', 'İ']
+    merchants = []
+    for _ in range(n_merchants):
+        merchant = ''.join(rng.choice(pieces) for _ in range(rng.randint(1, 5)))
+        merchants.append(merchant.upper() if rng.random() < 0.5 else merchant)
+    return merchants
+
+
+def check_categorizer(parser: StatementParser, merchants: List[str]) -> Dict[str, Any]:
+    mismatches = [
+        {'merchant': m, 'legacy': parser._categorize_legacy(m), 'automaton': parser.categorizer._categorize(m)}
+        for m in merchants if parser._categorize_legacy(m) != parser.categorizer._categorize(m)
+    ]
+
+    start = time.perf_counter()
+    for merchant in merchants:
+        parser._categorize_legacy(merchant)
+    legacy = time.perf_counter() - start
+
+    # automaton without the memo, repeated merchants are cheaper still
+    start = time.perf_counter()
+    for merchant in merchants:
+        parser.categorizer._categorize(merchant)
+    automaton = time.perf_counter() - start
+
+    return {
+        'merchants': len(merchants),
+        'mismatches': len(mismatches),
+        'examples': mismatches[:10],
+        'legacy_us_per_merchant': legacy / len(merchants) * 1e6,
+        'automaton_us_per_merchant': automaton / len(merchants) * 1e6
+    }
+
+
+def run_benchmark(pages=(1, 10, 100, 500), date_formats=('MM/DD', 'MM/DD/YYYY', 'M-D-YYYY'),
+                  repeats: int = 3) -> List[Dict[str, Any]]:
+    parser = StatementParser()
+    results = []
+    for n_pages in pages:
+        for date_format in date_formats:
+            text = statement_text(n_pages, date_format)
+            n_lines = text.count('\n') + 1
+            row = {'pages': n_pages, 'date_format': date_format, 'lines': n_lines}
+            for engine in PARSER_ENGINES:
+                seconds = time_engine(parser, text, engine, repeats)
+                row[f'{engine}_seconds'] = seconds
+                row[f'{engine}_lines_per_second'] = n_lines / seconds
+            row['speedup'] = row['legacy_seconds'] / row['compiled_seconds']
+            row['same_output'] = (
+                parser.parse_transactions(text, engine='legacy')
+                == parser.parse_transactions(text, engine='compiled')
+            )
+            results.append(row)
+            print(json.dumps(row))
+    return results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark StatementParser engines")
+    arg_parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100, 500])
+    arg_parser.add_argument('--repeats', type=int, default=3)
+    arg_parser.add_argument('--fuzz-lines', type=int, default=100000)
+    arg_parser.add_argument('--output', help="write results as json")
+    args = arg_parser.parse_args()
+
+    print("Timing engines...")
+    timings = run_benchmark(args.pages, repeats=args.repeats)
+
+    print("\nFuzzing compiled vs legacy...")
+    equivalence = check_equivalence(StatementParser(), fuzz_lines(args.fuzz_lines))
+    print(f"{equivalence['mismatches']} mismatches in {equivalence['lines']} lines")
+    for example in equivalence['examples']:
+        print(json.dumps(example))
+
+    print("\nChecking merchant categorizer against the keyword loop...")
+    parser = StatementParser()
+    categorizer = check_categorizer(parser, fuzz_merchants(parser, args.fuzz_lines))
+    print(f"{categorizer['mismatches']} mismatches in {categorizer['merchants']} merchants, "
+          f"{categorizer['legacy_us_per_merchant']:.2f} -> {categorizer['automaton_us_per_merchant']:.2f} us/merchant")
+    for example in categorizer['examples']:
+        print(json.dumps(example))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'timings': timings, 'equivalence': equivalence, 'categorizer': categorizer}, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,202 @@
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import List, Dict, Any, Tuple, Optional, Union
+
+try:
+    from .pdf_parser import StatementParser, StatementAggregator
+    from .uploads import open_pdf
+except ImportError:
+    from pdf_parser import StatementParser, StatementAggregator
+    from uploads import open_pdf
+
+# several statements parsed at once in a process pool
+#
+# every document is split into page ranges, so a long statement is spread over
+# the workers instead of keeping one busy while the others sit idle. results come
+# back in upload order, pages in document order
+#
+# statements that overlap (the same file uploaded twice, or periods that share a
+# few days) would count those transactions twice, so the merge keeps each
+# (date, merchant, amount) as many times as the statement with the most copies
+# of it has it. repeat purchases inside one statement are kept. dates without a
+# year (MM/DD) only dedupe correctly within a year of statements
+#
+# a statement can be given as bytes or as a path. with a path only the path
+# goes to the workers, each maps the file instead of receiving a pickled copy
+# of the pdf per page range
+#
+# the pool is created with the ingestor (at server start up) and never forks
+# the threaded server: workers come from a forkserver (spawn where there is
+# none), which imports only this module and forks the workers from that.
+# _parse_pages needs nothing from the server module, so the workers are started
+# without it: multiprocessing would otherwise run the server script again in
+# every worker (as __mp_main__), loading the model, the llm client and caches
+
+_worker_parsers = {}
+
+
+def _parse_pages(task: Tuple[Union[bytes, str], int, int, Optional[str]]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    # runs in the worker, errors are returned so one bad range doesn't fail the batch
+    source, start, stop, backend = task
+    if backend not in _worker_parsers:
+        _worker_parsers[backend] = StatementParser(backend)
+    parser = _worker_parsers[backend]
+
+    try:
+        transactions = []
+        with open_pdf(source) as pdf_file:
+            for text in parser.iter_page_text(pdf_file, start, stop):
+                transactions.extend(parser.parse_transactions(text + "\n"))
+        return transactions, None
+    except Exception as e:
+        return [], str(e)
+
+
+@contextmanager
+def _without_main_module():
+    # processes started inside don't import __main__ (multiprocessing only re-runs
+    # the main module of the parent when it has a file or a module name)
+    main_module = sys.modules['__main__']
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main_module
+
+
+class _WorkerProcess:
+    # pool workers, launched without __main__ (only for the duration of the launch)
+    def start(self):
+        with _without_main_module():
+            super().start()
+
+
+class _SpawnWorkerProcess(_WorkerProcess, multiprocessing.context.SpawnProcess):
+    pass
+
+
+if hasattr(multiprocessing.context, 'ForkServerProcess'):
+    class _ForkServerWorkerProcess(_WorkerProcess, multiprocessing.context.ForkServerProcess):
+        pass
+
+
+def pool_context():
+    # fork from a multi threaded server can copy locks held by other threads.
+    # a context of our own for the worker process class, the shared one keeps
+    # starting processes with __main__
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.context.ForkServerContext()
+        context.set_forkserver_preload([__name__])
+        context.Process = _ForkServerWorkerProcess
+    else:
+        context = multiprocessing.context.SpawnContext()
+        context.Process = _SpawnWorkerProcess
+    return context
+
+
+def transaction_key(transaction: Dict[str, Any]) -> Tuple[str, str, float]:
+    return transaction['date'], transaction['merchant'], transaction['amount']
+
+
+def merge_transactions(statements: List[List[Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], int]:
+    # multiset union: a key appears max(count per statement) times
+    kept = {}
+    merged = []
+    duplicates = 0
+
+    for transactions in statements:
+        seen = {}
+        for transaction in transactions:
+            key = transaction_key(transaction)
+            seen[key] = seen.get(key, 0) + 1
+            if seen[key] > kept.get(key, 0):
+                kept[key] = seen[key]
+                merged.append(transaction)
+            else:
+                duplicates += 1
+
+    return merged, duplicates
+
+
+class BulkStatementIngestor:
+    def __init__(self, max_workers: Optional[int] = None, min_pages_per_task: int = 10,
+                 backend: Optional[str] = None):
+        self.parser = StatementParser(backend)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_pages_per_task = min_pages_per_task
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self.start()
+
+    def start(self):
+        # one pool for the life of the ingestor, reused by every request
+        with self._pool_lock:
+            if self._pool is None and self.max_workers > 1:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=pool_context())
+
+    def _map(self, tasks):
+        if self.max_workers == 1 or len(tasks) == 1:
+            return map(_parse_pages, tasks)
+        if self._pool is None:
+            self.start()
+        return self._pool.map(_parse_pages, tasks)
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def page_ranges(self, n_pages: int) -> List[Tuple[int, int]]:
+        # enough ranges to use every worker, but not so small that opening the
+        # document again for each range costs more than it saves
+        pages_per_task = max(self.min_pages_per_task, math.ceil(n_pages / self.max_workers))
+        return [(start, min(start + pages_per_task, n_pages)) for start in range(0, n_pages, pages_per_task)]
+
+    def ingest(self, files: List[Tuple[str, Union[bytes, str]]]) -> Dict[str, Any]:
+        # files: (name, pdf bytes or path) in upload order
+        statements = []
+        tasks = []
+        owners = []
+
+        for index, (name, source) in enumerate(files):
+            statement = {'name': name, 'pages': 0, 'transactions': 0}
+            statements.append(statement)
+            try:
+                with open_pdf(source) as pdf_file:
+                    statement['pages'] = self.parser.page_count(pdf_file)
+            except Exception as e:
+                statement['error'] = str(e)
+                continue
+
+            for start, stop in self.page_ranges(statement['pages']):
+                tasks.append((source, start, stop, self.parser.backend.name))
+                owners.append(index)
+
+        per_statement = [[] for _ in files]
+        for index, (transactions, error) in zip(owners, self._map(tasks)):
+            if error is not None:
+                statements[index]['error'] = error
+            per_statement[index].extend(transactions)
+
+        for index, statement in enumerate(statements):
+            # a statement with a failed page range is left out entirely rather than half counted
+            if 'error' in statement:
+                per_statement[index] = []
+            statement['transactions'] = len(per_statement[index])
+
+        transactions, duplicates = merge_transactions(per_statement)
+        metrics = StatementAggregator().add(transactions).metrics()
+
+        return {
+            'statements': statements,
+            'transactions': transactions,
+            'duplicatesRemoved': duplicates,
+            **metrics
+        }
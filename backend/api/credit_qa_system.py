@@ -11,11 +11,20 @@ from data.prediction_manager import PredictionManager, DataContextManager
 class CreditQASystem:
     
 
-    def __init__(self, model_path, data_path=None, llm_model="gpt-4o"):
+    def __init__(self, model_path, data_path=None, llm_model="gpt-4o", stats_checkpoint=None):
         self.prediction_manager = PredictionManager(model_path)
         self.analyst = CreditAnalyst(model_name=llm_model)
         self.data_context = DataContextManager(data_path) if data_path else None
 
+        # live population stats, fed by every prediction
+        if self.data_context and self.prediction_manager.model:
+            online_stats = self.data_context.create_online_stats(
+                features=self.prediction_manager.model.feature_names,
+                checkpoint_path=stats_checkpoint
+            )
+            if online_stats is not None:
+                self.prediction_manager.attach_online_stats(online_stats, stats_checkpoint)
+
         print("Credit Q&A System initialized successfully!")
 
     def analyze_user(self, user_data):
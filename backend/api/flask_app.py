@@ -1,8 +1,9 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, abort
+from werkzeug.exceptions import RequestEntityTooLarge
 from flask_cors import CORS
 import os
 import sys
-from io import BytesIO
+import tempfile
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -10,10 +11,17 @@ from llm.credit_analyst import CreditAnalyst
 from ml.credit_risk_model import CreditRiskModel
 from data.prediction_manager import PredictionManager
 from api.pdf_parser import StatementParser
+from api.bulk_ingest import BulkStatementIngestor
+from api.statement_cache import StatementCache, DEFAULT_CACHE_DIR
+from api.statement_jobs import StatementJobQueue, JobQueueFull
+from api.uploads import SpooledUploadRequest, max_upload_bytes, upload_stream, spool_to_disk
 import json
 
 app = Flask(__name__)
 CORS(app)
+# uploads spool to disk past UPLOAD_SPOOL_KB, bodies over MAX_UPLOAD_MB are refused with 413
+app.request_class = SpooledUploadRequest
+app.config['MAX_CONTENT_LENGTH'] = max_upload_bytes()
 
 model_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'outputs', 'credit_risk_model.pkl')
 prediction_manager = PredictionManager()
@@ -26,6 +34,22 @@ except Exception as e:
 
 credit_analyst = CreditAnalyst()
 statement_parser = StatementParser()
+bulk_ingestor = BulkStatementIngestor()
+# parsed statements are cached under STATEMENT_CACHE_DIR (empty: memory only),
+# STATEMENT_CACHE_ENTRIES=0 with an empty dir turns the cache off
+statement_cache = StatementCache(
+    statement_parser,
+    cache_dir=os.environ.get('STATEMENT_CACHE_DIR', DEFAULT_CACHE_DIR) or None,
+    max_entries=int(os.environ.get('STATEMENT_CACHE_ENTRIES', 256)),
+    max_disk_entries=int(os.environ.get('STATEMENT_CACHE_DISK_ENTRIES', 4096)),
+    max_disk_bytes=int(float(os.environ.get('STATEMENT_CACHE_DISK_MB', 256)) * 1024 * 1024),
+    stale_after_seconds=float(os.environ.get('STATEMENT_CACHE_TTL_DAYS', 7)) * 24 * 3600
+)
+statement_jobs = StatementJobQueue(
+    statement_parser,
+    max_workers=int(os.environ.get('STATEMENT_JOB_WORKERS', 2)),
+    max_queued=int(os.environ.get('STATEMENT_JOB_QUEUE', 16))
+)
 
 def load_customer_map():
     try:
@@ -37,6 +61,17 @@ def load_customer_map():
         print(f"Could not load customer map: {e}")
     return {}
 
+@app.before_request
+def check_upload_size():
+    # refuse on the header alone, before any of the body is read
+    if request.content_length is not None and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        abort(413)
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024)
+    return jsonify({'error': f'Upload too large, the limit is {limit_mb:g} MB'}), 413
+
 @app.route('/api/customer-name', methods=['GET'])
 def customer_name():
     """
@@ -87,24 +122,155 @@ def parse_statement():
         if not file.filename.endswith('.pdf'):
             return jsonify({'error': 'File must be a PDF'}), 400
 
-        print("Reading PDF bytes...")
-        pdf_bytes = BytesIO(file.read())
+        # the same statement is uploaded on every dashboard reload, so the
+        # parsed json comes from the cache whenever the pdf is unchanged
+        parsed_json, cache_tier = statement_cache.parse_statement_json(upload_stream(file))
+        print(f"Statement cache: {cache_tier}")
+
+        if cache_tier == 'miss':
+            parsed_data = json.loads(parsed_json)
+            print(f"Parsed {len(parsed_data.get('transactions', []))} transactions")
+            print(f"Total spent: ${parsed_data.get('totalSpent', 0)}")
+            print(f"Categories: {list(parsed_data.get('categories', {}).keys())}")
+
+        return Response(parsed_json, mimetype='application/json')
+
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        print(f"Error parsing statement: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/parse-statement/stream', methods=['POST'])
+def parse_statement_stream():
+    """
+    Same upload as /api/parse-statement, answered as newline delimited json:
+    one line per page with that page's transactions and the metrics so far
+    """
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file uploaded'}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+
+    if not file.filename.endswith('.pdf'):
+        return jsonify({'error': 'File must be a PDF'}), 400
+
+    pdf_file = upload_stream(file)
+
+    def generate():
+        try:
+            for update in statement_parser.parse_statement_stream(pdf_file):
+                yield json.dumps(update) + '\n'
+        except Exception as e:
+            # the status line is already sent, so the error goes in the stream
+            print(f"Error streaming statement: {e}")
+            yield json.dumps({'error': str(e)}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/parse-statements', methods=['POST'])
+def parse_statements():
+    """
+    Multipart upload with several PDFs under the 'files' field.
+    Returns the merged, deduplicated transactions and metrics, plus one entry per statement
+    """
+    try:
+        files = request.files.getlist('files')
+        if not files:
+            return jsonify({'error': 'No files uploaded'}), 400
+
+        for file in files:
+            if not file.filename.endswith('.pdf'):
+                return jsonify({'error': f'File must be a PDF: {file.filename}'}), 400
 
-        print("Parsing statement...")
-        parsed_data = statement_parser.parse_statement(pdf_bytes)
+        print(f"Parsing {len(files)} statements...")
+        # workers get paths to spooled copies, not the pdf bytes
+        with tempfile.TemporaryDirectory(prefix='statements-') as spool_dir:
+            parsed_data = bulk_ingestor.ingest([(file.filename, spool_to_disk(file, spool_dir)) for file in files])
 
-        print(f"Parsed {len(parsed_data.get('transactions', []))} transactions")
-        print(f"Total spent: ${parsed_data.get('totalSpent', 0)}")
-        print(f"Categories: {list(parsed_data.get('categories', {}).keys())}")
+        print(f"Parsed {len(parsed_data['transactions'])} transactions "
+              f"({parsed_data['duplicatesRemoved']} duplicates removed)")
 
         return jsonify(parsed_data)
 
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
-        print(f"Error parsing statement: {e}")
+        print(f"Error parsing statements: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+def job_status(job, include_result=True):
+    status = {k: v for k, v in job.items() if k not in ('result', 'version')}
+    if include_result and job['status'] == 'done':
+        status['result'] = job['result']
+    return status
+
+
+@app.route('/api/parse-statement/jobs', methods=['POST'])
+def submit_statement_job():
+    """
+    Same upload as /api/parse-statement, parsed in the background.
+    Returns 202 with a job_id to poll, or 429 when the job queue is full
+    """
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file uploaded'}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+
+    if not file.filename.endswith('.pdf'):
+        return jsonify({'error': 'File must be a PDF'}), 400
+
+    # the job outlives the request, so it gets its own spooled copy (removed when it ends)
+    pdf_path = spool_to_disk(file)
+    try:
+        job_id = statement_jobs.submit(pdf_path, file.filename)
+    except JobQueueFull as e:
+        os.remove(pdf_path)
+        return jsonify({'error': f'Too many statements in progress, retry later ({e})'}), 429, {'Retry-After': '5'}
+
+    print(f"Queued statement job {job_id} for {file.filename}")
+    return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+
+
+@app.route('/api/parse-statement/jobs/<job_id>', methods=['GET'])
+def statement_job(job_id):
+    job = statement_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'job not found'}), 404
+    return jsonify(job_status(job))
+
+
+@app.route('/api/parse-statement/jobs/<job_id>/events', methods=['GET'])
+def statement_job_events(job_id):
+    """
+    Server-sent events: a 'progress' event on every page, then one 'done' or 'failed'
+    event carrying the result or the error
+    """
+    job = statement_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'job not found'}), 404
+
+    def generate(job):
+        while True:
+            finished = job['status'] in ('done', 'failed')
+            event = job['status'] if finished else 'progress'
+            yield f"event: {event}\ndata: {json.dumps(job_status(job, include_result=finished))}\n\n"
+            if finished:
+                return
+            job = statement_jobs.wait(job_id, job['version'])
+            if job is None:
+                return
+
+    return Response(generate(job), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
@@ -293,7 +459,12 @@ def spending_insights():
 
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'healthy', 'model_loaded': prediction_manager.model is not None})
+    return jsonify({
+        'status': 'healthy',
+        'model_loaded': prediction_manager.model is not None,
+        'statement_jobs': statement_jobs.stats(),
+        'pdf_backend': statement_parser.backend.name
+    })
 
 
 if __name__ == '__main__':
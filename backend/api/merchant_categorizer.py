@@ -0,0 +1,83 @@
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+# merchant -> category with every keyword compiled into one Aho-Corasick automaton
+#
+# the merchant is scanned once, whatever the number of keywords. every automaton
+# state knows the highest priority (lowest index) category among all keywords
+# ending there, so "first category in dict order wins" is kept exactly, and the
+# scan stops as soon as the top priority category is seen
+#
+# statements repeat merchants a lot, so results are memoized in a bounded LRU
+
+
+class MerchantCategorizer:
+    def __init__(self, categories: Dict[str, List[str]], default: str = 'Other', cache_size: int = 4096):
+        self.category_names = list(categories)
+        self.default = default
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._priority: List[Optional[int]] = [None]
+        for priority, keywords in enumerate(categories.values()):
+            for keyword in keywords:
+                self._add(keyword, priority)
+        self._link()
+
+        self.categorize = lru_cache(maxsize=cache_size)(self._categorize)
+
+    def _add(self, keyword: str, priority: int):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._priority.append(None)
+                self._goto[state][char] = next_state
+            state = next_state
+        self._priority[state] = self._best(self._priority[state], priority)
+
+    @staticmethod
+    def _best(a: Optional[int], b: Optional[int]) -> Optional[int]:
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return min(a, b)
+
+    def _link(self):
+        # breadth first fail links; each state inherits the best priority of its
+        # fail chain so a scan only has to look at the current state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._priority[child] = self._best(self._priority[child], self._priority[self._fail[child]])
+
+    def _categorize(self, merchant: str) -> str:
+        goto, fail, priorities = self._goto, self._fail, self._priority
+        best = priorities[0]
+        state = 0
+        for char in merchant.lower():
+            if best == 0:
+                break
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            priority = priorities[state]
+            if priority is not None and (best is None or priority < best):
+                best = priority
+
+        return self.default if best is None else self.category_names[best]
+
+    def cache_info(self):
+        return self.categorize.cache_info()
@@ -0,0 +1,150 @@
+import importlib.util
+import io
+import json
+import mmap
+import os
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List, Optional
+
+import PyPDF2
+
+# pdf text extraction backends for StatementParser
+#
+# every backend reads a seekable binary file and yields the text of pages
+# [start, stop). PyPDF2 is a hard dependency and always the fallback, the others
+# are used when their package is installed:
+#   - pymupdf   (pip install pymupdf)      MuPDF, much faster on long statements
+#   - pdfminer  (pip install pdfminer.six) pure python layout analysis
+#
+# which one a parser uses by default:
+#   1. the PDF_BACKEND environment variable
+#   2. the backend picked by `statement_corpus.py backends --select`, the fastest
+#      one that parsed the whole corpus correctly (outputs/pdf_backend.json)
+#   3. pypdf2
+# a backend that isn't installed is skipped, so a selection made on another
+# machine can't break the parser
+
+FALLBACK_BACKEND = 'pypdf2'
+SELECTION_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'outputs', 'pdf_backend.json'
+)
+
+
+@contextmanager
+def pdf_buffer(pdf_file: BinaryIO) -> Iterator[memoryview]:
+    # the whole document as one buffer, without a copy where the file already is
+    # one (a memory map, a BytesIO) or can be mapped (a file on disk)
+    if isinstance(pdf_file, io.BytesIO):
+        with pdf_file.getbuffer() as view:
+            yield view
+    elif isinstance(pdf_file, mmap.mmap):
+        with memoryview(pdf_file) as view:
+            yield view
+    else:
+        try:
+            pdf_file.flush()
+            mapped = mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            pdf_file.seek(0)
+            yield memoryview(pdf_file.read())
+            return
+        with mapped, memoryview(mapped) as view:
+            yield view
+
+
+class PdfBackend:
+    name = None
+    module = None
+
+    def available(self) -> bool:
+        return importlib.util.find_spec(self.module) is not None
+
+    def page_count(self, pdf_file: BinaryIO) -> int:
+        raise NotImplementedError
+
+    def iter_pages(self, pdf_file: BinaryIO, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class PyPDF2Backend(PdfBackend):
+    name = 'pypdf2'
+    module = 'PyPDF2'
+
+    def page_count(self, pdf_file):
+        return len(PyPDF2.PdfReader(pdf_file).pages)
+
+    def iter_pages(self, pdf_file, start=0, stop=None):
+        pages = PyPDF2.PdfReader(pdf_file).pages
+        for page_index in range(start, len(pages) if stop is None else stop):
+            yield pages[page_index].extract_text()
+
+
+class PyMuPDFBackend(PdfBackend):
+    name = 'pymupdf'
+    module = 'pymupdf'
+
+    @contextmanager
+    def _open(self, pdf_file):
+        import pymupdf
+        # mupdf wants the whole document as one buffer, it reads it in place
+        with pdf_buffer(pdf_file) as buffer, pymupdf.open(stream=buffer, filetype='pdf') as document:
+            yield document
+
+    def page_count(self, pdf_file):
+        with self._open(pdf_file) as document:
+            return document.page_count
+
+    def iter_pages(self, pdf_file, start=0, stop=None):
+        with self._open(pdf_file) as document:
+            for page_index in range(start, document.page_count if stop is None else stop):
+                yield document[page_index].get_text()
+
+
+class PdfminerBackend(PdfBackend):
+    name = 'pdfminer'
+    module = 'pdfminer'
+
+    def page_count(self, pdf_file):
+        from pdfminer.pdfpage import PDFPage
+        pdf_file.seek(0)
+        return sum(1 for _ in PDFPage.get_pages(pdf_file))
+
+    def iter_pages(self, pdf_file, start=0, stop=None):
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+
+        pdf_file.seek(0)
+        page_numbers = None if stop is None and start == 0 else range(start, stop if stop is not None else 2 ** 31)
+        for page in extract_pages(pdf_file, page_numbers=page_numbers):
+            yield ''.join(element.get_text() for element in page if isinstance(element, LTTextContainer))
+
+
+BACKENDS = {backend.name: backend for backend in (PyMuPDFBackend(), PdfminerBackend(), PyPDF2Backend())}
+
+
+def available_backends() -> List[str]:
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def load_selection(path: str = SELECTION_PATH) -> Optional[str]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('backend')
+    except (OSError, ValueError):
+        return None
+
+
+def get_backend(name: Optional[str] = None) -> PdfBackend:
+    # an explicit name must exist and be installed, the defaults fall through
+    if name is not None:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown PDF backend: {name} (choose from {', '.join(BACKENDS)})")
+        if not BACKENDS[name].available():
+            raise ValueError(f"PDF backend {name} is not installed")
+        return BACKENDS[name]
+
+    for candidate in (os.environ.get('PDF_BACKEND'), load_selection()):
+        if candidate in BACKENDS and BACKENDS[candidate].available():
+            return BACKENDS[candidate]
+    return BACKENDS[FALLBACK_BACKEND]
+
@@ -1,10 +1,46 @@
-import PyPDF2
 import re
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Iterator
+
+try:
+    from .merchant_categorizer import MerchantCategorizer
+    from .pdf_backends import get_backend, BACKENDS, FALLBACK_BACKEND
+    from .statement_aggregator import StatementAggregator
+except ImportError:
+    from merchant_categorizer import MerchantCategorizer
+    from pdf_backends import get_backend, BACKENDS, FALLBACK_BACKEND
+    from statement_aggregator import StatementAggregator
+
+# legacy patterns, in the order parse_transactions tries them
+DATE_PATTERNS = [
+    re.compile(r'(\d{2}/\d{2}/\d{4})'),  # MM/DD/YYYY
+    re.compile(r'(\d{2}/\d{2})'),         # MM/DD
+    re.compile(r'(\d{1,2}-\d{1,2}-\d{4})'), # M-D-YYYY
+]
+AMOUNT_PATTERN = re.compile(r'\$?([\d,]+\.\d{2})')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# one combined pattern per supported statement layout, matched against the whole line
+# "DATE MERCHANT AMOUNT": date first, amount is the last whitespace separated token
+# (which makes it the same amount the legacy "last finditer match" picks)
+LINE_LAYOUTS = [
+    re.compile(
+        r'(?:(?P<full>\d{2}/\d{2}/\d{4})|(?P<short>\d{2}/\d{2})|(?P<dashed>\d{1,2}-\d{1,2}-\d{4}))'
+        r'(?P<merchant>\s.*?)\s(?P<amount>\$?(?P<digits>[\d,]+\.\d{2}))'
+    ),
+]
+
+PARSER_ENGINES = ('compiled', 'legacy')
+
+# bump whenever parse_statement output changes for the same pdf, cached results
+# from older versions are then ignored
+PARSER_VERSION = '3'
+
 
 class StatementParser:
-    def __init__(self):
+    def __init__(self, backend: Optional[str] = None):
+        # backend: pdf text extractor name, None for the configured/selected default
+        self.backend = get_backend(backend)
         self.categories = {
             'Travel & Entertainment': [
                 'airline', 'hotel', 'travel', 'uber', 'lyft', 'taxi', 'airbnb', 'flight', 'airways',
@@ -28,8 +64,13 @@ class StatementParser:
             'Services': ['ups', 'shipping', 'service', 'delivery'],
             'Department Store': ['department', 'bloomingdale', 'macys', 'nordstrom'],
         }
+        self.categorizer = MerchantCategorizer(self.categories)
 
     def categorize_transaction(self, merchant: str) -> str:
+        # one automaton scan (memoized) instead of a substring test per keyword
+        return self.categorizer.categorize(merchant)
+
+    def _categorize_legacy(self, merchant: str) -> str:
         merchant_lower = merchant.lower()
 
         for category, keywords in self.categories.items():
@@ -38,187 +79,176 @@ class StatementParser:
 
         return 'Other'
 
-    def extract_text_from_pdf(self, pdf_file) -> str:
+    def iter_page_text(self, pdf_file, start: int = 0, stop: Optional[int] = None,
+                       fallback: bool = True) -> Iterator[str]:
+        # one page at a time, so parsing can start before the last page is extracted
+        # a backend that can't open the file at all gets a second try with PyPDF2,
+        # unless fallback is False
+        backends = [self.backend]
+        if fallback and self.backend.name != FALLBACK_BACKEND:
+            backends.append(BACKENDS[FALLBACK_BACKEND])
+
+        for backend in backends:
+            pages_done = 0
+            try:
+                for text in backend.iter_pages(pdf_file, start, stop):
+                    pages_done += 1
+                    yield text
+                return
+            except Exception as e:
+                if pages_done or backend is backends[-1]:
+                    raise Exception(f"Error extracting PDF text: {str(e)}")
+                print(f"PDF backend {backend.name} failed ({e}), falling back to {FALLBACK_BACKEND}")
+
+    def page_count(self, pdf_file) -> int:
         try:
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            full_text = ""
+            return self.backend.page_count(pdf_file)
+        except Exception:
+            try:
+                return BACKENDS[FALLBACK_BACKEND].page_count(pdf_file)
+            except Exception as e:
+                raise Exception(f"Error extracting PDF text: {str(e)}")
 
-            for page in pdf_reader.pages:
-                full_text += page.extract_text() + "\n"
+    def extract_text_from_pdf(self, pdf_file) -> str:
+        return ''.join(text + "\n" for text in self.iter_page_text(pdf_file))
 
-            return full_text
-        except Exception as e:
-            raise Exception(f"Error extracting PDF text: {str(e)}")
+    def parse_transactions(self, text: str, engine: str = 'compiled') -> List[Dict[str, Any]]:
+        # 'compiled' tokenizes each line once with a layout pattern and falls back to
+        # the legacy search for lines it can't prove it reads the same way
+        # 'legacy' is the original search-per-pattern parser, both return the same dicts
+        if engine not in PARSER_ENGINES:
+            raise ValueError(f"Unknown parser engine: {engine}")
 
-    def parse_transactions(self, text: str) -> List[Dict[str, Any]]:
+        parse_line = self._parse_line_compiled if engine == 'compiled' else self._parse_line_legacy
         transactions = []
-        lines = text.split('\n')
 
-        # Updated patterns to match more formats
-        date_patterns = [
-            r'(\d{2}/\d{2}/\d{4})',  # MM/DD/YYYY
-            r'(\d{2}/\d{2})',         # MM/DD
-            r'(\d{1,2}-\d{1,2}-\d{4})', # M-D-YYYY
-        ]
+        for line in text.split('\n'):
+            transaction = parse_line(line.strip())
+            if transaction is not None:
+                transactions.append(transaction)
 
-        amount_pattern = r'\$?([\d,]+\.\d{2})'
+        return transactions
 
-        for line in lines:
-            line = line.strip()
-            if not line or len(line) < 10:
-                continue
+    def _parse_line_compiled(self, line: str) -> Optional[Dict[str, Any]]:
+        if len(line) < 10:
+            return None
 
-            # Try each date pattern
-            date_match = None
-            for pattern in date_patterns:
-                date_match = re.search(pattern, line)
-                if date_match:
-                    break
+        for layout in LINE_LAYOUTS:
+            match = layout.fullmatch(line)
+            if match is not None:
+                break
+        else:
+            return self._parse_line_legacy(line)
+
+        # legacy takes the first date *pattern* found anywhere in the line, so a
+        # short date only wins if no full date appears later, a dashed one only if
+        # no slashed one does
+        if match.group('short') is not None:
+            if '/' in line[5:] and DATE_PATTERNS[0].search(line):
+                return self._parse_line_legacy(line)
+        elif match.group('dashed') is not None:
+            if '/' in line and DATE_PATTERNS[1].search(line):
+                return self._parse_line_legacy(line)
+
+        amount = float(match.group('digits').replace(',', ''))
+        if amount <= 0:
+            return None
+
+        merchant = ' '.join(match.group('merchant').split())[:100]
+        if len(merchant) < 3:
+            return None
 
-            if not date_match:
-                continue
+        return {
+            'date': match.group('full') or match.group('short') or match.group('dashed'),
+            'merchant': merchant,
+            'category': self.categorize_transaction(merchant),
+            'amount': amount
+        }
 
-            # Find all amounts in the line
-            amount_matches = list(re.finditer(amount_pattern, line))
+    def _parse_line_legacy(self, line: str) -> Optional[Dict[str, Any]]:
+        if not line or len(line) < 10:
+            return None
 
-            if not amount_matches:
-                continue
+        # every date pattern needs a '/' or a '-'
+        if '/' not in line and '-' not in line:
+            return None
 
-            # Usually the last amount is the transaction amount
-            amount_match = amount_matches[-1]
-            amount = float(amount_match.group(1).replace(',', ''))
+        # Try each date pattern
+        date_match = None
+        for pattern in DATE_PATTERNS:
+            date_match = pattern.search(line)
+            if date_match:
+                break
 
-            if amount <= 0:
-                continue
+        if not date_match:
+            return None
 
-            date = date_match.group(1)
+        # Find all amounts in the line
+        amount_matches = list(AMOUNT_PATTERN.finditer(line))
 
-            # Extract merchant (text between date and amount)
-            merchant_start = date_match.end()
-            merchant_end = amount_match.start()
-            merchant = line[merchant_start:merchant_end].strip()
+        if not amount_matches:
+            return None
 
-            # Clean up merchant name
-            merchant = re.sub(r'\s+', ' ', merchant)
-            merchant = merchant[:100]  # Limit length
+        # Usually the last amount is the transaction amount
+        amount_match = amount_matches[-1]
+        amount = float(amount_match.group(1).replace(',', ''))
 
-            if len(merchant) < 3:
-                continue
+        if amount <= 0:
+            return None
 
-            category = self.categorize_transaction(merchant)
+        date = date_match.group(1)
 
-            transactions.append({
-                'date': date,
-                'merchant': merchant,
-                'category': category,
-                'amount': amount
-            })
+        # Extract merchant (text between date and amount)
+        merchant_start = date_match.end()
+        merchant_end = amount_match.start()
+        merchant = line[merchant_start:merchant_end].strip()
 
-        return transactions
+        # Clean up merchant name
+        merchant = WHITESPACE_PATTERN.sub(' ', merchant)
+        merchant = merchant[:100]  # Limit length
 
-    def calculate_metrics(self, transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
-        if not transactions:
-            return {
-                'totalSpent': 0,
-                'categories': {},
-                'weeklySpending': [],
-                'dailySpending': [],
-                'spendingRate': 0,
-                'cashStability': 0,
-                'budgetOverage': 0,
-                'daysInPeriod': 0
-            }
-
-        # Calculate totals by category
-        categories = {}
-        total_spent = 0
-
-        for transaction in transactions:
-            category = transaction['category']
-            amount = transaction['amount']
-            categories[category] = categories.get(category, 0) + amount
-            total_spent += amount
-
-        # Calculate daily spending
-        daily_map = {}
-        for transaction in transactions:
-            date = transaction['date']
-            daily_map[date] = daily_map.get(date, 0) + transaction['amount']
-
-        daily_spending = [
-            {'date': date, 'amount': round(amount, 2)}
-            for date, amount in sorted(daily_map.items())
-        ]
-
-        # Calculate weekly spending for the chart
-        weekly_map = {}
-        for transaction in transactions:
-            date_parts = transaction['date'].split('/')
-            if len(date_parts) >= 2:
-                day = int(date_parts[1] if date_parts[1].isdigit() else date_parts[0])
-
-                if day <= 7:
-                    week = 'Week 1'
-                elif day <= 14:
-                    week = 'Week 2'
-                elif day <= 21:
-                    week = 'Week 3'
-                else:
-                    week = 'Week 4'
-
-                weekly_map[week] = weekly_map.get(week, 0) + transaction['amount']
-
-        weekly_spending = [
-            {'week': week, 'amount': round(amount, 2)}
-            for week, amount in weekly_map.items()
-        ]
-
-        # Calculate metrics based on days, not weeks
-        num_days = len(daily_map)
-        if num_days > 0:
-            spending_rate = round(total_spent / num_days, 2)
-
-            # Calculate stability based on daily variance (coefficient of variation)
-            avg_daily = total_spent / num_days
-            variance = sum((amount - avg_daily) ** 2 for amount in daily_map.values()) / num_days
-            std_dev = variance ** 0.5
-
-            if avg_daily > 0:
-                # Coefficient of variation (CV) - lower is more stable
-                cv = (std_dev / avg_daily) * 100
-                # Convert to stability score (0-100, where 100 is most stable)
-                # A CV of 0% = 100 stability, CV of 100%+ = 0 stability
-                cash_stability = max(0, min(100, round(100 - cv)))
-            else:
-                cash_stability = 100
-        else:
-            spending_rate = 0
-            cash_stability = 0
+        if len(merchant) < 3:
+            return None
 
-        monthly_budget = 2000
-        budget_overage = round(total_spent - monthly_budget, 2)
+        category = self.categorize_transaction(merchant)
 
         return {
-            'totalSpent': round(total_spent, 2),
-            'categories': {k: round(v, 2) for k, v in categories.items()},
-            'weeklySpending': weekly_spending,
-            'dailySpending': daily_spending,
-            'spendingRate': spending_rate,
-            'cashStability': cash_stability,
-            'budgetOverage': budget_overage,
-            'daysInPeriod': num_days,
-            'monthlyBudget': monthly_budget
+            'date': date,
+            'merchant': merchant,
+            'category': category,
+            'amount': amount
         }
 
-    def parse_statement(self, pdf_file) -> Dict[str, Any]:
+    def calculate_metrics(self, transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return StatementAggregator().add(transactions).metrics()
+
+    def parse_statement_stream(self, pdf_file, fallback: bool = True) -> Iterator[Dict[str, Any]]:
+        # one update per page: that page's transactions and the metrics so far.
+        # a line never spans pages (every page ends with a newline in the full
+        # text), so the pages together give exactly what parse_statement gives
         try:
-            text = self.extract_text_from_pdf(pdf_file)
-            transactions = self.parse_transactions(text)
-            metrics = self.calculate_metrics(transactions)
-
-            return {
-                'transactions': transactions,
-                **metrics
-            }
+            aggregator = StatementAggregator()
+            for page_number, text in enumerate(self.iter_page_text(pdf_file, fallback=fallback), start=1):
+                transactions = self.parse_transactions(text)
+                aggregator.add(transactions)
+                yield {
+                    'page': page_number,
+                    'transactions': transactions,
+                    **aggregator.metrics()
+                }
         except Exception as e:
             raise Exception(f"Error parsing statement: {str(e)}")
+
+    def parse_statement(self, pdf_file, fallback: bool = True) -> Dict[str, Any]:
+        transactions = []
+        metrics = StatementAggregator().metrics()
+        for update in self.parse_statement_stream(pdf_file, fallback):
+            transactions.extend(update.pop('transactions'))
+            update.pop('page')
+            metrics = update
+
+        return {
+            'transactions': transactions,
+            **metrics
+        }
+
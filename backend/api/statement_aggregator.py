@@ -0,0 +1,254 @@
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# spending metrics for parse_statement, one vectorized pass per batch of transactions
+#
+# dates are parsed once per distinct date string into day numbers (numpy
+# datetime64[D]), so daily totals sort chronologically across months and years
+# and weeks are 7 day windows from the first day of the statement, whatever the
+# date format (MM/DD, MM/DD/YYYY, M-D-YYYY)
+#
+# MM/DD dates carry no year. reading transactions in statement order, the year
+# moves forward when the month jumps back by more than six (12/30 -> 01/02) and
+# back when it jumps forward by more than six (a late posted 12/31 after 01/02),
+# so a statement over new year orders correctly. they are kept apart in a leap
+# base year until the metrics, which place them in the years closest to the
+# first transaction that has a year (base year if none has one)
+#
+# a misread date decades away would stretch the weeks over the whole gap, days
+# more than MAX_SPAN_DAYS from the statement's median day don't count as days
+#
+# the aggregator only keeps per day and per category totals, batches (pages)
+# are merged into them, so memory doesn't grow with the number of transactions
+
+BASE_YEAR = 2000
+MAX_SPAN_DAYS = 366
+
+
+def parse_date(text: str) -> Optional[Tuple[int, int, int]]:
+    # (year or 0 when the date has none, month, day), None if it isn't a date
+    separator = '/' if '/' in text else '-'
+    parts = text.split(separator)
+    if len(parts) not in (2, 3) or not all(part.isdigit() for part in parts):
+        return None
+    month, day = int(parts[0]), int(parts[1])
+    year = int(parts[2]) if len(parts) == 3 else 0
+    if not 1 <= month <= 12 or day < 1:
+        return None
+    return year, month, day
+
+
+def day_numbers(years: np.ndarray, months: np.ndarray, days: np.ndarray) -> np.ndarray:
+    # datetime64[D] day numbers, -1 where month is 0 (no date) or the day doesn't exist
+    valid = months > 0
+    month_start = (
+        (np.where(valid, years, 1970) - 1970).astype('datetime64[Y]')
+        + (np.where(valid, months, 1) - 1).astype('timedelta64[M]')
+    )
+    month_length = ((month_start + 1) - month_start.astype('datetime64[D]')).astype(np.int64)
+    valid &= (days >= 1) & (days <= month_length)
+
+    numbers = (month_start.astype('datetime64[D]') + (days - 1)).astype(np.int64)
+    return np.where(valid, numbers, -1)
+
+
+def split_days(numbers: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # inverse of day_numbers: (years, months, days)
+    dates = numbers.astype('datetime64[D]')
+    month_start = dates.astype('datetime64[M]')
+    years = month_start.astype('datetime64[Y]')
+    return (
+        years.astype(np.int64) + 1970,
+        (month_start - years.astype('datetime64[M]')).astype(np.int64) + 1,
+        (dates - month_start.astype('datetime64[D]')).astype(np.int64) + 1
+    )
+
+
+def _merge_days(days: np.ndarray, totals: np.ndarray, new_days: np.ndarray,
+                new_amounts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    merged, inverse = np.unique(np.concatenate((days, new_days)), return_inverse=True)
+    return merged, np.bincount(inverse, weights=np.concatenate((totals, new_amounts)), minlength=len(merged))
+
+
+def _year_offsets(months: np.ndarray, last_month: Optional[int]) -> np.ndarray:
+    # +1 for every jump back over new year, -1 for every jump forward, cumulated
+    previous = np.concatenate(([months[0] if last_month is None else last_month], months[:-1]))
+    steps = months - previous
+    return np.cumsum((steps < -6).astype(np.int64) - (steps > 6))
+
+
+class StatementAggregator:
+    def __init__(self, monthly_budget: float = 2000):
+        self.monthly_budget = monthly_budget
+        self.total_spent = 0.0
+
+        # category -> code in first seen order, and the totals per code
+        self.category_codes = {}
+        self.category_totals = np.zeros(0)
+
+        # sorted day numbers, their totals, and the date as first written on the statement,
+        # for dates with a year and for MM/DD dates (day numbers in the base year)
+        self.days = np.empty(0, dtype=np.int64)
+        self.day_totals = np.zeros(0)
+        self.day_labels = {}
+        self.undated_days = np.empty(0, dtype=np.int64)
+        self.undated_totals = np.zeros(0)
+        self.undated_labels = {}
+
+        # day number of the first transaction with a year, places the MM/DD dates
+        self.anchor_day = None
+
+        self._parsed_dates = {}
+        self._last_month = None
+        self._year_offset = 0
+
+    def _day_numbers(self, dates: List[str], date_codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # (day number per transaction, mask of the MM/DD ones), the day number is -1
+        # where the date doesn't parse or doesn't exist and in the base year for MM/DD
+        # dates: distinct date strings, date_codes: index into dates per transaction
+        parsed = []
+        for text in dates:
+            if text not in self._parsed_dates:
+                self._parsed_dates[text] = parse_date(text)
+            parsed.append(self._parsed_dates[text] or (0, 0, 0))
+        years, months, days = np.array(parsed, dtype=np.int64).reshape(-1, 3)[date_codes].T
+
+        undated = (months > 0) & (years == 0)
+        if undated.any():
+            offsets = _year_offsets(months[undated], self._last_month) + self._year_offset
+            years[undated] = BASE_YEAR + offsets
+            self._last_month = int(months[undated][-1])
+            self._year_offset = int(offsets[-1])
+
+        numbers = day_numbers(years, months, days)
+        if self.anchor_day is None:
+            anchors = np.flatnonzero((numbers >= 0) & ~undated)
+            if len(anchors):
+                self.anchor_day = int(numbers[anchors[0]])
+        return numbers, undated
+
+    def add(self, transactions: List[Dict[str, Any]]) -> 'StatementAggregator':
+        if not transactions:
+            return self
+
+        # the only per transaction python: pulling the three fields into arrays
+        n = len(transactions)
+        category_codes = self.category_codes
+        date_index = {}
+        codes = np.fromiter(
+            (category_codes.setdefault(t['category'], len(category_codes)) for t in transactions), np.int64, n
+        )
+        date_codes = np.fromiter((date_index.setdefault(t['date'], len(date_index)) for t in transactions), np.int64, n)
+        amounts = np.fromiter((t['amount'] for t in transactions), np.float64, n)
+
+        self.total_spent += float(amounts.sum())
+        totals = np.bincount(codes, weights=amounts, minlength=len(category_codes))
+        totals[:len(self.category_totals)] += self.category_totals
+        self.category_totals = totals
+
+        # transactions whose date can't be read count towards the totals, not the days
+        dates = list(date_index)
+        numbers, undated = self._day_numbers(dates, date_codes)
+        for mask, labels in ((numbers >= 0) & ~undated, self.day_labels), ((numbers >= 0) & undated, self.undated_labels):
+            batch_days, first = np.unique(numbers[mask], return_index=True)
+            for day, code in zip(batch_days.tolist(), date_codes[mask][first].tolist()):
+                labels.setdefault(day, dates[code])
+
+        dated = (numbers >= 0) & ~undated
+        self.days, self.day_totals = _merge_days(self.days, self.day_totals, numbers[dated], amounts[dated])
+        undated &= numbers >= 0
+        self.undated_days, self.undated_totals = _merge_days(
+            self.undated_days, self.undated_totals, numbers[undated], amounts[undated]
+        )
+        return self
+
+    def _placed_undated(self) -> np.ndarray:
+        # day numbers of the MM/DD days in the years closest to the anchor day,
+        # -1 for a 02/29 that lands in a year without one
+        if self.anchor_day is None or not len(self.undated_days):
+            return self.undated_days
+        years, months, days = split_days(self.undated_days)
+        anchor_year = int(split_days(np.array([self.anchor_day]))[0][0])
+        best = None
+        for first_year in (anchor_year - 1, anchor_year, anchor_year + 1):
+            placed = day_numbers(years - BASE_YEAR + first_year, months, days)
+            distance = np.abs(placed[placed >= 0] - self.anchor_day).min(initial=np.iinfo(np.int64).max)
+            if best is None or distance < best[0]:
+                best = (distance, placed)
+        return best[1]
+
+    def timeline(self) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        # (sorted day numbers, totals per day, date labels) of every day that counts
+        placed = self._placed_undated()
+        labels = dict(zip(placed.tolist(), (self.undated_labels[day] for day in self.undated_days.tolist())))
+        labels.update(self.day_labels)
+        kept = placed >= 0
+        days, totals = _merge_days(self.days, self.day_totals, placed[kept], self.undated_totals[kept])
+
+        if len(days):
+            in_span = np.abs(days - np.median(days)) <= MAX_SPAN_DAYS
+            days, totals = days[in_span], totals[in_span]
+        return days, totals, [labels[day] for day in days.tolist()]
+
+    def metrics(self) -> Dict[str, Any]:
+        if not self.category_codes:
+            return {
+                'totalSpent': 0,
+                'categories': {},
+                'weeklySpending': [],
+                'dailySpending': [],
+                'spendingRate': 0,
+                'cashStability': 0,
+                'budgetOverage': 0,
+                'daysInPeriod': 0
+            }
+
+        total_spent = self.total_spent
+        days, day_totals, labels = self.timeline()
+        num_days = len(days)
+
+        daily_spending = [
+            {'date': label, 'amount': round(float(amount), 2)}
+            for label, amount in zip(labels, day_totals)
+        ]
+
+        # every week from the first to the last day, weeks without spending included
+        weekly_spending = []
+        if num_days:
+            weekly_totals = np.bincount((days - days[0]) // 7, weights=day_totals)
+            weekly_spending = [
+                {'week': f'Week {week + 1}', 'amount': round(float(amount), 2)}
+                for week, amount in enumerate(weekly_totals)
+            ]
+
+        # Calculate metrics based on days, not weeks. both use the days that count,
+        # amounts without a readable date are only in the totals
+        if num_days > 0:
+            avg_daily = float(day_totals.mean())
+            spending_rate = round(avg_daily, 2)
+
+            # stability from the coefficient of variation of daily totals, lower CV is
+            # more stable: CV 0% = 100 stability, CV 100%+ = 0 stability
+            if avg_daily > 0:
+                cv = float(day_totals.std()) / avg_daily * 100
+                cash_stability = max(0, min(100, round(100 - cv)))
+            else:
+                cash_stability = 100
+        else:
+            spending_rate = 0
+            cash_stability = 0
+
+        budget_overage = round(total_spent - self.monthly_budget, 2)
+
+        return {
+            'totalSpent': round(total_spent, 2),
+            'categories': {name: round(float(total), 2) for name, total in zip(self.category_codes, self.category_totals)},
+            'weeklySpending': weekly_spending,
+            'dailySpending': daily_spending,
+            'spendingRate': spending_rate,
+            'cashStability': cash_stability,
+            'budgetOverage': budget_overage,
+            'daysInPeriod': num_days,
+            'monthlyBudget': self.monthly_budget
+        }
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Union, BinaryIO
+
+try:
+    from .pdf_backends import FALLBACK_BACKEND
+    from .pdf_parser import StatementParser, PARSER_VERSION
+    from .uploads import open_pdf, stream_sha256
+except ImportError:
+    from pdf_backends import FALLBACK_BACKEND
+    from pdf_parser import StatementParser, PARSER_VERSION
+    from uploads import open_pdf, stream_sha256
+
+# parse_statement results keyed by the pdf content
+#
+# key = sha256(parser fingerprint + pdf bytes), where the fingerprint covers
+# PARSER_VERSION, the pdf backend and the category keywords, so a parser
+# upgrade, another extractor or a keyword change misses instead of serving
+# stale results. a statement the backend can't read is still parsed (PyPDF2
+# fallback) but not cached under a fingerprint that names another backend
+#
+# two tiers, both holding the serialized json so a hit never re-serializes:
+#   - memory: LRU of max_entries
+#   - disk: one file per statement under cache_dir/<fingerprint>/, LRU by file
+#     mtime (a hit touches the file) within max_disk_entries and max_disk_bytes.
+#     the bound is enforced on every write from a fresh listing, so processes
+#     sharing the directory all count each other's entries
+#
+# directories of other fingerprints can't hit again, but during a rolling deploy
+# they still belong to the servers of the previous version. every use of a
+# directory touches it, and directories are only removed once nothing has used
+# them for stale_after_seconds
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'outputs', 'statement_cache'
+)
+
+
+def parser_fingerprint(parser: StatementParser) -> str:
+    state = json.dumps(
+        {'version': PARSER_VERSION, 'backend': parser.backend.name, 'categories': parser.categories}, sort_keys=True
+    )
+    return hashlib.sha256(state.encode('utf-8')).hexdigest()[:16]
+
+
+def remove_stale_fingerprints(cache_dir: str, stale_after_seconds: float,
+                              keep: Optional[str] = None) -> List[str]:
+    # removes fingerprint directories nothing used for stale_after_seconds
+    removed = []
+    now = time.time()
+    for entry in os.scandir(cache_dir):
+        if entry.name == keep or not entry.is_dir():
+            continue
+        try:
+            idle = now - entry.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        if idle > stale_after_seconds:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed.append(entry.name)
+    return removed
+
+
+class StatementCache:
+    def __init__(self, parser: StatementParser, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 max_entries: int = 256, max_disk_entries: int = 4096,
+                 max_disk_bytes: int = 256 * 1024 * 1024, stale_after_seconds: float = 7 * 24 * 3600):
+        # cache_dir=None keeps the memory tier only
+        self.parser = parser
+        self.fingerprint = parser_fingerprint(parser)
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.stale_after_seconds = stale_after_seconds
+        self.stats = {'memory': 0, 'disk': 0, 'miss': 0}
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.cache_dir = None
+        if cache_dir is not None:
+            self.cache_dir = os.path.join(cache_dir, self.fingerprint)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            os.utime(self.cache_dir)
+            remove_stale_fingerprints(cache_dir, stale_after_seconds, keep=self.fingerprint)
+
+    def key(self, pdf: Union[bytes, BinaryIO]) -> str:
+        # pdf bytes, or an open binary file hashed in chunks
+        if isinstance(pdf, (bytes, bytearray)):
+            digest = hashlib.sha256(self.fingerprint.encode('utf-8'))
+            digest.update(pdf)
+            return digest.hexdigest()
+        return stream_sha256(pdf, self.fingerprint.encode('utf-8'))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Tuple[Optional[str], Optional[str]]:
+        # (json text, tier it came from), (None, None) on a miss
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key], 'memory'
+
+        if self.cache_dir is not None:
+            try:
+                with open(self._path(key), 'r', encoding='utf-8') as f:
+                    text = f.read()
+            except FileNotFoundError:
+                return None, None
+            try:
+                # the mtime is the disk tier's recency, of the entry and of the directory
+                os.utime(self._path(key))
+                os.utime(self.cache_dir)
+            except OSError:
+                pass
+            self._remember(key, text)
+            return text, 'disk'
+
+        return None, None
+
+    def put(self, key: str, text: str):
+        self._remember(key, text)
+        if self.cache_dir is not None:
+            # write then rename, a concurrent reader never sees half a file.
+            # a disk that can't be written only costs the disk tier
+            tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                os.replace(tmp_path, self._path(key))
+                self._evict_disk()
+            except OSError as e:
+                print(f"Could not write statement cache entry: {e}")
+
+    def _disk_entries(self) -> List[Tuple[float, int, str]]:
+        # (mtime, size, path) of every finished entry, oldest first
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        return entries
+
+    def _evict_disk(self):
+        # least recently used entries go until both bounds hold
+        entries = self._disk_entries()
+        total_bytes = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for _, size, path in entries:
+            if count <= self.max_disk_entries and total_bytes <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            count -= 1
+            total_bytes -= size
+
+    def _remember(self, key: str, text: str):
+        with self._lock:
+            self._memory[key] = text
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def parse_statement_json(self, pdf: Union[bytes, BinaryIO]) -> Tuple[str, str]:
+        # (json text of parse_statement, 'memory' | 'disk' | 'miss')
+        key = self.key(pdf)
+        text, tier = self.get(key)
+        if text is None:
+            with open_pdf(pdf) as source:
+                try:
+                    text = json.dumps(self.parser.parse_statement(source, fallback=False))
+                except Exception as e:
+                    if self.parser.backend.name == FALLBACK_BACKEND:
+                        raise
+                    # a PyPDF2 result isn't what this backend's fingerprint promises, it isn't kept
+                    print(f"PDF backend {self.parser.backend.name} failed ({e}), "
+                          f"parsing with {FALLBACK_BACKEND} uncached")
+                    text = json.dumps(self.parser.parse_statement(source))
+                else:
+                    self.put(key, text)
+            tier = 'miss'
+
+        with self._lock:
+            self.stats[tier] += 1
+        return text, tier
+
+    def parse_statement(self, pdf: Union[bytes, BinaryIO]) -> Dict[str, Any]:
+        return json.loads(self.parse_statement_json(pdf)[0])
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.cache_dir is not None:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            os.makedirs(self.cache_dir, exist_ok=True)
@@ -0,0 +1,449 @@
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+import zlib
+from collections import Counter
+from datetime import date, timedelta
+from typing import List, Dict, Any, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.pdf_parser import StatementParser
+from api.pdf_backends import available_backends, SELECTION_PATH
+
+# synthetic credit card statement corpus for benchmarking StatementParser
+#
+# every statement is a real multi-page PDF (hand written, no extra dependency)
+# with a ground truth JSON next to it, so throughput and accuracy can be
+# measured from one page up to hundreds of pages
+#
+# only layouts parse_transactions accepts are generated: one date per
+# transaction line (MM/DD, MM/DD/YYYY or M-D-YYYY) and the amount last,
+# optionally $-prefixed and comma grouped. noise lines never carry both a
+# date and an amount, so they are never mistaken for transactions
+
+DATE_FORMATS = ('MM/DD', 'MM/DD/YYYY', 'M-D-YYYY')
+CAPITALONE_DATA = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'capitalone', 'capitalone_data.csv'
+)
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+FONT_SIZE = 9
+LINE_HEIGHT = 14
+LINES_PER_PAGE = 48
+
+CITIES = [
+    ('BOSTON', 'MA'), ('CAMBRIDGE', 'MA'), ('NEW YORK', 'NY'), ('AUSTIN', 'TX'),
+    ('HOUSTON', 'TX'), ('CHICAGO', 'IL'), ('SEATTLE', 'WA'), ('PHOENIX', 'AZ'),
+    ('SAN DIEGO', 'CA'), ('ORLANDO', 'FL'), ('DENVER', 'CO'), ('ATLANTA', 'GA')
+]
+BRAND_WORDS = ['BLUE', 'CITY', 'MAIN ST', 'SUNSET', 'UNION', 'GOLDEN', 'HARBOR', 'NORTH END', 'PARK']
+
+
+def format_date(day: date, date_format: str) -> str:
+    if date_format == 'MM/DD':
+        return f"{day.month:02d}/{day.day:02d}"
+    if date_format == 'MM/DD/YYYY':
+        return f"{day.month:02d}/{day.day:02d}/{day.year}"
+    if date_format == 'M-D-YYYY':
+        return f"{day.month}-{day.day}-{day.year}"
+    raise ValueError(f"Unknown date format: {date_format}")
+
+
+def format_amount(amount: float, dollar_sign: bool, grouped: bool) -> str:
+    text = f"{amount:,.2f}" if grouped else f"{amount:.2f}"
+    return ('$' if dollar_sign else '') + text
+
+
+def load_capitalone_merchants(path: str = CAPITALONE_DATA) -> List[Dict[str, str]]:
+    if not os.path.exists(path):
+        return []
+
+    merchants = {}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            key = (row['merchant'], row['city'], row['state'])
+            merchants[key] = {
+                'name': f"{row['merchant']} {row['city']} {row['state']}".upper(),
+                'source_category': row['category']
+            }
+    return list(merchants.values())
+
+
+class MerchantPool:
+    # merchant names built from the parser's category keywords plus the
+    # capitalone merchants, never containing anything that looks like a date or amount
+
+    def __init__(self, categories: Dict[str, List[str]], rng: random.Random,
+                 capitalone_merchants: Optional[List[Dict[str, str]]] = None):
+        self.rng = rng
+        self.keywords = [
+            (category, keyword) for category, keywords in categories.items() for keyword in keywords
+        ]
+        self.capitalone = capitalone_merchants if capitalone_merchants is not None else load_capitalone_merchants()
+
+    def _keyword_merchant(self):
+        category, keyword = self.rng.choice(self.keywords)
+        city, state = self.rng.choice(CITIES)
+        name = keyword.upper()
+
+        style = self.rng.random()
+        if style < 0.3:
+            name = f"{name} #{self.rng.randint(100, 99999)}"
+        elif style < 0.55:
+            name = f"{self.rng.choice(BRAND_WORDS)} {name}"
+        elif style < 0.7:
+            name = f"SQ *{self.rng.choice(BRAND_WORDS)} {name}"
+
+        if self.rng.random() < 0.6:
+            name = f"{name} {city} {state}"
+        if len(name) < 3:
+            # parse_transactions drops merchants shorter than 3 characters
+            name = f"{name} #{self.rng.randint(100, 99999)}"
+        return name, category
+
+    def sample(self):
+        if self.capitalone and self.rng.random() < 0.3:
+            merchant = self.rng.choice(self.capitalone)
+            return merchant['name'], merchant['source_category']
+        return self._keyword_merchant()
+
+
+def _sample_amount(rng: random.Random) -> float:
+    # mostly small purchases, a long tail into the thousands (comma grouping)
+    amount = rng.lognormvariate(3.3, 1.1)
+    if rng.random() < 0.03:
+        amount += rng.uniform(1000, 9000)
+    return round(max(amount, 0.5), 2)
+
+
+def generate_statement(n_pages: int, date_format: str = 'MM/DD', seed: int = 0,
+                       start: Optional[date] = None, period_days: int = 30,
+                       parser: Optional[StatementParser] = None) -> Dict[str, Any]:
+    # builds the page lines and the ground truth for one statement
+    if date_format not in DATE_FORMATS:
+        raise ValueError(f"Unknown date format: {date_format}")
+
+    rng = random.Random(seed)
+    parser = parser or StatementParser()
+    pool = MerchantPool(parser.categories, rng)
+    start = start or date(2025, rng.randint(1, 12), 1) + timedelta(days=rng.randint(0, 27))
+    end = start + timedelta(days=period_days - 1)
+
+    header = [
+        'SYNTHETIC BANK CREDIT CARD STATEMENT',
+        f"OPEN TO CLOSE DATE {format_date(start, 'MM/DD/YYYY')} TO {format_date(end, 'MM/DD/YYYY')}",
+    ]
+    # summary lines only carry amounts, and are filled in once totals are known
+    first_page_budget = LINES_PER_PAGE - len(header) - 8
+    later_page_budget = LINES_PER_PAGE - 4
+    n_transactions = max(1, first_page_budget + (n_pages - 1) * later_page_budget)
+
+    days = sorted(start + timedelta(days=rng.randrange(period_days)) for _ in range(n_transactions))
+
+    transactions = []
+    lines = []
+    for day in days:
+        merchant, source_category = pool.sample()
+        amount = _sample_amount(rng)
+        date_text = format_date(day, date_format)
+        amount_text = format_amount(amount, dollar_sign=rng.random() < 0.5, grouped=rng.random() < 0.8)
+        lines.append(f"{date_text} {merchant} {amount_text}")
+
+        # ground truth is what a correct parse of the line gives
+        merchant = ' '.join(merchant.split())[:100]
+        transactions.append({
+            'date': date_text,
+            'merchant': merchant,
+            'category': parser.categorize_transaction(merchant),
+            'source_category': source_category,
+            'amount': amount,
+            'iso_date': day.isoformat()
+        })
+
+    total = round(sum(t['amount'] for t in transactions), 2)
+    summary = [
+        'ACCOUNT SUMMARY',
+        f"Previous Balance {format_amount(rng.uniform(0, 3000), True, True)}",
+        f"Payments and Credits {format_amount(rng.uniform(0, 3000), True, True)}",
+        f"Purchases {format_amount(total, True, True)}",
+        f"Minimum Payment Due {format_amount(max(35.0, total * 0.02), True, True)}",
+        f"Payment Due Date {format_date(end + timedelta(days=25), 'MM/DD/YYYY')}",
+        '',
+        'TRANSACTIONS'
+    ]
+
+    pages = []
+    position = 0
+    for page_number in range(1, n_pages + 1):
+        budget = first_page_budget if page_number == 1 else later_page_budget
+        body = lines[position:position + budget]
+        position += budget
+        top = header + summary if page_number == 1 else ['TRANSACTIONS (CONTINUED)', 'Trans Date Description Amount']
+        pages.append(top + body + ['', f"Page {page_number} of {n_pages}"])
+
+    return {
+        'pages': pages,
+        'truth': {
+            'seed': seed,
+            'pages': n_pages,
+            'date_format': date_format,
+            'period_start': start.isoformat(),
+            'period_end': end.isoformat(),
+            'n_transactions': len(transactions),
+            'totalSpent': total,
+            'transactions': transactions
+        }
+    }
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def render_pdf(pages: List[List[str]]) -> bytes:
+    # minimal PDF 1.4 writer: one Helvetica font, one compressed content stream per page
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    }
+    kids = []
+    for i, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        kids.append(f"{page_id} 0 R")
+
+        commands = [f"BT /F1 {FONT_SIZE} Tf {LINE_HEIGHT} TL 50 {PAGE_HEIGHT - 50} Td"]
+        for line in page_lines:
+            commands.append(f"({_pdf_escape(line)}) Tj T*")
+        commands.append('ET')
+        stream = zlib.compress('\n'.join(commands).encode('latin-1'))
+
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode('latin-1')
+        objects[content_id] = (
+            f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode('latin-1')
+            + stream + b"\nendstream"
+        )
+
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode('latin-1')
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(out)
+        out += f"{object_id} 0 obj\n".encode('latin-1') + objects[object_id] + b"\nendobj\n"
+
+    xref = len(out)
+    size = max(objects) + 1
+    out += f"xref\n0 {size}\n0000000000 65535 f \n".encode('latin-1')
+    for object_id in range(1, size):
+        out += f"{offsets[object_id]:010d} 00000 n \n".encode('latin-1')
+    out += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('latin-1')
+    return bytes(out)
+
+
+def write_statement(path: str, n_pages: int, date_format: str = 'MM/DD', seed: int = 0,
+                    **kwargs) -> Dict[str, Any]:
+    # writes path (.pdf) and its ground truth (.json next to it)
+    statement = generate_statement(n_pages, date_format, seed, **kwargs)
+    with open(path, 'wb') as f:
+        f.write(render_pdf(statement['pages']))
+
+    truth = dict(statement['truth'], pdf=os.path.basename(path))
+    with open(ground_truth_path(path), 'w', encoding='utf-8') as f:
+        json.dump(truth, f, indent=1)
+    return truth
+
+
+def ground_truth_path(pdf_path: str) -> str:
+    return os.path.splitext(pdf_path)[0] + '.json'
+
+
+def generate_corpus(out_dir: str, page_counts=(1, 5, 25, 100, 250),
+                    date_formats=DATE_FORMATS, seed: int = 42) -> List[str]:
+    # one statement per (page count, date format), returns the pdf paths
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for n_pages in page_counts:
+        for j, date_format in enumerate(date_formats):
+            name = f"statement_{n_pages:04d}p_{date_format.replace('/', '').replace('-', '').lower()}.pdf"
+            path = os.path.join(out_dir, name)
+            truth = write_statement(path, n_pages, date_format, seed=seed * 1000 + n_pages * 10 + j)
+            print(f"{name}: {n_pages} pages, {truth['n_transactions']} transactions")
+            paths.append(path)
+    return paths
+
+
+def _key(transaction: Dict[str, Any]):
+    return (transaction['date'], transaction['merchant'], round(transaction['amount'], 2))
+
+
+def score_transactions(predicted: List[Dict[str, Any]], expected: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # multiset match on (date, merchant, amount); category accuracy over matched rows
+    predicted_keys = Counter(_key(t) for t in predicted)
+    expected_keys = Counter(_key(t) for t in expected)
+    matched = sum((predicted_keys & expected_keys).values())
+
+    expected_category = {_key(t): t['category'] for t in expected}
+    categorized = [t for t in predicted if _key(t) in expected_category]
+    correct_category = sum(t['category'] == expected_category[_key(t)] for t in categorized)
+
+    return {
+        'expected': len(expected),
+        'predicted': len(predicted),
+        'matched': matched,
+        'precision': matched / len(predicted) if predicted else 1.0,
+        'recall': matched / len(expected) if expected else 1.0,
+        'category_accuracy': correct_category / len(categorized) if categorized else 1.0
+    }
+
+
+def benchmark_statement(pdf_path: str, parser: Optional[StatementParser] = None) -> Dict[str, Any]:
+    parser = parser or StatementParser()
+    with open(ground_truth_path(pdf_path), 'r', encoding='utf-8') as f:
+        truth = json.load(f)
+
+    # the backend itself, no PyPDF2 fallback: a backend that can't read the
+    # statement gets no transactions (and an error) instead of PyPDF2's
+    error = None
+    start = time.perf_counter()
+    try:
+        with open(pdf_path, 'rb') as f:
+            text = ''.join(page + "\n" for page in parser.backend.iter_pages(f))
+    except Exception as e:
+        print(f"{os.path.basename(pdf_path)}: backend {parser.backend.name} failed: {e}")
+        text, error = '', str(e)
+    extracted = time.perf_counter()
+    transactions = parser.parse_transactions(text)
+    parsed = time.perf_counter()
+    parser.calculate_metrics(transactions)
+    done = time.perf_counter()
+
+    total_seconds = done - start
+    return {
+        'pdf': os.path.basename(pdf_path),
+        'backend': parser.backend.name,
+        'pages': truth['pages'],
+        'date_format': truth['date_format'],
+        'extract_seconds': extracted - start,
+        'parse_seconds': parsed - extracted,
+        'metrics_seconds': done - parsed,
+        'total_seconds': total_seconds,
+        'pages_per_second': truth['pages'] / total_seconds,
+        'transactions_per_second': truth['n_transactions'] / total_seconds,
+        'error': error,
+        **score_transactions(transactions, truth['transactions'])
+    }
+
+
+def benchmark_corpus(corpus_dir: str, parser: Optional[StatementParser] = None) -> List[Dict[str, Any]]:
+    parser = parser or StatementParser()
+    results = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.endswith('.pdf') or not os.path.exists(ground_truth_path(os.path.join(corpus_dir, name))):
+            continue
+        result = benchmark_statement(os.path.join(corpus_dir, name), parser)
+        print(
+            f"{result['pdf']}: {result['total_seconds']:.3f}s "
+            f"({result['pages_per_second']:.1f} pages/s), "
+            f"precision {result['precision']:.3f}, recall {result['recall']:.3f}"
+        )
+        results.append(result)
+    return results
+
+
+
+def benchmark_backends(corpus_dir: str, backends: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    # the corpus through every installed backend: pages per second over the whole
+    # corpus, and whether every statement came back exactly (no error, precision and recall 1)
+    report = {}
+    for name in backends or available_backends():
+        print(f"\n{name}:")
+        results = benchmark_corpus(corpus_dir, StatementParser(backend=name))
+        pages = sum(r['pages'] for r in results)
+        extract_seconds = sum(r['extract_seconds'] for r in results)
+        total_seconds = sum(r['total_seconds'] for r in results)
+        report[name] = {
+            'statements': len(results),
+            'pages': pages,
+            'extract_pages_per_second': pages / extract_seconds if extract_seconds else 0.0,
+            'pages_per_second': pages / total_seconds if total_seconds else 0.0,
+            'min_precision': min((r['precision'] for r in results), default=0.0),
+            'min_recall': min((r['recall'] for r in results), default=0.0),
+            'correct': bool(results) and all(
+                r['error'] is None and r['precision'] == 1.0 and r['recall'] == 1.0 for r in results
+            ),
+            'results': results
+        }
+    return report
+
+
+def select_backend(report: Dict[str, Dict[str, Any]]) -> Optional[str]:
+    # fastest end to end among the backends that got every statement right
+    correct = [name for name, result in report.items() if result['correct']]
+    return max(correct, key=lambda name: report[name]['pages_per_second'], default=None)
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    default_dir = os.path.join(base_dir, 'outputs', 'statement_corpus')
+
+    arg_parser = argparse.ArgumentParser(description="Synthetic statement PDF corpus")
+    subcommands = arg_parser.add_subparsers(dest='command', required=True)
+
+    generate = subcommands.add_parser('generate', help="write statement PDFs + ground truth")
+    generate.add_argument('--out-dir', default=default_dir)
+    generate.add_argument('--pages', type=int, nargs='+', default=[1, 5, 25, 100, 250])
+    generate.add_argument('--formats', nargs='+', choices=DATE_FORMATS, default=list(DATE_FORMATS))
+    generate.add_argument('--seed', type=int, default=42)
+
+    bench = subcommands.add_parser('benchmark', help="parse the corpus and score against ground truth")
+    bench.add_argument('--corpus-dir', default=default_dir)
+    bench.add_argument('--output', help="write results as json")
+
+    backends = subcommands.add_parser('backends', help="benchmark every installed pdf backend on the corpus")
+    backends.add_argument('--corpus-dir', default=default_dir)
+    backends.add_argument('--backends', nargs='+', help="default: every installed backend")
+    backends.add_argument('--select', action='store_true',
+                          help=f"save the fastest correct backend as the parser default ({SELECTION_PATH})")
+    backends.add_argument('--output', help="write results as json")
+
+    args = arg_parser.parse_args()
+    if args.command == 'generate':
+        generate_corpus(args.out_dir, args.pages, args.formats, args.seed)
+    elif args.command == 'backends':
+        report = benchmark_backends(args.corpus_dir, args.backends)
+        print()
+        for name, result in report.items():
+            print(f"{name}: {result['pages_per_second']:.1f} pages/s "
+                  f"(extraction {result['extract_pages_per_second']:.1f} pages/s), "
+                  f"{'correct' if result['correct'] else 'INCORRECT'} "
+                  f"(min precision {result['min_precision']:.3f}, min recall {result['min_recall']:.3f})")
+
+        selected = select_backend(report)
+        print(f"Fastest correct backend: {selected}")
+        if args.select and selected is not None:
+            with open(SELECTION_PATH, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'backend': selected,
+                    'corpus_dir': args.corpus_dir,
+                    'pages_per_second': {name: result['pages_per_second'] for name, result in report.items()},
+                    'correct': {name: result['correct'] for name, result in report.items()}
+                }, f, indent=2)
+            print(f"Selection written to {SELECTION_PATH}")
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"Results written to {args.output}")
+    else:
+        results = benchmark_corpus(args.corpus_dir)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {args.output}")
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Union
+
+try:
+    from .pdf_parser import StatementParser
+    from .uploads import open_pdf
+except ImportError:
+    from pdf_parser import StatementParser
+    from uploads import open_pdf
+
+# statement parsing off the request thread
+#
+# an upload becomes a job, runs on a fixed pool of max_workers threads and
+# reports progress page by page (parse_statement_stream). at most max_queued
+# jobs wait behind the running ones, submit refuses anything beyond that, so a
+# burst of uploads gets turned away instead of piling up pdf bytes in memory.
+# a job can also be handed a spooled file path (owned by the job and removed
+# when it ends), then waiting jobs hold no pdf bytes at all
+#
+# finished jobs stay readable for ttl_seconds, then they are dropped
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class StatementJobQueue:
+    def __init__(self, parser: StatementParser, max_workers: int = 2, max_queued: int = 16,
+                 ttl_seconds: float = 600):
+        self.parser = parser
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.ttl_seconds = ttl_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='statement-job')
+        self._jobs = {}
+        # notified on every job change, event streams wait on it
+        self._changed = threading.Condition()
+
+    def _active(self) -> int:
+        return sum(1 for job in self._jobs.values() if job['status'] in ('queued', 'running'))
+
+    def _expire(self):
+        now = time.time()
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job['finished'] is not None and now - job['finished'] > self.ttl_seconds]:
+            del self._jobs[job_id]
+
+    def submit(self, source: Union[bytes, str], name: Optional[str] = None) -> str:
+        # source: pdf bytes, or the path of a file the job takes ownership of
+        with self._changed:
+            self._expire()
+            if self._active() >= self.max_workers + self.max_queued:
+                raise JobQueueFull(f"{self._active()} statements already queued or running")
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'name': name,
+                'status': 'queued',
+                'pages_done': 0,
+                'total_pages': None,
+                'transactions': 0,
+                'created': time.time(),
+                'finished': None,
+                'error': None,
+                'result': None,
+                'version': 0
+            }
+        future = self._pool.submit(self._run, job_id, source)
+        if isinstance(source, str):
+            # a job cancelled on shutdown never runs, its file goes here instead
+            future.add_done_callback(lambda f: f.cancelled() and os.remove(source))
+        return job_id
+
+    def _update(self, job_id: str, **changes):
+        with self._changed:
+            job = self._jobs[job_id]
+            job.update(changes)
+            job['version'] += 1
+            self._changed.notify_all()
+
+    def _run(self, job_id: str, source: Union[bytes, str]):
+        try:
+            with open_pdf(source) as pdf_file:
+                total_pages = self.parser.page_count(pdf_file)
+                self._update(job_id, status='running', total_pages=total_pages)
+
+                # same result as parse_statement, built from the page updates
+                transactions = []
+                metrics = None
+                for update in self.parser.parse_statement_stream(pdf_file):
+                    transactions.extend(update.pop('transactions'))
+                    metrics = update
+                    self._update(job_id, pages_done=update.pop('page'), transactions=len(transactions))
+
+            if metrics is None:
+                metrics = self.parser.calculate_metrics([])
+            final = {'status': 'done', 'result': {'transactions': transactions, **metrics}}
+        except Exception as e:
+            print(f"Statement job {job_id} failed: {e}")
+            final = {'status': 'failed', 'error': str(e)}
+        finally:
+            # the file is gone by the time anyone sees the job finished
+            if isinstance(source, str):
+                try:
+                    os.remove(source)
+                except OSError as e:
+                    print(f"Could not remove {source}: {e}")
+        self._update(job_id, finished=time.time(), **final)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        # snapshot of the job, None if it is unknown or expired
+        with self._changed:
+            self._expire()
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def wait(self, job_id: str, version: int, timeout: float = 15) -> Optional[Dict[str, Any]]:
+        # blocks until the job changes past version (or timeout), then returns the snapshot
+        with self._changed:
+            self._changed.wait_for(
+                lambda: job_id not in self._jobs or self._jobs[job_id]['version'] > version, timeout
+            )
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._changed:
+            statuses = [job['status'] for job in self._jobs.values()]
+        return {
+            'max_workers': self.max_workers,
+            'max_queued': self.max_queued,
+            **{status: statuses.count(status) for status in ('queued', 'running', 'done', 'failed')}
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,84 @@
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from io import BytesIO
+from typing import BinaryIO, Iterator, Union
+
+from flask import Request
+
+# statement uploads without copying them around
+#
+# - MAX_UPLOAD_MB caps the request body, werkzeug answers 413 from the
+#   Content-Length header before reading anything (and stops reading once a
+#   body without one goes over)
+# - every uploaded file lands in a BytesIO when the request is at most
+#   UPLOAD_SPOOL_KB, in a temporary file on disk otherwise (or when the body
+#   has no length), so concurrent large uploads cost disk, not memory. both
+#   can be handed to a parser as one buffer without a copy (getbuffer, mmap)
+# - the parser reads that spooled file directly (or a read only memory map of
+#   it), never a bytes copy of the whole upload
+# - work that outlives the request (jobs, worker processes) gets the upload
+#   copied to a named file on disk in chunks, and reads it back with mmap
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def max_upload_bytes() -> int:
+    return int(float(os.environ.get('MAX_UPLOAD_MB', 20)) * 1024 * 1024)
+
+
+def spool_bytes() -> int:
+    return int(os.environ.get('UPLOAD_SPOOL_KB', 512)) * 1024
+
+
+class SpooledUploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is not None and total_content_length <= spool_bytes():
+            return BytesIO()
+        return tempfile.TemporaryFile('rb+')
+
+
+def upload_stream(file_storage) -> BinaryIO:
+    # the spooled upload itself, rewound, ready for PdfReader
+    stream = file_storage.stream
+    stream.seek(0)
+    return stream
+
+
+def stream_sha256(stream: BinaryIO, prefix: bytes = b'') -> str:
+    # hash in chunks and rewind, the upload is never held as one bytes object
+    digest = hashlib.sha256(prefix)
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def spool_to_disk(file_storage, directory: Union[str, None] = None) -> str:
+    # chunked copy to a named file the caller owns (and removes)
+    handle, path = tempfile.mkstemp(suffix='.pdf', dir=directory)
+    with os.fdopen(handle, 'wb') as f:
+        shutil.copyfileobj(upload_stream(file_storage), f, CHUNK_SIZE)
+    return path
+
+
+@contextmanager
+def open_pdf(source: Union[bytes, str, BinaryIO]) -> Iterator[BinaryIO]:
+    # bytes, a path or an open binary file, as something PdfReader can seek in
+    # a path is memory mapped (PdfReader would read a path into one bytes copy)
+    if isinstance(source, (bytes, bytearray)):
+        yield BytesIO(source)
+    elif isinstance(source, str):
+        with open(source, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield f
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+    else:
+        source.seek(0)
+        yield source
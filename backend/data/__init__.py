@@ -1,3 +1,9 @@
 from .prediction_manager import PredictionManager, DataContextManager
+from .population_stats import PopulationIndex
+from .similarity_index import SimilarityIndex
+from .online_stats import OnlineStatistics
 
-__all__ = ['PredictionManager', 'DataContextManager']
+__all__ = [
+    'PredictionManager', 'DataContextManager', 'PopulationIndex', 'SimilarityIndex',
+    'OnlineStatistics'
+]
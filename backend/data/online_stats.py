@@ -0,0 +1,337 @@
+"""
+Online Statistics
+Streaming per-feature moments and mergeable quantile sketches, updated from
+live predictions so population comparisons and drift checks track real traffic
+"""
+
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+
+PREDICTION_KEY = 'prediction_proba'
+
+
+class OnlineStatistics:
+    """Running moments and fixed-edge histogram sketches per feature"""
+
+    def __init__(self, features, edges, reference_mass=None, reference_means=None):
+        """
+        Initialize Online Statistics
+
+        The quantile sketch of each feature is a histogram over fixed bin
+        edges (plus an underflow and an overflow bin). Sketches with the same
+        edges merge by adding counts.
+
+        Args:
+            features: Feature names, in the order of incoming vectors
+            edges: Dict of feature -> increasing array of bin edges
+            reference_mass: Dict of feature -> expected bin fractions of the
+                reference population (used for drift checks)
+            reference_means: Dict of feature -> reference population mean
+        """
+        self.features = list(features)
+        self.edges = {f: np.asarray(edges[f], dtype=np.float64) for f in self.features}
+        self.reference_mass = reference_mass or {}
+        self.reference_means = reference_means or {}
+
+        n = len(self.features)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+
+        # edges padded with +inf into one matrix, so a whole row is binned with
+        # a single comparison instead of one searchsorted per feature
+        width = max(len(e) for e in self.edges.values())
+        self._edge_matrix = np.full((n, width), np.inf)
+        for j, feature in enumerate(self.features):
+            self._edge_matrix[j, :len(self.edges[feature])] = self.edges[feature]
+        self._hist = np.zeros((n, width + 1), dtype=np.int64)
+        self._rows = np.arange(n)
+
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_population(cls, population, features=None, n_bins=100, prediction_bins=50):
+        """
+        Build empty live statistics anchored to a reference PopulationIndex
+
+        Bin edges are the reference quantiles, so each bin holds roughly the
+        same share of the reference population.
+
+        Args:
+            population: PopulationIndex of the reference dataset
+            features: Features to track (None = every indexed feature)
+            n_bins: Target number of bins per feature
+            prediction_bins: Number of uniform bins for the prediction stream
+
+        Returns:
+            OnlineStatistics
+        """
+        features = [f for f in (features or population.features) if f in population]
+        levels = np.linspace(0, 1, n_bins + 1)
+
+        edges, mass, means = {}, {}, {}
+        for feature in features:
+            sorted_values = np.asarray(population.sorted_values[feature])
+            feature_edges = np.unique(np.quantile(sorted_values, levels))
+            counts = np.diff(np.concatenate((
+                [0],
+                np.searchsorted(sorted_values, feature_edges, side='left'),
+                [len(sorted_values)]
+            )))
+            edges[feature] = feature_edges
+            mass[feature] = counts / max(len(sorted_values), 1)
+            means[feature] = population.means[feature]
+
+        edges[PREDICTION_KEY] = np.linspace(0, 1, prediction_bins + 1)
+        return cls(features + [PREDICTION_KEY], edges, mass, means)
+
+    def update(self, values, prediction_proba=None):
+        """
+        Add one observation (or a batch of rows) to the running statistics
+
+        Args:
+            values: Feature vector in the order of the tracked features
+                (without the prediction), or a 2D array of such rows
+            prediction_proba: Predicted probability (or array for a batch)
+        """
+        batch = np.atleast_2d(np.asarray(values, dtype=np.float64))
+        n_features = len(self.features) - (1 if PREDICTION_KEY in self.features else 0)
+        if batch.shape[1] != n_features:
+            raise ValueError(f"Expected {n_features} feature values, got {batch.shape[1]}")
+        if PREDICTION_KEY in self.features:
+            proba = np.full(len(batch), np.nan) if prediction_proba is None else np.atleast_1d(prediction_proba)
+            batch = np.column_stack((batch, proba))
+
+        if len(batch) == 1:
+            self._update_one(batch[0])
+            return
+
+        valid = ~np.isnan(batch)
+        batch_count = valid.sum(axis=0)
+        batch_mean = np.where(batch_count > 0, np.nansum(batch, axis=0) / np.maximum(batch_count, 1), 0.0)
+        batch_m2 = np.nansum((batch - batch_mean) ** 2, axis=0)
+
+        with self._lock:
+            self._merge_moments(batch_count, batch_mean, batch_m2,
+                                np.nanmin(np.where(valid, batch, np.inf), axis=0),
+                                np.nanmax(np.where(valid, batch, -np.inf), axis=0))
+            # bin index = number of edges <= value (searchsorted side='right')
+            bins = (self._edge_matrix[None, :, :] <= batch[:, :, None]).sum(axis=2)
+            rows, cols = np.nonzero(valid)
+            np.add.at(self._hist, (cols, bins[rows, cols]), 1)
+
+    def _update_one(self, row):
+        # inline path for a single prediction: plain Welford step, no reductions
+        valid = ~np.isnan(row)
+        bins = (self._edge_matrix <= row[:, None]).sum(axis=1)
+        with self._lock:
+            self.count += valid
+            delta = np.where(valid, row - self.mean, 0.0)
+            self.mean += delta / np.maximum(self.count, 1)
+            self.m2 += np.where(valid, delta * (row - self.mean), 0.0)
+            self.min = np.fmin(self.min, row)
+            self.max = np.fmax(self.max, row)
+            self._hist[self._rows[valid], bins[valid]] += 1
+
+    def _merge_moments(self, count, mean, m2, minimum, maximum):
+        # Chan et al. parallel update, also used for merging two sketches
+        total = self.count + count
+        safe_total = np.maximum(total, 1)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / safe_total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / safe_total
+        self.count = total
+        self.min = np.minimum(self.min, minimum)
+        self.max = np.maximum(self.max, maximum)
+
+    def merge(self, other):
+        """Merge another OnlineStatistics with identical features and edges"""
+        if other.features != self.features or any(
+            not np.array_equal(self.edges[f], other.edges[f]) for f in self.features
+        ):
+            raise ValueError("Can only merge statistics with identical features and bin edges")
+
+        with self._lock:
+            self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+            self._hist += other._hist
+        return self
+
+    @property
+    def histograms(self):
+        """Per-feature histogram counts (underflow bin first, overflow last)"""
+        return {
+            f: self._hist[j, :len(self.edges[f]) + 1] for j, f in enumerate(self.features)
+        }
+
+    def _histogram(self, feature):
+        j = self._index(feature)
+        return self._hist[j, :len(self.edges[feature]) + 1]
+
+    @property
+    def n_observations(self):
+        return int(self.count.max()) if len(self.count) else 0
+
+    def _index(self, feature):
+        if feature not in self.features:
+            raise ValueError(f"Feature not tracked: {feature}")
+        return self.features.index(feature)
+
+    def _bounds(self, feature):
+        # bin boundaries, with under/overflow closed off by the observed min/max
+        j = self._index(feature)
+        edges = self.edges[feature]
+        low = min(self.min[j], edges[0]) if np.isfinite(self.min[j]) else edges[0]
+        high = max(self.max[j], edges[-1]) if np.isfinite(self.max[j]) else edges[-1]
+        return np.concatenate(([low], edges, [high]))
+
+    def percentile(self, feature, value):
+        """Estimated percentage of live observations below value"""
+        histogram = self._histogram(feature)
+        total = histogram.sum()
+        if total == 0:
+            return float('nan')
+
+        bounds = self._bounds(feature)
+        cumulative = np.concatenate(([0], np.cumsum(histogram)))
+        return float(np.interp(value, bounds, cumulative) / total * 100)
+
+    def quantile(self, feature, q):
+        """Estimated live quantile, q in [0, 1]"""
+        histogram = self._histogram(feature)
+        total = histogram.sum()
+        if total == 0:
+            return float('nan')
+
+        bounds = self._bounds(feature)
+        cumulative = np.concatenate(([0], np.cumsum(histogram))) / total
+        # drop empty bins so interpolation is strictly increasing in cumulative mass
+        keep = np.concatenate(([True], np.diff(cumulative) > 0))
+        return float(np.interp(q, cumulative[keep], bounds[keep]))
+
+    def summary(self, feature):
+        """Running moments for one feature"""
+        j = self._index(feature)
+        count = int(self.count[j])
+        return {
+            'count': count,
+            'mean': float(self.mean[j]) if count else float('nan'),
+            'std': float(np.sqrt(self.m2[j] / (count - 1))) if count > 1 else float('nan'),
+            'min': float(self.min[j]) if count else float('nan'),
+            'max': float(self.max[j]) if count else float('nan'),
+            'median': self.quantile(feature, 0.5)
+        }
+
+    def compare(self, user_input):
+        """
+        Compare a user's features to live traffic
+
+        Args:
+            user_input: Dictionary with user features
+
+        Returns:
+            Dictionary with comparison results per feature, same shape as
+            PopulationIndex.compare
+        """
+        comparisons = {}
+        for feature, value in user_input.items():
+            if feature not in self.features:
+                continue
+            j = self._index(feature)
+            if self.count[j] == 0:
+                continue
+
+            mean = float(self.mean[j])
+            comparisons[feature] = {
+                'user_value': value,
+                'population_mean': mean,
+                'population_median': self.quantile(feature, 0.5),
+                'percentile': self.percentile(feature, value),
+                'above_average': bool(value > mean)
+            }
+
+        return comparisons
+
+    def drift(self, psi_threshold=0.2, min_observations=100):
+        """
+        Population stability index of live traffic against the reference
+
+        Args:
+            psi_threshold: PSI above which a feature is flagged as drifted
+            min_observations: Features with fewer live observations are skipped
+
+        Returns:
+            Dictionary of feature -> drift report
+        """
+        report = {}
+        for feature, expected in self.reference_mass.items():
+            histogram = self._histogram(feature)
+            total = histogram.sum()
+            if total < min_observations:
+                continue
+
+            actual = histogram / total
+            expected = np.clip(expected, 1e-6, None)
+            actual_safe = np.clip(actual, 1e-6, None)
+            psi = float(np.sum((actual_safe - expected) * np.log(actual_safe / expected)))
+
+            report[feature] = {
+                'psi': psi,
+                'drifted': psi > psi_threshold,
+                'live_mean': float(self.mean[self._index(feature)]),
+                'reference_mean': self.reference_means.get(feature),
+                'observations': int(total)
+            }
+
+        return report
+
+    def checkpoint(self, path):
+        """Write the statistics to disk atomically (.npz)"""
+        with self._lock:
+            arrays = {
+                'features': np.array(self.features),
+                'count': self.count, 'mean': self.mean, 'm2': self.m2,
+                'min': self.min, 'max': self.max
+            }
+            for j, feature in enumerate(self.features):
+                arrays[f'edges_{j}'] = self.edges[feature]
+                arrays[f'hist_{j}'] = self._histogram(feature)
+                if feature in self.reference_mass:
+                    arrays[f'ref_{j}'] = self.reference_mass[feature]
+            arrays['reference_means'] = np.array(
+                [self.reference_means.get(f, np.nan) for f in self.features]
+            )
+
+            directory = os.path.dirname(os.path.abspath(path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.npz')
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load statistics written by checkpoint()"""
+        with np.load(path) as data:
+            features = [str(f) for f in data['features']]
+            edges = {f: data[f'edges_{j}'] for j, f in enumerate(features)}
+            mass = {f: data[f'ref_{j}'] for j, f in enumerate(features) if f'ref_{j}' in data}
+            means = {
+                f: float(m) for f, m in zip(features, data['reference_means']) if not np.isnan(m)
+            }
+
+            stats = cls(features, edges, mass, means)
+            stats.count = data['count'].copy()
+            stats.mean = data['mean'].copy()
+            stats.m2 = data['m2'].copy()
+            stats.min = data['min'].copy()
+            stats.max = data['max'].copy()
+            for j, feature in enumerate(features):
+                hist = data[f'hist_{j}']
+                stats._hist[j, :len(hist)] = hist
+
+        return stats
@@ -0,0 +1,198 @@
+"""
+Population Snapshot
+Compact, versioned statistics snapshot of the reference dataset so that
+startup can skip parsing the CSV. Sorted arrays are memory-mapped on load.
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.population_stats import PopulationIndex
+from ml.dataset_store import load_dataset
+
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_QUANTILES = [0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99]
+MANIFEST_FILE = 'manifest.json'
+SORTED_VALUES_FILE = 'sorted_values.npy'
+
+
+def snapshot_dir_for(data_path):
+    """Default snapshot location: next to the dataset, e.g. data.csv -> data.stats/"""
+    return os.path.splitext(data_path)[0] + '.stats'
+
+
+def _sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fingerprint(data_path, with_hash=True):
+    stat = os.stat(data_path)
+    fingerprint = {
+        'file': os.path.basename(data_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns
+    }
+    if with_hash:
+        fingerprint['sha256'] = _sha256(data_path)
+    return fingerprint
+
+
+def compute_data_stats(data, target_col='is_high_risk'):
+    """
+    Summary statistics used as LLM context, overall and per class
+
+    Args:
+        data: DataFrame with the reference population
+        target_col: Binary class column
+
+    Returns:
+        Dictionary of statistics
+    """
+    high_risk = data[data[target_col] == 1]
+    low_risk = data[data[target_col] == 0]
+
+    return {
+        'total_records': len(data),
+        'high_risk_count': len(high_risk),
+        'low_risk_count': len(low_risk),
+        'high_risk_percentage': len(high_risk) / len(data) * 100,
+        'feature_means_high_risk': high_risk.mean().astype(float).to_dict(),
+        'feature_means_low_risk': low_risk.mean().astype(float).to_dict(),
+        'feature_medians': data.median().astype(float).to_dict(),
+        'feature_std': data.std().astype(float).to_dict()
+    }
+
+
+def _class_statistics(data, target_col):
+    stats = {}
+    for label, group in data.groupby(target_col):
+        quantiles = group.quantile(SNAPSHOT_QUANTILES)
+        stats[str(int(label))] = {
+            'count': len(group),
+            'mean': group.mean().astype(float).to_dict(),
+            'std': group.std().astype(float).to_dict(),
+            'median': group.median().astype(float).to_dict(),
+            'quantiles': {
+                feature: quantiles[feature].astype(float).tolist() for feature in group.columns
+            }
+        }
+    return stats
+
+
+def build_snapshot(data_path, snapshot_dir=None, target_col='is_high_risk'):
+    """
+    Build the statistics snapshot for a dataset (offline step)
+
+    Args:
+        data_path: Path to the credit data CSV file
+        snapshot_dir: Output directory (defaults to snapshot_dir_for(data_path))
+        target_col: Binary class column
+
+    Returns:
+        Path to the snapshot directory
+    """
+    snapshot_dir = snapshot_dir or snapshot_dir_for(data_path)
+    data = load_dataset(data_path)
+    index = PopulationIndex.from_frame(data)
+
+    offsets = [0]
+    for feature in index.features:
+        offsets.append(offsets[-1] + len(index.sorted_values[feature]))
+    flat = np.concatenate([index.sorted_values[f] for f in index.features])
+
+    manifest = {
+        'version': SNAPSHOT_VERSION,
+        'dataset': _fingerprint(data_path),
+        'n_rows': index.n_rows,
+        'features': index.features,
+        'offsets': offsets,
+        'means': index.means,
+        'medians': index.medians,
+        'stds': index.stds,
+        'quantile_levels': SNAPSHOT_QUANTILES,
+        'class_statistics': _class_statistics(data, target_col),
+        'data_stats': compute_data_stats(data, target_col)
+    }
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    np.save(os.path.join(snapshot_dir, SORTED_VALUES_FILE), flat)
+    # manifest last, so a half-written snapshot never looks valid
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+    print(f"Population snapshot written to {snapshot_dir}")
+    return snapshot_dir
+
+
+def is_snapshot_fresh(manifest, data_path):
+    """Snapshot is fresh if the format version and dataset fingerprint match"""
+    if manifest.get('version') != SNAPSHOT_VERSION:
+        return False
+
+    recorded = manifest.get('dataset', {})
+    current = _fingerprint(data_path, with_hash=False)
+    if recorded.get('size') != current['size']:
+        return False
+    if recorded.get('mtime_ns') == current['mtime_ns']:
+        return True
+
+    # same size, different mtime (e.g. fresh checkout) - compare content
+    return recorded.get('sha256') == _sha256(data_path)
+
+
+def load_snapshot(data_path, snapshot_dir=None):
+    """
+    Load a snapshot if one exists and matches the dataset
+
+    Args:
+        data_path: Path to the credit data CSV file
+        snapshot_dir: Snapshot directory (defaults to snapshot_dir_for(data_path))
+
+    Returns:
+        Tuple of (PopulationIndex, manifest dict), or None if missing or stale
+    """
+    snapshot_dir = snapshot_dir or snapshot_dir_for(data_path)
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if os.path.exists(data_path) and not is_snapshot_fresh(manifest, data_path):
+            print(f"Population snapshot in {snapshot_dir} is stale")
+            return None
+
+        flat = np.load(os.path.join(snapshot_dir, SORTED_VALUES_FILE), mmap_mode='r')
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Could not load population snapshot: {e}")
+        return None
+
+    index = PopulationIndex()
+    index.n_rows = manifest['n_rows']
+    index.features = list(manifest['features'])
+    offsets = manifest['offsets']
+    for i, feature in enumerate(index.features):
+        index.sorted_values[feature] = flat[offsets[i]:offsets[i + 1]]
+    index.means = manifest['means']
+    index.medians = manifest['medians']
+    index.stds = manifest['stds']
+
+    return index, manifest
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    default_path = os.path.join(base_dir, "outputs", "credit_data_synthetic.csv")
+    build_snapshot(sys.argv[1] if len(sys.argv) > 1 else default_path)
@@ -0,0 +1,130 @@
+"""
+Population Statistics
+Precomputed per-feature sorted arrays and summary statistics used to compare
+users against the reference population without rescanning the dataset
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class PopulationIndex:
+    """Sorted-array percentile index over the reference population"""
+
+    def __init__(self):
+        self.n_rows = 0
+        self.features = []
+        self.sorted_values = {}
+        self.means = {}
+        self.medians = {}
+        self.stds = {}
+
+    @classmethod
+    def from_frame(cls, data):
+        """
+        Build the index from a DataFrame
+
+        Args:
+            data: DataFrame with the reference population
+
+        Returns:
+            PopulationIndex
+        """
+        index = cls()
+        index.n_rows = len(data)
+
+        for feature in data.select_dtypes(include=[np.number]).columns:
+            values = data[feature].to_numpy(dtype=np.float64)
+            values = np.sort(values[~np.isnan(values)])
+
+            index.features.append(feature)
+            index.sorted_values[feature] = values
+            if len(values):
+                index.means[feature] = float(values.mean())
+                index.medians[feature] = float(np.median(values))
+                index.stds[feature] = float(values.std(ddof=1)) if len(values) > 1 else 0.0
+            else:
+                index.means[feature] = index.medians[feature] = index.stds[feature] = float('nan')
+
+        return index
+
+    def __contains__(self, feature):
+        return feature in self.sorted_values
+
+    def percentile(self, feature, values):
+        """
+        Percentage of the population strictly below each value, O(log N)
+
+        Args:
+            feature: Feature name
+            values: Scalar or array of values
+
+        Returns:
+            float or np.ndarray of percentiles (0-100)
+        """
+        below = np.searchsorted(self.sorted_values[feature], values, side='left')
+        return below / self.n_rows * 100
+
+    def quantile(self, feature, q):
+        """Population quantile(s) of a feature, q in [0, 1]"""
+        return np.quantile(self.sorted_values[feature], q)
+
+    def compare(self, user_input):
+        """
+        Compare one user's features to the population
+
+        Args:
+            user_input: Dictionary with user features
+
+        Returns:
+            Dictionary with comparison results per feature
+        """
+        comparisons = {}
+        for feature, value in user_input.items():
+            if feature in self.sorted_values:
+                mean = self.means[feature]
+                comparisons[feature] = {
+                    'user_value': value,
+                    'population_mean': mean,
+                    'population_median': self.medians[feature],
+                    'percentile': float(self.percentile(feature, value)),
+                    'above_average': bool(value > mean)
+                }
+
+        return comparisons
+
+    def compare_many(self, user_inputs):
+        """
+        Compare many users at once, one vectorized search per feature
+
+        Args:
+            user_inputs: List of user feature dictionaries or a DataFrame
+
+        Returns:
+            List of comparison dictionaries, one per user
+        """
+        users = user_inputs if isinstance(user_inputs, pd.DataFrame) else pd.DataFrame(user_inputs)
+        results = [{} for _ in range(len(users))]
+
+        for feature in users.columns:
+            if feature not in self.sorted_values:
+                continue
+
+            column = users[feature]
+            values = column.to_numpy()
+            present = column.notna().to_numpy()
+            percentiles = self.percentile(feature, values[present].astype(np.float64))
+            mean = self.means[feature]
+            median = self.medians[feature]
+
+            for row, pct in zip(np.flatnonzero(present), percentiles):
+                value = values[row]
+                results[row][feature] = {
+                    'user_value': value.item() if hasattr(value, 'item') else value,
+                    'population_mean': mean,
+                    'population_median': median,
+                    'percentile': float(pct),
+                    'above_average': bool(value > mean)
+                }
+
+        return results
@@ -14,6 +14,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from ml.credit_risk_model import CreditRiskModel
 from ml.model_interpretability import ModelInterpreter
+from ml.dataset_store import load_dataset
+from data.population_stats import PopulationIndex
+from data.similarity_index import SimilarityIndex
+from data.population_snapshot import load_snapshot, compute_data_stats
+from data.online_stats import OnlineStatistics, PREDICTION_KEY
 
 
 class PredictionManager:
@@ -30,9 +35,59 @@ class PredictionManager:
         self.interpreter = None
         self.model_path = model_path
 
+        self.online_stats = None
+        self._online_columns = None
+        self._online_checkpoint_path = None
+        self._online_checkpoint_every = None
+        self._updates_since_checkpoint = 0
+
         if model_path and os.path.exists(model_path):
             self.load_model(model_path)
 
+    def attach_online_stats(self, online_stats, checkpoint_path=None, checkpoint_every=1000):
+        """
+        Feed every prediction into streaming population statistics
+
+        Args:
+            online_stats: OnlineStatistics to update inline
+            checkpoint_path: Where to checkpoint the statistics (.npz)
+            checkpoint_every: Checkpoint after this many predictions
+        """
+        if not self.model:
+            raise ValueError("Model not loaded. Call load_model() first.")
+
+        tracked = [f for f in online_stats.features if f != PREDICTION_KEY]
+        unknown = set(tracked) - set(self.model.feature_names)
+        if unknown:
+            raise ValueError(f"Online statistics track unknown features: {unknown}")
+
+        self.online_stats = online_stats
+        self._online_columns = [self.model.feature_names.index(f) for f in tracked]
+        self._online_checkpoint_path = checkpoint_path
+        self._online_checkpoint_every = checkpoint_every
+        self._updates_since_checkpoint = 0
+
+    def _record_prediction(self, user_df, prediction_proba):
+        """Update the streaming statistics with one scored user"""
+        values = user_df.to_numpy(dtype=np.float64)[:, self._online_columns]
+        self.online_stats.update(values, prediction_proba)
+
+        # counted under the statistics' lock, so concurrent requests neither lose
+        # updates nor both decide to checkpoint. the checkpoint itself takes the
+        # lock again, it runs after it is released
+        with self.online_stats._lock:
+            self._updates_since_checkpoint += len(values)
+            due = (self._online_checkpoint_path
+                   and self._updates_since_checkpoint >= self._online_checkpoint_every)
+            if due:
+                self._updates_since_checkpoint = 0
+
+        if due:
+            try:
+                self.online_stats.checkpoint(self._online_checkpoint_path)
+            except OSError as e:
+                print(f"Could not checkpoint online statistics: {e}")
+
     def load_model(self, model_path):
         """Load trained credit risk model"""
         try:
@@ -99,6 +154,9 @@ class PredictionManager:
             'user_features': user_input
         }
 
+        if self.online_stats is not None:
+            self._record_prediction(user_df, prediction_proba)
+
         # Generate SHAP explanation if requested
         if explain:
             explanation = self._generate_explanation(user_df, user_input)
@@ -154,6 +212,68 @@ class PredictionManager:
             'base_value': float(self.interpreter.explainer.expected_value)
         }
 
+    def _partial_dependence_context(self, user_input, base_proba):
+        """Shared setup for the approximate what-if queries"""
+        if not self.model:
+            raise ValueError("Model not loaded. Call load_model() first.")
+
+        tables = getattr(self.model, 'partial_dependence', None)
+        if tables is None or not tables.is_built:
+            raise ValueError(
+                "Model artifact has no partial dependence tables. "
+                "Call build_partial_dependence() before saving the model."
+            )
+
+        user_df = self.prepare_user_data(user_input)
+        if base_proba is None:
+            base_margin = float(self.model.model.predict(user_df, output_margin=True)[0])
+        else:
+            p = min(max(float(base_proba), 1e-7), 1 - 1e-7)
+            base_margin = float(np.log(p / (1 - p)))
+
+        return tables, user_df.values[0].astype(float), base_margin
+
+    def what_if(self, user_input, feature, value, base_proba=None):
+        """
+        Approximate the risk if one feature were changed, without rescoring
+
+        Interpolates the precomputed ICE curves of the nearest reference
+        profiles. The result is flagged with needs_exact_rescore when the
+        profile or the new value lies too far from the grid to trust it.
+
+        Args:
+            user_input: Dictionary with user's credit features
+            feature: Feature name to change
+            value: Hypothetical value for the feature
+            base_proba: User's current probability if already known
+
+        Returns:
+            Dictionary with the approximate probability and grid diagnostics
+        """
+        tables, user_vector, base_margin = self._partial_dependence_context(
+            user_input, base_proba
+        )
+        result = tables.estimate(user_vector, feature, value, base_margin)
+        result['prediction_label'] = "HIGH RISK" if result['prediction_proba'] > 0.5 else "LOW RISK"
+        return result
+
+    def what_if_curve(self, user_input, feature, base_proba=None):
+        """
+        Approximate what-if curve for one feature over its whole grid
+
+        Args:
+            user_input: Dictionary with user's credit features
+            feature: Feature name to sweep
+            base_proba: User's current probability if already known
+
+        Returns:
+            Dictionary with grid values and approximate probabilities
+        """
+        tables, user_vector, base_margin = self._partial_dependence_context(
+            user_input, base_proba
+        )
+        return tables.curve(user_vector, feature, base_margin)
+
     def batch_predict(self, user_inputs_list):
         """
         Make predictions for multiple users
@@ -253,108 +373,174 @@ class PredictionManager:
 class DataContextManager:
     """Manages data context for LLM queries"""
 
-    def __init__(self, data_path=None):
+    def __init__(self, data_path=None, use_snapshot=True):
         """
         Initialize Data Context Manager
 
         Args:
             data_path: Path to credit data CSV file
+            use_snapshot: Load statistics from a fresh population snapshot
+                instead of parsing the CSV when one is available
         """
-        self.data = None
+        self.data_path = None
+        self._data = None
         self.data_stats = None
+        self.class_statistics = None
+        self.population = None
+        self._similarity = None
+        self.online_stats = None
 
         if data_path and os.path.exists(data_path):
-            self.load_data(data_path)
+            self.load_data(data_path, use_snapshot=use_snapshot)
 
-    def load_data(self, data_path):
+    def load_data(self, data_path, use_snapshot=True):
         """Load credit data for context"""
-        self.data = pd.read_csv(data_path)
+        self.data_path = data_path
+        self._data = None
+        self._similarity = None
+
+        snapshot = load_snapshot(data_path) if use_snapshot else None
+        if snapshot is not None:
+            # rows are only parsed later if something actually needs them
+            self.population, manifest = snapshot
+            self.data_stats = manifest['data_stats']
+            self.class_statistics = manifest['class_statistics']
+            print(f"Loaded population snapshot for {self.population.n_rows} records from {data_path}")
+            return
+
+        self._data = load_dataset(data_path)
         self._compute_statistics()
-        print(f"Loaded {len(self.data)} records from {data_path}")
+        self.population = PopulationIndex.from_frame(self._data)
+        print(f"Loaded {len(self._data)} records from {data_path}")
+
+    @property
+    def data(self):
+        """Full dataset, read lazily when startup came from a snapshot"""
+        if self._data is None and self.data_path is not None:
+            self._data = load_dataset(self.data_path)
+        return self._data
+
+    @property
+    def similarity(self):
+        """Similarity index, built on first use"""
+        if self._similarity is None and self.data is not None:
+            self._similarity = SimilarityIndex(self.data)
+        return self._similarity
 
     def _compute_statistics(self):
         """Compute statistics on the dataset"""
-        if self.data is None:
+        if self._data is None:
             return
 
-        # Separate high risk and low risk
-        high_risk = self.data[self.data['is_high_risk'] == 1]
-        low_risk = self.data[self.data['is_high_risk'] == 0]
-
-        self.data_stats = {
-            'total_records': len(self.data),
-            'high_risk_count': len(high_risk),
-            'low_risk_count': len(low_risk),
-            'high_risk_percentage': len(high_risk) / len(self.data) * 100,
-            'feature_means_high_risk': high_risk.mean().to_dict(),
-            'feature_means_low_risk': low_risk.mean().to_dict(),
-            'feature_medians': self.data.median().to_dict(),
-            'feature_std': self.data.std().to_dict()
-        }
+        self.data_stats = compute_data_stats(self._data)
+
+    def create_online_stats(self, features=None, checkpoint_path=None):
+        """
+        Create (or resume) live statistics anchored to this population
+
+        Args:
+            features: Features to track (None = every population feature)
+            checkpoint_path: Resume from this checkpoint if it exists
+
+        Returns:
+            OnlineStatistics, also kept as self.online_stats
+        """
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            self.online_stats = OnlineStatistics.load(checkpoint_path)
+        elif self.population is not None:
+            self.online_stats = OnlineStatistics.from_population(self.population, features)
+
+        return self.online_stats
 
-    def compare_to_population(self, user_input):
+    def compare_to_population(self, user_input, live=False):
         """
         Compare user's features to population statistics
 
         Args:
             user_input: Dictionary with user features
+            live: Compare against live traffic instead of the reference data
 
         Returns:
             Dictionary with comparison results
         """
-        if self.data is None:
+        if live:
+            if self.online_stats is None or self.online_stats.n_observations == 0:
+                return None
+            return self.online_stats.compare(user_input)
+
+        if self.population is None:
             return None
 
-        comparisons = {}
-        for feature, value in user_input.items():
-            if feature in self.data.columns:
-                mean = self.data[feature].mean()
-                median = self.data[feature].median()
-                percentile = (self.data[feature] < value).sum() / len(self.data) * 100
-
-                comparisons[feature] = {
-                    'user_value': value,
-                    'population_mean': float(mean),
-                    'population_median': float(median),
-                    'percentile': float(percentile),
-                    'above_average': value > mean
-                }
+        return self.population.compare(user_input)
+
+    def check_drift(self, psi_threshold=0.2, min_observations=100):
+        """
+        Check live traffic for drift against the reference population
+
+        Args:
+            psi_threshold: PSI above which a feature counts as drifted
+            min_observations: Minimum live observations per feature
+
+        Returns:
+            Dictionary of feature -> drift report, or None without live stats
+        """
+        if self.online_stats is None:
+            return None
+
+        return self.online_stats.drift(psi_threshold, min_observations)
+
+    def compare_many_to_population(self, user_inputs):
+        """
+        Compare many users to population statistics in one pass
+
+        Args:
+            user_inputs: List of user feature dictionaries or a DataFrame
+
+        Returns:
+            List of comparison dictionaries, one per user
+        """
+        if self.population is None:
+            return None
 
-        return comparisons
+        return self.population.compare_many(user_inputs)
 
-    def get_similar_profiles(self, user_input, n=5):
+    def get_similar_profiles(self, user_input, n=5, features=None):
         """
         Find similar credit profiles in the dataset
 
         Args:
             user_input: User's credit features
             n: Number of similar profiles to return
+            features: Feature subset to match on (None = all provided features)
 
         Returns:
             DataFrame with similar profiles
         """
-        if self.data is None:
+        if self.similarity is None:
             return None
 
-        # Calculate distance to each record (simplified - Euclidean distance)
-        features = [f for f in user_input.keys() if f in self.data.columns and f != 'is_high_risk']
+        indices, _ = self.similarity.query(user_input, n=n, features=features)
 
-        user_vector = np.array([user_input[f] for f in features])
-        data_vectors = self.data[features].values
+        return self.data.iloc[indices[0]]
 
-        # Normalize
-        from sklearn.preprocessing import StandardScaler
-        scaler = StandardScaler()
-        user_normalized = scaler.fit_transform([user_vector])[0]
-        data_normalized = scaler.transform(data_vectors)
+    def get_similar_profiles_batch(self, user_inputs, n=5, features=None):
+        """
+        Find similar credit profiles for many users in one query
 
-        # Calculate distances
-        distances = np.linalg.norm(data_normalized - user_normalized, axis=1)
+        Args:
+            user_inputs: List of user feature dictionaries or a DataFrame
+            n: Number of similar profiles per user
+            features: Feature subset to match on (None = all provided features)
+
+        Returns:
+            List of DataFrames with similar profiles, one per user
+        """
+        if self.similarity is None:
+            return None
 
-        # Get top n similar
-        similar_indices = np.argsort(distances)[:n]
+        indices, _ = self.similarity.query(user_inputs, n=n, features=features)
 
-        return self.data.iloc[similar_indices]
+        return [self.data.iloc[row] for row in indices]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+"""
+Similarity Index
+Nearest-neighbour lookup of similar credit profiles over the population
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree, BallTree
+
+
+class SimilarityIndex:
+    """Population-scaled spatial index for similar-profile queries"""
+
+    # KD-trees degrade in high dimensions, ball trees hold up better there
+    KD_TREE_MAX_DIMS = 16
+
+    def __init__(self, data, exclude=('is_high_risk',), leaf_size=40,
+                 approximate_dims=None, candidate_factor=10, max_cached_trees=8):
+        """
+        Initialize Similarity Index
+
+        Args:
+            data: DataFrame with the reference population
+            exclude: Columns that are never used as distance features
+            leaf_size: Leaf size of the spatial trees
+            approximate_dims: If set, subsets wider than this are indexed on a
+                PCA projection and the candidates are re-ranked exactly
+            candidate_factor: Candidates fetched per requested neighbour in
+                approximate mode
+            max_cached_trees: Number of feature-subset trees kept in memory
+        """
+        self.features = [
+            f for f in data.select_dtypes(include=[np.number]).columns
+            if f not in exclude
+        ]
+        values = data[self.features].to_numpy(dtype=np.float64)
+
+        # scaler is fit once on the whole population
+        self.mean = np.nanmean(values, axis=0)
+        scale = np.nanstd(values, axis=0)
+        scale[~np.isfinite(scale) | (scale == 0)] = 1.0
+        self.scale = scale
+        self.scaled = np.nan_to_num((values - self.mean) / self.scale)
+
+        self.leaf_size = leaf_size
+        self.approximate_dims = approximate_dims
+        self.candidate_factor = candidate_factor
+        self.max_cached_trees = max_cached_trees
+        self._trees = OrderedDict()
+        self._positions = {f: i for i, f in enumerate(self.features)}
+
+    def __len__(self):
+        return len(self.scaled)
+
+    def _columns(self, features):
+        return [self._positions[f] for f in features]
+
+    def _get_tree(self, features):
+        """Build or fetch the tree for a feature subset (LRU cached)"""
+        key = tuple(features)
+        if key in self._trees:
+            self._trees.move_to_end(key)
+            return self._trees[key]
+
+        subset = self.scaled[:, self._columns(features)]
+        projection = None
+        if self.approximate_dims and len(features) > self.approximate_dims:
+            # principal axes from a sample are plenty for candidate generation
+            sample = subset[:min(len(subset), 100000)]
+            _, _, vt = np.linalg.svd(sample - sample.mean(axis=0), full_matrices=False)
+            projection = vt[:self.approximate_dims].T
+            subset = subset @ projection
+
+        tree_cls = KDTree if subset.shape[1] <= self.KD_TREE_MAX_DIMS else BallTree
+        entry = (tree_cls(subset, leaf_size=self.leaf_size), projection)
+
+        self._trees[key] = entry
+        if len(self._trees) > self.max_cached_trees:
+            self._trees.popitem(last=False)
+        return entry
+
+    def query(self, user_inputs, n=5, features=None):
+        """
+        Find the nearest population rows for one or many users
+
+        Args:
+            user_inputs: Dict, list of dicts or DataFrame of user features
+            n: Number of neighbours per user
+            features: Feature subset to match on (None = every indexed
+                feature provided by the users)
+
+        Returns:
+            Tuple of (indices, distances), each shaped (n_users, n)
+        """
+        if isinstance(user_inputs, dict):
+            user_inputs = [user_inputs]
+        users = user_inputs if isinstance(user_inputs, pd.DataFrame) else pd.DataFrame(user_inputs)
+
+        if features is None:
+            features = [f for f in self.features if f in users.columns]
+        else:
+            unknown = [f for f in features if f not in self._positions]
+            if unknown:
+                raise ValueError(f"Features not in similarity index: {unknown}")
+        if not features:
+            raise ValueError("No indexed features to compare on")
+
+        columns = self._columns(features)
+        queries = (users[features].to_numpy(dtype=np.float64) - self.mean[columns]) / self.scale[columns]
+        n = min(n, len(self))
+
+        tree, projection = self._get_tree(features)
+        if projection is None:
+            distances, indices = tree.query(queries, k=n)
+            return indices, distances
+
+        # approximate mode: candidates from the projected tree, exact re-rank
+        k = min(len(self), n * self.candidate_factor)
+        _, candidates = tree.query(queries @ projection, k=k)
+        indices = np.empty((len(queries), n), dtype=np.int64)
+        distances = np.empty((len(queries), n))
+        for i, (query, cand) in enumerate(zip(queries, candidates)):
+            exact = np.linalg.norm(self.scaled[np.ix_(cand, columns)] - query, axis=1)
+            order = np.argsort(exact)[:n]
+            indices[i] = cand[order]
+            distances[i] = exact[order]
+        return indices, distances
@@ -1,5 +1,10 @@
 from .credit_risk_model import CreditRiskModel
 from .data_generator import CreditDataGenerator
 from .model_interpretability import ModelInterpreter
+from .dataset_store import load_dataset, convert_csv
+from .sharded_generation import generate_sharded
 
-__all__ = ['CreditRiskModel', 'CreditDataGenerator', 'ModelInterpreter']
+__all__ = [
+    'CreditRiskModel', 'CreditDataGenerator', 'ModelInterpreter', 'load_dataset', 'convert_csv',
+    'generate_sharded'
+]
@@ -0,0 +1,195 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .data_generator import CreditDataGenerator
+except ImportError:
+    from data_generator import CreditDataGenerator
+
+# benchmark for the vectorized CreditDataGenerator against the old row-at-a-time
+# implementation, checks speed and that every column still has the same distribution
+
+
+class RowwiseCreditDataGenerator(CreditDataGenerator):
+    # the original loop implementation, kept only as the benchmark reference
+
+    def generate_traditional_credit_features(self):
+        data = []
+
+        for i in range(self.n_samples):
+            credit_limit = np.random.uniform(1000, 50000)
+            credit_used = np.random.uniform(0, credit_limit * 1.2)
+            credit_utilization = min((credit_used / credit_limit) * 100, 150)
+
+            credit_age_months = np.random.gamma(shape=3, scale=20)
+            hard_inquiries = np.random.poisson(lam=2)
+
+            base_payment_rate = np.random.beta(8, 2) * 100
+            payment_history_pct = min(100, base_payment_rate)
+
+            late_30_days = np.random.poisson(lam=1) if payment_history_pct < 90 else 0
+            late_60_days = np.random.poisson(lam=0.5) if payment_history_pct < 80 else 0
+            late_90_days = np.random.poisson(lam=0.3) if payment_history_pct < 70 else 0
+
+            num_credit_accounts = np.random.poisson(lam=5) + 1
+            total_credit_limit = credit_limit * np.random.uniform(1.5, 4)
+
+            data.append({
+                'credit_utilization': credit_utilization,
+                'credit_age_months': credit_age_months,
+                'hard_inquiries': hard_inquiries,
+                'payment_history_pct': payment_history_pct,
+                'late_30_days': late_30_days,
+                'late_60_days': late_60_days,
+                'late_90_days': late_90_days,
+                'num_credit_accounts': num_credit_accounts,
+                'total_credit_limit': total_credit_limit,
+                'current_balance': credit_used
+            })
+
+        return pd.DataFrame(data)
+
+    def generate_spending_patterns(self):
+        data = []
+
+        for i in range(self.n_samples):
+            monthly_income = np.random.lognormal(mean=10, sigma=0.6)
+
+            spending_by_category = {}
+            total_spending = 0
+
+            for category in self.spending_categories:
+                low, high = self.spending_ranges[category]
+                pct = np.random.uniform(low, high)
+
+                spending_by_category[f'spending_{category}_pct'] = pct
+                total_spending += pct
+
+            data.append({
+                'monthly_income': monthly_income,
+                **spending_by_category,
+                'total_spending_pct': total_spending,
+                'spending_velocity': np.random.normal(0, 15),
+                'impulse_spending_score': np.random.beta(2, 5) * 100
+            })
+
+        return pd.DataFrame(data)
+
+    def generate_payment_patterns(self):
+        data = []
+
+        for i in range(self.n_samples):
+            recurring_payment_ratio = np.random.beta(4, 2) * 100
+
+            data.append({
+                'recurring_payment_ratio': recurring_payment_ratio,
+                'onetime_payment_ratio': 100 - recurring_payment_ratio,
+                'payment_consistency': np.random.beta(5, 2) * 100,
+                'payment_timing_variance': np.random.exponential(scale=5),
+                'min_payment_frequency': np.random.beta(2, 8) * 100,
+                'avg_days_before_due': np.random.normal(2, 7)
+            })
+
+        return pd.DataFrame(data)
+
+
+def _generate_features(generator):
+    return pd.concat([
+        generator.generate_traditional_credit_features(),
+        generator.generate_spending_patterns(),
+        generator.generate_payment_patterns()
+    ], axis=1)
+
+
+def time_generation(generator_cls, n_samples, repeats=1):
+    # best of `repeats` wall times for the three feature generators
+    best = float('inf')
+    for _ in range(repeats):
+        generator = generator_cls(n_samples=n_samples)
+        start = time.perf_counter()
+        _generate_features(generator)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def ks_2samp(a, b):
+    # two-sample kolmogorov-smirnov test in numpy (scipy isn't a dependency)
+    # statistic = largest gap between the two empirical cdfs, p-value from the
+    # asymptotic kolmogorov distribution, fine at the sample sizes used here
+    a = np.sort(np.asarray(a, dtype=np.float64))
+    b = np.sort(np.asarray(b, dtype=np.float64))
+    points = np.concatenate((a, b))
+    cdf_a = np.searchsorted(a, points, side='right') / len(a)
+    cdf_b = np.searchsorted(b, points, side='right') / len(b)
+    statistic = float(np.abs(cdf_a - cdf_b).max())
+
+    n = len(a) * len(b) / (len(a) + len(b))
+    lam = (np.sqrt(n) + 0.12 + 0.11 / np.sqrt(n)) * statistic
+    if lam < 0.2:
+        # the series doesn't converge near 0, where the p-value is 1 anyway
+        return statistic, 1.0
+    k = np.arange(1, 101)
+    p_value = float(np.clip(2 * np.sum((-1) ** (k - 1) * np.exp(-2 * k ** 2 * lam ** 2)), 0, 1))
+    return statistic, p_value
+
+
+def compare_distributions(n_samples=20000, seed=0):
+    # two-sample KS test per column, vectorized vs rowwise
+    np.random.seed(seed)
+    rowwise = _generate_features(RowwiseCreditDataGenerator(n_samples=n_samples))
+    vectorized = _generate_features(CreditDataGenerator(n_samples=n_samples))
+
+    report = {}
+    for column in rowwise.columns:
+        statistic, p_value = ks_2samp(rowwise[column], vectorized[column])
+        report[column] = {
+            'ks_statistic': float(statistic),
+            'p_value': float(p_value),
+            'rowwise_mean': float(rowwise[column].mean()),
+            'vectorized_mean': float(vectorized[column].mean())
+        }
+    return report
+
+
+def run_benchmark(sizes=(1000, 10000, 100000, 1000000), rowwise_limit=100000, repeats=3):
+    results = []
+    for n in sizes:
+        vectorized = time_generation(CreditDataGenerator, n, repeats)
+        row = {'n_samples': n, 'vectorized_seconds': vectorized, 'rows_per_second': n / vectorized}
+
+        if n <= rowwise_limit:
+            rowwise = time_generation(RowwiseCreditDataGenerator, n, 1)
+            row['rowwise_seconds'] = rowwise
+            row['speedup'] = rowwise / vectorized
+
+        results.append(row)
+        print(json.dumps(row))
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CreditDataGenerator")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--rowwise-limit', type=int, default=100000,
+                        help="largest size to also time with the rowwise reference")
+    parser.add_argument('--ks-samples', type=int, default=20000)
+    parser.add_argument('--output', help="write results as json")
+    args = parser.parse_args()
+
+    print("Timing generation...")
+    timings = run_benchmark(args.sizes, args.rowwise_limit)
+
+    print("\nComparing distributions (two-sample KS)...")
+    distributions = compare_distributions(args.ks_samples)
+    worst = min(distributions.items(), key=lambda item: item[1]['p_value'])
+    print(f"Lowest KS p-value: {worst[0]} p={worst[1]['p_value']:.4f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'timings': timings, 'distributions': distributions}, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,273 @@
+import argparse
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    from .credit_risk_model import CreditRiskModel
+    from .data_generator import CreditDataGenerator
+except ImportError:
+    from credit_risk_model import CreditRiskModel
+    from data_generator import CreditDataGenerator
+
+# scaling benchmark for CreditRiskModel: training wall time, peak memory and
+# model size over a grid of n_samples x n_estimators x max_depth x threads,
+# plus predict_proba latency for batch sizes 1 .. 100k
+#
+# every config runs in a fresh spawned process. training memory is the RSS
+# sampled while train() runs, minus the RSS right before it, so data generation
+# and earlier work don't count. RSS comes from psutil when it is installed,
+# /proc/self/statm otherwise (linux), and is reported as None elsewhere
+#
+# BASELINE_PATH holds a --quick run committed as the reference for --baseline
+
+DEFAULT_GRID = {
+    'n_samples': [10000, 100000],
+    'n_estimators': [100, 300],
+    'max_depth': [4, 6, 8],
+    'n_jobs': [1, os.cpu_count() or 1]
+}
+QUICK_GRID = {
+    'n_samples': [10000],
+    'n_estimators': [100],
+    'max_depth': [6],
+    'n_jobs': [os.cpu_count() or 1]
+}
+DEFAULT_BATCH_SIZES = [1, 10, 100, 1000, 10000, 100000]
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_model_baseline.json')
+
+# metrics compared against the baseline, all "lower is better"
+COMPARED_METRICS = ['train_seconds', 'train_peak_rss_mb', 'model_bytes']
+
+
+def current_rss_mb():
+    # resident set size right now, None if it can't be read on this platform
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+class RssSampler:
+    # polls the RSS on a thread while the block runs: baseline on entry, peak over the block
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.baseline = None
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak = rss if self.peak is None else max(self.peak, rss)
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.baseline = current_rss_mb()
+        self.peak = self.baseline
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    @property
+    def growth(self):
+        if self.baseline is None or self.peak is None:
+            return None
+        return max(0.0, self.peak - self.baseline)
+
+
+def _dataset(n_samples, seed):
+    chunks = CreditDataGenerator(n_samples=n_samples).iter_chunks(chunk_size=100000, seed=seed)
+    df = pd.concat(chunks, ignore_index=True)
+    return df.drop(columns=['is_high_risk']), df['is_high_risk']
+
+
+def config_key(config):
+    return '|'.join(f"{name}={config[name]}" for name in sorted(config))
+
+
+def measure_latency(model, X, batch_sizes, max_repeats=50):
+    latency = {}
+    for batch_size in batch_sizes:
+        batch = X.iloc[:batch_size]
+        model.model.predict_proba(batch)  # warmup
+        repeats = max(3, min(max_repeats, 100000 // batch_size))
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.model.predict_proba(batch)
+            timings.append(time.perf_counter() - start)
+        timings = np.array(timings)
+        latency[str(batch_size)] = {
+            'p50_ms': float(np.median(timings) * 1000),
+            'p95_ms': float(np.quantile(timings, 0.95) * 1000),
+            'rows_per_second': float(batch_size / np.median(timings))
+        }
+    return latency
+
+
+def _run_config(task):
+    # runs inside the spawned child
+    config, batch_sizes, seed = task
+    X, y = _dataset(config['n_samples'], seed)
+    X_infer, _ = _dataset(max(batch_sizes), seed + 1)
+
+    model = CreditRiskModel(params={
+        'n_estimators': config['n_estimators'],
+        'max_depth': config['max_depth'],
+        'n_jobs': config['n_jobs']
+    })
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        model.train(X, y, verbose=False)
+        train_seconds = time.perf_counter() - start
+
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+
+    return {
+        'config': config,
+        'key': config_key(config),
+        'train_seconds': train_seconds,
+        # process RSS peak while training, and how far training pushed it above its start
+        'peak_rss_mb': rss.peak,
+        'train_peak_rss_mb': rss.growth,
+        'model_bytes': len(model.model.get_booster().save_raw('ubj')),
+        'pickle_bytes': buffer.getbuffer().nbytes,
+        'latency': measure_latency(model, X_infer, batch_sizes)
+    }
+
+
+def run_config(config, batch_sizes=DEFAULT_BATCH_SIZES, seed=42):
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(_run_config, (config, list(batch_sizes), seed)).result()
+
+
+def iter_configs(grid):
+    names = sorted(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'xgboost': xgb.__version__,
+        'numpy': np.__version__
+    }
+
+
+def run_benchmark(grid=None, batch_sizes=DEFAULT_BATCH_SIZES, seed=42):
+    results = []
+    for config in iter_configs(grid or DEFAULT_GRID):
+        result = run_config(config, batch_sizes, seed)
+        results.append(result)
+        single = result['latency'].get('1', {}).get('p50_ms', float('nan'))
+        peak = result['peak_rss_mb']
+        print(f"{result['key']}: train {result['train_seconds']:.2f}s, "
+              f"peak {'n/a' if peak is None else f'{peak:.0f}'} MB, model {result['model_bytes'] / 1024:.0f} KB, "
+              f"latency(1) {single:.2f} ms")
+    return {'environment': environment(), 'results': results}
+
+
+def compare_to_baseline(report, baseline, tolerance=0.2):
+    # ratio current / baseline per metric for configs present in both
+    # a ratio above 1 + tolerance is flagged as a regression
+    baseline_results = {r['key']: r for r in baseline['results']}
+    comparison = []
+
+    for result in report['results']:
+        previous = baseline_results.get(result['key'])
+        if previous is None:
+            continue
+
+        ratios = {}
+        for metric in COMPARED_METRICS:
+            if previous.get(metric) and result.get(metric) is not None:
+                ratios[metric] = result[metric] / previous[metric]
+        for batch_size, latency in result['latency'].items():
+            old = previous['latency'].get(batch_size)
+            if old and old['p50_ms']:
+                ratios[f'latency_p50_{batch_size}'] = latency['p50_ms'] / old['p50_ms']
+
+        regressions = sorted(m for m, ratio in ratios.items() if ratio > 1 + tolerance)
+        comparison.append({'key': result['key'], 'ratios': ratios, 'regressions': regressions})
+
+    return comparison
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CreditRiskModel training and inference")
+    parser.add_argument('--quick', action='store_true', help="single small config")
+    parser.add_argument('--n-samples', type=int, nargs='+')
+    parser.add_argument('--n-estimators', type=int, nargs='+')
+    parser.add_argument('--max-depth', type=int, nargs='+')
+    parser.add_argument('--threads', type=int, nargs='+')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=DEFAULT_BATCH_SIZES)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="write results as json")
+    parser.add_argument('--baseline', nargs='?', const=BASELINE_PATH,
+                        help=f"compare against a results json from an earlier run "
+                             f"(no value: the committed {os.path.basename(BASELINE_PATH)})")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="relative slowdown/growth flagged as a regression")
+    args = parser.parse_args()
+
+    grid = dict(QUICK_GRID if args.quick else DEFAULT_GRID)
+    for name, values in [('n_samples', args.n_samples), ('n_estimators', args.n_estimators),
+                         ('max_depth', args.max_depth), ('n_jobs', args.threads)]:
+        if values:
+            grid[name] = values
+
+    report = run_benchmark(grid, args.batch_sizes, args.seed)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['baseline'] = args.baseline
+        report['comparison'] = compare_to_baseline(report, baseline, args.tolerance)
+        regressions = [c for c in report['comparison'] if c['regressions']]
+        print(f"\nCompared {len(report['comparison'])} configs to {args.baseline}, "
+              f"{len(regressions)} with regressions")
+        for item in regressions:
+            details = ', '.join(f"{m} x{item['ratios'][m]:.2f}" for m in item['regressions'])
+            print(f"  {item['key']}: {details}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(report, indent=2) + '\n')
+        print(f"Results written to {args.output}")
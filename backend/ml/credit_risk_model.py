@@ -1,13 +1,30 @@
+import os
+import time
+import warnings
 import numpy as np
 import pandas as pd
 import xgboost as xgb
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
     classification_report, confusion_matrix, roc_auc_score, roc_curve, precision_recall_curve, average_precision_score
 )
 import matplotlib.pyplot as plt
 import seaborn as sns
 import joblib
+try:
+    from .partial_dependence import PartialDependenceTable
+except ImportError:
+    from partial_dependence import PartialDependenceTable
+try:
+    from .dataset_store import load_dataset
+    from .external_memory import train_booster, feature_columns, native_params, iter_split
+    from .streaming_metrics import StreamingBinaryMetrics
+    from .tuning import HyperparameterSearch
+except ImportError:
+    from dataset_store import load_dataset
+    from external_memory import train_booster, feature_columns, native_params, iter_split
+    from streaming_metrics import StreamingBinaryMetrics
+    from tuning import HyperparameterSearch
 
 class CreditRiskModel:
     #using xgboost for a credit risk prediction model
@@ -37,7 +54,9 @@ class CreditRiskModel:
         self.model = xgb.XGBClassifier(**self.default_params)
         self.feature_names = None
         self.is_fitted = False
-        
+        self.partial_dependence = None
+        self.update_history = []
+
     def prepare_data(self, df, target_col='is_high_risk', test_size=0.2):
         # we need to split the data into train and testing sets
 
@@ -77,6 +96,125 @@ class CreditRiskModel:
         self.is_fitted = True
         print("model training finito")
 
+    def train_external(self, data_path, target_col='is_high_risk', chunk_size=100000, test_size=0.2,
+                       memory='quantile', max_bin=256, nthread=None, verbose=True):
+        # out-of-core training, the dataset is streamed in chunks and never loaded whole
+        # memory='quantile' keeps quantized bins in ram, 'external' pages them to disk
+        # uses the hist tree method on all cores, returns the per-round eval metrics
+
+        print(f"\ntraining xgboost out-of-core ({memory}) from {data_path}")
+
+        self.feature_names = feature_columns(data_path, target_col)
+        booster, evals_result, counts = train_booster(
+            self.default_params, data_path, target_col, chunk_size, test_size,
+            memory=memory, max_bin=max_bin, nthread=nthread, verbose=verbose
+        )
+
+        for name, count in counts.items():
+            print(f"{name}: {count['rows']} samples, high risk {count['positive'] / max(count['rows'], 1):.2%}")
+
+        self.model = self._wrap_booster(booster, tree_method='hist', max_bin=max_bin)
+
+        self.is_fitted = True
+        print("model training finito")
+        return evals_result
+
+    def _wrap_booster(self, booster, **params):
+        # wrapping a raw booster back into the classifier so predict_proba, importances,
+        # partial dependence and pickling all work like after train()
+        model = xgb.XGBClassifier(**dict(self.default_params, **params))
+        model.load_model(bytearray(booster.save_raw('ubj')))
+        return model
+
+    def update(self, X_new, y_new, X_holdout, y_holdout, mode='continue', n_rounds=20,
+               max_auc_drop=0.0, model_path=None):
+        # incremental update from a new labelled batch instead of a full retrain
+        #   'continue': boosts n_rounds more trees on the new batch only
+        #   'refresh': keeps the trees, refits their leaf values on the new batch
+        # the candidate is only published if its holdout auc is no more than
+        # max_auc_drop below the current model's, otherwise the current model stays
+        # returns a report dict (also appended to update_history)
+
+        if not self.is_fitted:
+            raise ValueError("Model must be trained before it can be updated")
+        if mode not in ('continue', 'refresh'):
+            raise ValueError(f"Unknown update mode: {mode}")
+
+        start = time.perf_counter()
+        booster = self.model.get_booster()
+        params, _ = native_params(self.default_params)
+        dnew = xgb.DMatrix(X_new[self.feature_names], label=y_new)
+
+        if mode == 'continue':
+            rounds = n_rounds
+        else:
+            # refresh only rewrites leaf values, no tree_method applies
+            params.pop('tree_method', None)
+            params.update(process_type='update', updater='refresh', refresh_leaf=True)
+            rounds = booster.num_boosted_rounds()
+
+        with warnings.catch_warnings():
+            # xgboost warns whenever updater is set by hand, even for refresh which
+            # has no tree_method equivalent
+            warnings.filterwarnings('ignore', message=r'.*manually specified the `updater` parameter')
+            candidate = xgb.train(params, dnew, num_boost_round=rounds, xgb_model=booster.copy())
+
+        X_holdout = X_holdout[self.feature_names]
+        dholdout = xgb.DMatrix(X_holdout)
+        previous_auc = roc_auc_score(y_holdout, booster.predict(dholdout))
+        candidate_auc = roc_auc_score(y_holdout, candidate.predict(dholdout))
+        published = candidate_auc >= previous_auc - max_auc_drop
+
+        report = {
+            'mode': mode,
+            'new_samples': len(X_new),
+            'previous_auc': float(previous_auc),
+            'candidate_auc': float(candidate_auc),
+            'published': bool(published),
+            'n_trees': candidate.num_boosted_rounds() if published else booster.num_boosted_rounds()
+        }
+
+        if published:
+            self.model = self._wrap_booster(candidate)
+            # what-if tables would otherwise still describe the previous trees
+            if getattr(self, 'partial_dependence', None) is not None:
+                self.partial_dependence.rescore(self)
+            print(f"Update published: holdout auc {previous_auc:.4f} -> {candidate_auc:.4f}")
+        else:
+            print(f"Update rejected: holdout auc {previous_auc:.4f} -> {candidate_auc:.4f} "
+                  f"(allowed drop {max_auc_drop})")
+
+        report['seconds'] = time.perf_counter() - start
+        self.update_history = getattr(self, 'update_history', []) + [report]
+        if published and model_path:
+            self.save_model(model_path)
+        return report
+
+    def tune(self, X_train, y_train, method='halving', n_trials=27, nfold=5, space=None,
+             n_workers=None, nthread=None, log_path=None, params_path=None, seed=42, **search_kwargs):
+        # k-fold cv search with early stopping over a param space (see tuning.py)
+        # method: 'random' or 'halving' (successive halving over the boosting budget)
+        # the best params replace default_params, ready for train()
+
+        search = HyperparameterSearch(
+            self.default_params, space=space, nfold=nfold, n_workers=n_workers,
+            nthread=nthread, log_path=log_path, seed=seed
+        )
+        if method == 'random':
+            search.random_search(X_train, y_train, n_trials=n_trials, **search_kwargs)
+        elif method == 'halving':
+            search.successive_halving(X_train, y_train, n_trials=n_trials, **search_kwargs)
+        else:
+            raise ValueError(f"Unknown search method: {method}")
+
+        if params_path:
+            search.export_best(params_path)
+
+        self.default_params = search.best_params()
+        self.model = xgb.XGBClassifier(**self.default_params)
+        self.is_fitted = False
+        return search
+
     def evaluate(self, X_test, y_test):
         #evalutating the model performance pls dont be chopped 😭
         # returning a dict of metrics
@@ -118,6 +256,35 @@ class CreditRiskModel:
 
         return metrics
     
+    def evaluate_streaming(self, data, target_col='is_high_risk', chunk_size=100000, subset='all',
+                           test_size=0.2, threshold=0.5, n_bins=10000, exact=False):
+        # evaluation over a holdout too big for evaluate(), one predict_proba pass per chunk
+        # data: dataset path (csv / columnar / sharded), a DataFrame or an iterable of DataFrames
+        # subset='validation' scores exactly the holdout train_external() left out
+        # returns a compact summary (confusion matrix, auc, ap, ...) with no per-row arrays
+
+        if not self.is_fitted:
+            raise ValueError("model hasnt been trained")
+
+        if isinstance(data, str):
+            chunks = iter_split(data, subset, chunk_size, test_size)
+        elif isinstance(data, pd.DataFrame):
+            chunks = (data.iloc[start:start + chunk_size] for start in range(0, len(data), chunk_size))
+        else:
+            chunks = data
+
+        metrics = StreamingBinaryMetrics(threshold=threshold, n_bins=n_bins, exact=exact)
+        for chunk in chunks:
+            proba = self.model.predict_proba(chunk[self.feature_names])[:, 1]
+            metrics.update(chunk[target_col].to_numpy(), proba)
+
+        summary = metrics.summary()
+        print(f"\nstreaming eval: {summary['n_samples']} samples, "
+              f"ROC-AUC {summary['roc_auc']:.4f}, avg precision {summary['avg_precision']:.4f} "
+              f"({summary['auc_method']})")
+        print(f"Confusion matrix: {summary['confusion_matrix']}")
+        return summary
+
     def get_feature_importance(self):
         if not self.is_fitted:
             raise ValueError("Model must be trained before getting feature importance")
@@ -130,11 +297,25 @@ class CreditRiskModel:
 
         return feature_importance
 
+    def build_partial_dependence(self, X_train, grid_points=20, ice_samples=200):
+        # precomputing PD/ICE grids so what-if questions dont need a rescore
+        # stored on the model so they get saved in the same artifact
+        if not self.is_fitted:
+            raise ValueError("Model must be trained before building partial dependence")
+
+        self.partial_dependence = PartialDependenceTable(
+            grid_points=grid_points, ice_samples=ice_samples
+        ).build(self, X_train[self.feature_names])
+        return self.partial_dependence
+
     def save_model(self, filepath='credit_risk_model.pkl'):
         if not self.is_fitted:
             raise ValueError("Model must be trained before saving")
 
-        joblib.dump(self, filepath)
+        # write then rename, so a server loading the model never sees half a file
+        tmp_path = f"{filepath}.tmp"
+        joblib.dump(self, tmp_path)
+        os.replace(tmp_path, filepath)
         print(f"Model saved to {filepath}")
 
     @staticmethod
@@ -145,11 +326,10 @@ class CreditRiskModel:
 
 
 if __name__ == "__main__":
-    import os
     print("Loading synthetic credit data...")
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     data_path = os.path.join(base_dir, "outputs", "credit_data_synthetic.csv")
-    df = pd.read_csv(data_path)
+    df = load_dataset(data_path)
 
     model = CreditRiskModel()
 
@@ -164,5 +344,8 @@ if __name__ == "__main__":
     print("\nTop 10 Most Important Features:")
     print(feature_importance.head(10))
 
+    print("\nPrecomputing partial dependence tables...")
+    model.build_partial_dependence(X_train)
+
     model_path = os.path.join(base_dir, "outputs", "credit_risk_model.pkl")
     model.save_model(model_path)
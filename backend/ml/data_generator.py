@@ -1,129 +1,177 @@
+import os
+import tempfile
+
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from faker import Faker
 import random
+try:
+    from .dataset_store import ColumnarWriter
+except ImportError:
+    from dataset_store import ColumnarWriter
 
 fake = Faker()
 Faker.seed(42)
 np.random.seed(42)
 
 
+def percentile_out_of_core(values, q, chunk_size=1000000, n_bins=4096):
+    # exact np.percentile (linear interpolation) of a memmapped array without
+    # loading it: a histogram pass finds the bins holding the two order
+    # statistics needed, then only the values inside those bins are sorted
+    n = len(values)
+    if n == 0:
+        raise ValueError("Percentile of an empty array")
+
+    def chunks():
+        for start in range(0, n, chunk_size):
+            yield np.asarray(values[start:start + chunk_size])
+
+    low = min(chunk.min() for chunk in chunks())
+    high = max(chunk.max() for chunk in chunks())
+    if low == high:
+        return float(low)
+
+    edges = np.linspace(low, high, n_bins + 1)
+    counts = np.zeros(n_bins, dtype=np.int64)
+    for chunk in chunks():
+        counts += np.histogram(chunk, bins=edges)[0]
+
+    rank = (n - 1) * (q / 100)
+    below, above = int(np.floor(rank)), min(int(np.floor(rank)) + 1, n - 1)
+    cumulative = np.cumsum(counts)
+    first_bin, last_bin = np.searchsorted(cumulative, [below, above], side='right')
+    # np.histogram puts high into the last bin, so the bins are [edge, next edge)
+    lower_edge = edges[first_bin]
+    upper_edge = edges[last_bin + 1]
+    skipped = int(cumulative[first_bin - 1]) if first_bin > 0 else 0
+
+    selected = np.sort(np.concatenate([
+        chunk[(chunk >= lower_edge) & ((chunk < upper_edge) | (last_bin == n_bins - 1))]
+        for chunk in chunks()
+    ]))
+    lower_value = selected[below - skipped]
+    upper_value = selected[above - skipped]
+    # same interpolation as numpy, so the result is bit identical to np.percentile
+    fraction = rank - below
+    if fraction >= 0.5:
+        return float(upper_value - (upper_value - lower_value) * (1 - fraction))
+    return float(lower_value + (upper_value - lower_value) * fraction)
+
+
 class CreditDataGenerator:
 
-    def __init__(self, n_samples=1000):
+    def __init__(self, n_samples=1000, rng=None):
+        # rng: np.random.Generator (or seed) for reproducible, independent streams
+        # without one we keep drawing from the global np.random state
         self.n_samples = n_samples
+        if rng is None:
+            self.rng = np.random
+        elif isinstance(rng, np.random.Generator):
+            self.rng = rng
+        else:
+            self.rng = np.random.default_rng(rng)
         self.spending_categories = [
             'groceries', 'dining', 'entertainment', 'utilities',
             'transportation', 'shopping', 'healthcare', 'travel',
             'subscriptions', 'miscellaneous'
         ]
+        # uniform % of income range per spending category
+        self.spending_ranges = {
+            'groceries': (5, 15),
+            'dining': (2, 10),
+            'entertainment': (1, 8),
+            'utilities': (5, 12),
+            'transportation': (3, 15),
+            'shopping': (2, 12),
+            'healthcare': (1, 8),
+            'travel': (0, 10),
+            'subscriptions': (1, 5),
+            'miscellaneous': (1, 6)
+        }
 
     def generate_traditional_credit_features(self):
-        data = []
-
-        for i in range(self.n_samples):
-            credit_limit = np.random.uniform(1000, 50000)
-            credit_used = np.random.uniform(0, credit_limit * 1.2)
-            credit_utilization = min((credit_used / credit_limit) * 100, 150)
+        # every column is drawn for all rows at once instead of looping n_samples times
+        n = self.n_samples
+
+        credit_limit = self.rng.uniform(1000, 50000, size=n)
+        credit_used = self.rng.uniform(0, credit_limit * 1.2)
+        credit_utilization = np.minimum((credit_used / credit_limit) * 100, 150)
+
+        credit_age_months = self.rng.gamma(shape=3, scale=20, size=n)
+        hard_inquiries = self.rng.poisson(lam=2, size=n)
+
+        base_payment_rate = self.rng.beta(8, 2, size=n) * 100
+        payment_history_pct = np.minimum(100, base_payment_rate)
+
+        # late payments only happen below a payment history cutoff, so we only
+        # draw them for the rows that qualify
+        late_30_days = self._conditional_poisson(payment_history_pct < 90, lam=1)
+        late_60_days = self._conditional_poisson(payment_history_pct < 80, lam=0.5)
+        late_90_days = self._conditional_poisson(payment_history_pct < 70, lam=0.3)
+
+        num_credit_accounts = self.rng.poisson(lam=5, size=n) + 1
+        total_credit_limit = credit_limit * self.rng.uniform(1.5, 4, size=n)
+
+        return pd.DataFrame({
+            'credit_utilization': credit_utilization,
+            'credit_age_months': credit_age_months,
+            'hard_inquiries': hard_inquiries,
+            'payment_history_pct': payment_history_pct,
+            'late_30_days': late_30_days,
+            'late_60_days': late_60_days,
+            'late_90_days': late_90_days,
+            'num_credit_accounts': num_credit_accounts,
+            'total_credit_limit': total_credit_limit,
+            'current_balance': credit_used
+        })
+
+    def _conditional_poisson(self, mask, lam):
+        counts = np.zeros(len(mask), dtype=np.int64)
+        counts[mask] = self.rng.poisson(lam=lam, size=int(mask.sum()))
+        return counts
 
-            credit_age_months = np.random.gamma(shape=3, scale=20)
-            hard_inquiries = np.random.poisson(lam=2)
-
-            base_payment_rate = np.random.beta(8, 2) * 100
-            payment_history_pct = min(100, base_payment_rate)
-
-            late_30_days = np.random.poisson(lam=1) if payment_history_pct < 90 else 0
-            late_60_days = np.random.poisson(lam=0.5) if payment_history_pct < 80 else 0
-            late_90_days = np.random.poisson(lam=0.3) if payment_history_pct < 70 else 0
+    def generate_spending_patterns(self):
+        n = self.n_samples
 
-            num_credit_accounts = np.random.poisson(lam=5) + 1
-            total_credit_limit = credit_limit * np.random.uniform(1.5, 4)
+        monthly_income = self.rng.lognormal(mean=10, sigma=0.6, size=n)
 
-            data.append({
-                'credit_utilization': credit_utilization,
-                'credit_age_months': credit_age_months,
-                'hard_inquiries': hard_inquiries,
-                'payment_history_pct': payment_history_pct,
-                'late_30_days': late_30_days,
-                'late_60_days': late_60_days,
-                'late_90_days': late_90_days,
-                'num_credit_accounts': num_credit_accounts,
-                'total_credit_limit': total_credit_limit,
-                'current_balance': credit_used
-            })
+        spending_by_category = {}
+        for category in self.spending_categories:
+            low, high = self.spending_ranges[category]
+            spending_by_category[f'spending_{category}_pct'] = self.rng.uniform(low, high, size=n)
 
-        return pd.DataFrame(data)
+        total_spending_pct = np.sum(list(spending_by_category.values()), axis=0)
+        spending_velocity = self.rng.normal(0, 15, size=n)
+        impulse_spending_score = self.rng.beta(2, 5, size=n) * 100
 
-    def generate_spending_patterns(self):
-        data = []
-
-        for i in range(self.n_samples):
-            monthly_income = np.random.lognormal(mean=10, sigma=0.6)
-
-            spending_by_category = {}
-            total_spending = 0
-
-            for category in self.spending_categories:
-                if category == 'groceries':
-                    pct = np.random.uniform(5, 15)
-                elif category == 'dining':
-                    pct = np.random.uniform(2, 10)
-                elif category == 'entertainment':
-                    pct = np.random.uniform(1, 8)
-                elif category == 'utilities':
-                    pct = np.random.uniform(5, 12)
-                elif category == 'transportation':
-                    pct = np.random.uniform(3, 15)
-                elif category == 'shopping':
-                    pct = np.random.uniform(2, 12)
-                elif category == 'healthcare':
-                    pct = np.random.uniform(1, 8)
-                elif category == 'travel':
-                    pct = np.random.uniform(0, 10)
-                elif category == 'subscriptions':
-                    pct = np.random.uniform(1, 5)
-                else:
-                    pct = np.random.uniform(1, 6)
-
-                spending_by_category[f'spending_{category}_pct'] = pct
-                total_spending += pct
-
-            total_spending_pct = total_spending
-            spending_velocity = np.random.normal(0, 15)
-            impulse_spending_score = np.random.beta(2, 5) * 100
-
-            data.append({
-                'monthly_income': monthly_income,
-                **spending_by_category,
-                'total_spending_pct': total_spending_pct,
-                'spending_velocity': spending_velocity,
-                'impulse_spending_score': impulse_spending_score
-            })
-
-        return pd.DataFrame(data)
+        return pd.DataFrame({
+            'monthly_income': monthly_income,
+            **spending_by_category,
+            'total_spending_pct': total_spending_pct,
+            'spending_velocity': spending_velocity,
+            'impulse_spending_score': impulse_spending_score
+        })
 
     def generate_payment_patterns(self):
-        data = []
-
-        for i in range(self.n_samples):
-            recurring_payment_ratio = np.random.beta(4, 2) * 100
-            onetime_payment_ratio = 100 - recurring_payment_ratio
-            payment_consistency = np.random.beta(5, 2) * 100
-            payment_timing_variance = np.random.exponential(scale=5)
-            min_payment_frequency = np.random.beta(2, 8) * 100
-            avg_days_before_due = np.random.normal(2, 7)
-
-            data.append({
-                'recurring_payment_ratio': recurring_payment_ratio,
-                'onetime_payment_ratio': onetime_payment_ratio,
-                'payment_consistency': payment_consistency,
-                'payment_timing_variance': payment_timing_variance,
-                'min_payment_frequency': min_payment_frequency,
-                'avg_days_before_due': avg_days_before_due
-            })
-
-        return pd.DataFrame(data)
+        n = self.n_samples
+
+        recurring_payment_ratio = self.rng.beta(4, 2, size=n) * 100
+        onetime_payment_ratio = 100 - recurring_payment_ratio
+        payment_consistency = self.rng.beta(5, 2, size=n) * 100
+        payment_timing_variance = self.rng.exponential(scale=5, size=n)
+        min_payment_frequency = self.rng.beta(2, 8, size=n) * 100
+        avg_days_before_due = self.rng.normal(2, 7, size=n)
+
+        return pd.DataFrame({
+            'recurring_payment_ratio': recurring_payment_ratio,
+            'onetime_payment_ratio': onetime_payment_ratio,
+            'payment_consistency': payment_consistency,
+            'payment_timing_variance': payment_timing_variance,
+            'min_payment_frequency': min_payment_frequency,
+            'avg_days_before_due': avg_days_before_due
+        })
 
     def generate_credit_score(self, df):
         base_score = 850
@@ -141,13 +189,14 @@ class CreditDataGenerator:
         score += (df['payment_consistency'] - 50) * 0.8
         score -= np.abs(df['avg_days_before_due']) * 2
 
-        score += np.random.normal(0, 25, size=len(df))
+        score += self.rng.normal(0, 25, size=len(df))
 
         credit_score = np.clip(score, 300, 850)
 
         return credit_score.astype(int)
 
-    def generate_target_variable(self, df):
+    def generate_risk_score(self, df):
+        # continuous risk score, the target is its top 30%
         risk_score = 0
 
         risk_score += (df['credit_utilization'] > 80) * 15
@@ -165,11 +214,134 @@ class CreditDataGenerator:
         risk_score += (df['payment_timing_variance'] > 10) * 5
         risk_score += (df['avg_days_before_due'] < -5) * 8
 
-        risk_score += np.random.normal(0, 10, size=len(df))
+        risk_score += self.rng.normal(0, 10, size=len(df))
+
+        return risk_score
 
-        threshold = np.percentile(risk_score, 70)
+    @staticmethod
+    def risk_threshold(risk_score):
+        return np.percentile(risk_score, 70)
+
+    def generate_target_variable(self, df):
+        risk_score = self.generate_risk_score(df)
+        threshold = self.risk_threshold(risk_score)
         return (risk_score > threshold).astype(int)
 
+    def generate_features(self):
+        # every column except the target, plus the raw risk score the target is cut from
+        df = pd.concat([
+            self.generate_traditional_credit_features(),
+            self.generate_spending_patterns(),
+            self.generate_payment_patterns()
+        ], axis=1)
+        df['credit_score'] = self.generate_credit_score(df)
+        risk_score = np.asarray(self.generate_risk_score(df), dtype=np.float64)
+        return df, risk_score
+
+    def compact_dtypes(self):
+        # fixed schema for chunked output, so every chunk has the same dtypes
+        # counts fit easily in int8, credit scores (300-850) in int16
+        int8_columns = {
+            'hard_inquiries', 'late_30_days', 'late_60_days', 'late_90_days',
+            'num_credit_accounts', 'is_high_risk'
+        }
+        columns = [
+            'credit_utilization', 'credit_age_months', 'hard_inquiries', 'payment_history_pct',
+            'late_30_days', 'late_60_days', 'late_90_days', 'num_credit_accounts',
+            'total_credit_limit', 'current_balance', 'monthly_income',
+            *[f'spending_{category}_pct' for category in self.spending_categories],
+            'total_spending_pct', 'spending_velocity', 'impulse_spending_score',
+            'recurring_payment_ratio', 'onetime_payment_ratio', 'payment_consistency',
+            'payment_timing_variance', 'min_payment_frequency', 'avg_days_before_due',
+            'credit_score', 'is_high_risk'
+        ]
+        return {
+            column: np.int8 if column in int8_columns
+            else np.int16 if column == 'credit_score'
+            else np.float32
+            for column in columns
+        }
+
+    @staticmethod
+    def _to_compact(df, dtypes):
+        out = {}
+        for column, dtype in dtypes.items():
+            values = df[column].to_numpy()
+            if np.issubdtype(dtype, np.integer):
+                info = np.iinfo(dtype)
+                if values.min() < info.min or values.max() > info.max:
+                    raise OverflowError(f"{column} does not fit in {np.dtype(dtype)}")
+            out[column] = values.astype(dtype)
+        return pd.DataFrame(out)
+
+    def _chunk_plan(self, chunk_size, seed):
+        # same seeding scheme as sharded generation: chunk i uses child seed i
+        full, rest = divmod(self.n_samples, chunk_size)
+        sizes = [chunk_size] * full + ([rest] if rest else [])
+        return list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+
+    def _chunk_frame(self, n_rows, seed_seq):
+        chunk_generator = CreditDataGenerator(n_samples=n_rows, rng=np.random.default_rng(seed_seq))
+        return chunk_generator.generate_features()
+
+    def iter_chunks(self, chunk_size=100000, seed=42, threshold=None, spill_dir=None):
+        # yields the dataset as fixed size DataFrames with compact dtypes
+        # the target needs the global 70th percentile of the risk score, so a first
+        # pass spills the risk scores to a memmap in spill_dir (system temp dir by
+        # default) and the second pass regenerates each chunk from its seed and
+        # labels it. memory stays at one chunk whatever n_samples is
+        plan = self._chunk_plan(chunk_size, seed)
+        if not plan:
+            return
+        dtypes = self.compact_dtypes()
+
+        if threshold is None:
+            handle, spill_path = tempfile.mkstemp(suffix='.npy', dir=spill_dir)
+            os.close(handle)
+            try:
+                risk_scores = np.lib.format.open_memmap(
+                    spill_path, mode='w+', dtype=np.float64, shape=(self.n_samples,)
+                )
+                offset = 0
+                for n_rows, seed_seq in plan:
+                    _, risk_score = self._chunk_frame(n_rows, seed_seq)
+                    risk_scores[offset:offset + n_rows] = risk_score
+                    offset += n_rows
+                threshold = percentile_out_of_core(risk_scores, 70, chunk_size)
+                del risk_scores
+            finally:
+                os.remove(spill_path)
+
+        for n_rows, seed_seq in plan:
+            df, risk_score = self._chunk_frame(n_rows, seed_seq)
+            df['is_high_risk'] = (risk_score > threshold).astype(np.int8)
+            yield self._to_compact(df, dtypes)
+
+    def write_stream(self, path, chunk_size=100000, seed=42, fmt='csv'):
+        # streams the dataset to a csv file or a columnar store chunk by chunk
+        # peak memory is one chunk, the risk scores are spilled next to the output
+        if fmt not in ('csv', 'columnar'):
+            raise ValueError(f"Unknown format: {fmt}")
+
+        spill_dir = os.path.dirname(os.path.abspath(path))
+        n_written = 0
+        if fmt == 'csv':
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                for chunk in self.iter_chunks(chunk_size, seed, spill_dir=spill_dir):
+                    chunk.to_csv(f, header=n_written == 0, index=False)
+                    n_written += len(chunk)
+                if n_written == 0:
+                    f.write(','.join(self.compact_dtypes()) + '\n')
+        else:
+            writer = ColumnarWriter(path, self.n_samples, self.compact_dtypes())
+            for chunk in self.iter_chunks(chunk_size, seed, spill_dir=spill_dir):
+                writer.write(chunk)
+                n_written += len(chunk)
+            writer.close()
+
+        print(f"Streamed {n_written} samples to {path}")
+        return path
+
     def generate_dataset(self):
         print("Generating traditional credit features...")
         traditional_features = self.generate_traditional_credit_features()
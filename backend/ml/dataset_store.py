@@ -0,0 +1,245 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# columnar on-disk format for the credit dataset
+# one .npy file per column with downcast dtypes + a manifest, so every consumer
+# can memory map it instead of reparsing the csv as float64/int64
+#
+# float32 loses nothing for training, xgboost converts everything to float32
+
+STORE_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+
+def columnar_path_for(csv_path):
+    # outputs/credit_data_synthetic.csv -> outputs/credit_data_synthetic.columnar/
+    return os.path.splitext(csv_path)[0] + '.columnar'
+
+
+def downcast_column(series):
+    # ints go to the smallest signed type that fits (counts end up int8/int16)
+    # floats go to float32
+    if pd.api.types.is_bool_dtype(series):
+        return series.astype(np.int8)
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(series):
+        return series.astype(np.float32)
+    raise ValueError(f"Column {series.name} has unsupported dtype {series.dtype}")
+
+
+def _source_fingerprint(csv_path):
+    stat = os.stat(csv_path)
+    return {'file': os.path.basename(csv_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def write_columnar(df, out_dir, source=None):
+    # writing a dataframe as one .npy per column
+    os.makedirs(out_dir, exist_ok=True)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        column = downcast_column(df[name])
+        filename = f"{i:03d}.npy"
+        np.save(os.path.join(out_dir, filename), column.to_numpy())
+        columns.append({'name': name, 'dtype': str(column.dtype), 'file': filename})
+
+    manifest = {
+        'version': STORE_VERSION,
+        'n_rows': len(df),
+        'columns': columns,
+        'source': source
+    }
+    # manifest goes last so a half written store is never picked up
+    with open(os.path.join(out_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    return out_dir
+
+
+class ColumnarWriter:
+    # streaming writer for a store with a known row count and schema
+    # columns are preallocated .npy memmaps and each chunk is written in place,
+    # so nothing bigger than one chunk is ever held in memory
+
+    def __init__(self, out_dir, n_rows, dtypes, source=None):
+        # dtypes: ordered dict of column name -> numpy dtype
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.n_rows = n_rows
+        self.source = source
+        self.offset = 0
+        self.columns = []
+        self._maps = {}
+
+        for i, (name, dtype) in enumerate(dtypes.items()):
+            filename = f"{i:03d}.npy"
+            self._maps[name] = np.lib.format.open_memmap(
+                os.path.join(out_dir, filename), mode='w+', dtype=np.dtype(dtype), shape=(n_rows,)
+            )
+            self.columns.append({'name': name, 'dtype': str(np.dtype(dtype)), 'file': filename})
+
+    def write(self, chunk):
+        end = self.offset + len(chunk)
+        if end > self.n_rows:
+            raise ValueError(f"Writing past the declared {self.n_rows} rows")
+
+        for name, column in self._maps.items():
+            column[self.offset:end] = chunk[name].to_numpy()
+        self.offset = end
+
+    def close(self):
+        if self.offset != self.n_rows:
+            raise ValueError(f"Store declared {self.n_rows} rows but {self.offset} were written")
+
+        for column in self._maps.values():
+            column.flush()
+        self._maps = {}
+
+        manifest = {
+            'version': STORE_VERSION,
+            'n_rows': self.n_rows,
+            'columns': self.columns,
+            'source': self.source
+        }
+        with open(os.path.join(self.out_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        return self.out_dir
+
+
+def convert_csv(csv_path, out_dir=None, chunksize=None):
+    # csv -> columnar store, returns the store directory
+    out_dir = out_dir or columnar_path_for(csv_path)
+
+    if chunksize is None:
+        df = pd.read_csv(csv_path)
+    else:
+        # keeps the float64 parse buffer small for big files
+        df = pd.concat(
+            (chunk.apply(downcast_column) for chunk in pd.read_csv(csv_path, chunksize=chunksize)),
+            ignore_index=True
+        )
+
+    write_columnar(df, out_dir, source=_source_fingerprint(csv_path))
+    size = sum(
+        os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir)
+    )
+    print(f"Converted {csv_path} -> {out_dir} ({len(df)} rows, {size / 1e6:.1f} MB)")
+    return out_dir
+
+
+def read_manifest(store_dir):
+    with open(os.path.join(store_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_columnar(store_dir, columns=None, mmap=True):
+    # loading the store as a dataframe backed by memory mapped columns
+    # maps are copy-on-write: pages are shared until written, edits never reach disk
+    # (sklearn insists on writeable arrays, so plain read-only maps dont work)
+    manifest = read_manifest(store_dir)
+    if manifest.get('version') != STORE_VERSION:
+        raise ValueError(f"Unsupported columnar store version: {manifest.get('version')}")
+
+    wanted = None if columns is None else set(columns)
+    arrays = {}
+    for column in manifest['columns']:
+        if wanted is not None and column['name'] not in wanted:
+            continue
+        arrays[column['name']] = np.load(
+            os.path.join(store_dir, column['file']), mmap_mode='c' if mmap else None
+        )
+
+    if wanted is not None and len(arrays) != len(wanted):
+        missing = wanted - set(arrays)
+        raise ValueError(f"Columns not in store: {missing}")
+
+    # copy=False keeps one block per column, pointing straight at the maps
+    return pd.DataFrame(arrays, copy=False)
+
+
+def is_store_fresh(store_dir, csv_path):
+    # store is fresh if it was converted from the csv as it is now
+    manifest_path = os.path.join(store_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+
+    source = read_manifest(store_dir).get('source') or {}
+    current = _source_fingerprint(csv_path)
+    return source.get('size') == current['size'] and source.get('mtime_ns') == current['mtime_ns']
+
+
+def load_dataset(path, columns=None):
+    # single entry point for every consumer of the credit dataset
+    # accepts a csv path or a store directory, prefers a fresh store next to the csv
+    if os.path.isdir(path):
+        return load_columnar(path, columns=columns)
+
+    store_dir = columnar_path_for(path)
+    if is_store_fresh(store_dir, path):
+        return load_columnar(store_dir, columns=columns)
+
+    return pd.read_csv(path, usecols=columns)
+
+
+def _shard_paths(store_dir):
+    # a sharded dataset dir (see sharded_generation) lists its shards in the manifest
+    manifest = read_manifest(store_dir)
+    if 'shards' not in manifest:
+        return None
+    return [os.path.join(store_dir, shard['file']) for shard in manifest['shards']]
+
+
+def dataset_columns(path):
+    # column names without loading any rows
+    if os.path.isdir(path):
+        shards = _shard_paths(path)
+        if shards is not None:
+            return dataset_columns(shards[0])
+        return [column['name'] for column in read_manifest(path)['columns']]
+
+    store_dir = columnar_path_for(path)
+    if is_store_fresh(store_dir, path):
+        return dataset_columns(store_dir)
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def iter_chunks(path, chunk_size=100000, columns=None):
+    # yields the dataset as DataFrames of at most chunk_size rows, in row order
+    # works on a csv, a columnar store or a sharded dataset dir, and never holds
+    # more than one chunk in memory
+    if os.path.isdir(path):
+        shards = _shard_paths(path)
+        if shards is not None:
+            for shard in shards:
+                yield from iter_chunks(shard, chunk_size, columns)
+            return
+
+        store = load_columnar(path, columns=columns)
+        for start in range(0, len(store), chunk_size):
+            # slices of the maps, copied so pages can be dropped after each chunk
+            yield store.iloc[start:start + chunk_size].copy()
+        return
+
+    store_dir = columnar_path_for(path)
+    if is_store_fresh(store_dir, path):
+        yield from iter_chunks(store_dir, chunk_size, columns)
+        return
+
+    for chunk in pd.read_csv(path, usecols=columns, chunksize=chunk_size):
+        yield chunk
+
+
+if __name__ == "__main__":
+    import sys
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        base_dir, "outputs", "credit_data_synthetic.csv"
+    )
+    convert_csv(data_path)
@@ -0,0 +1,163 @@
+import gc
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import xgboost as xgb
+
+try:
+    from .dataset_store import iter_chunks, dataset_columns
+except ImportError:
+    from dataset_store import iter_chunks, dataset_columns
+
+# out-of-core training inputs for CreditRiskModel
+#
+# the dataset is streamed through an xgboost DataIter one chunk at a time, so
+# only one chunk of raw rows is ever in memory:
+#   - 'quantile': QuantileDMatrix, rows are quantized to max_bin histogram bins
+#     while streaming and kept compressed in memory (~1 byte per value)
+#   - 'external': DMatrix with a cache_prefix, xgboost pages the data to disk
+#     and trains from the pages, so dataset size is bounded by disk
+#
+# the train/validation split is decided per row from (seed, chunk index), so
+# every pass over the data (xgboost iterates more than once) sees the same split
+
+
+def native_params(params, seed=42):
+    # sklearn style params (as in CreditRiskModel.default_params) -> xgb.train/xgb.cv
+    # returns (params, num_boost_round)
+    params = dict(params)
+    num_boost_round = params.pop('n_estimators', 100)
+    params['seed'] = params.pop('random_state', seed)
+    return params, num_boost_round
+
+
+def split_mask(chunk_index, n_rows, test_size=0.2, seed=42):
+    # True = validation row, deterministic for a given chunk
+    rng = np.random.default_rng([seed, chunk_index])
+    return rng.random(n_rows) < test_size
+
+
+def iter_split(path, subset='train', chunk_size=100000, test_size=0.2, seed=42):
+    # chunks of one side of the split ('train', 'validation' or 'all')
+    if subset not in ('train', 'validation', 'all'):
+        raise ValueError(f"Unknown subset: {subset}")
+
+    for index, chunk in enumerate(iter_chunks(path, chunk_size)):
+        if subset != 'all' and test_size > 0:
+            mask = split_mask(index, len(chunk), test_size, seed)
+            chunk = chunk[mask] if subset == 'validation' else chunk[~mask]
+        if len(chunk):
+            yield chunk
+
+
+class ChunkedDataIter(xgb.DataIter):
+    # feeds one side of the train/validation split to xgboost, chunk by chunk
+
+    def __init__(self, path, target_col='is_high_risk', chunk_size=100000, subset='train',
+                 test_size=0.2, seed=42, cache_prefix=None):
+        if subset not in ('train', 'validation', 'all'):
+            raise ValueError(f"Unknown subset: {subset}")
+
+        self.path = path
+        self.target_col = target_col
+        self.chunk_size = chunk_size
+        self.subset = subset
+        self.test_size = test_size
+        self.seed = seed
+        self.n_rows = 0
+        self.n_positive = 0
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self):
+        self._chunks = None
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = iter_split(self.path, self.subset, self.chunk_size, self.test_size, self.seed)
+            self.n_rows = 0
+            self.n_positive = 0
+
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return 0
+
+        label = chunk[self.target_col].to_numpy()
+        self.n_rows += len(chunk)
+        self.n_positive += int(label.sum())
+        input_data(
+            data=chunk.drop(columns=[self.target_col]).astype(np.float32),
+            label=label
+        )
+        return 1
+
+
+def feature_columns(path, target_col='is_high_risk'):
+    columns = dataset_columns(path)
+    if target_col not in columns:
+        raise ValueError(f"Target column {target_col} not in dataset")
+    return [c for c in columns if c != target_col]
+
+
+def build_matrices(path, target_col='is_high_risk', chunk_size=100000, test_size=0.2, seed=42,
+                   memory='quantile', max_bin=256, nthread=None, cache_dir=None):
+    # returns (train, validation or None, {'train': iter, 'validation': iter})
+    # validation is quantized with the training bins (ref=train) so both agree
+    if memory not in ('quantile', 'external'):
+        raise ValueError(f"Unknown memory mode: {memory}")
+
+    nthread = nthread or os.cpu_count() or 1
+    iters = {'train': ChunkedDataIter(
+        path, target_col, chunk_size, 'train', test_size, seed,
+        cache_prefix=os.path.join(cache_dir, 'train') if memory == 'external' else None
+    )}
+    if test_size > 0:
+        iters['validation'] = ChunkedDataIter(
+            path, target_col, chunk_size, 'validation', test_size, seed,
+            cache_prefix=os.path.join(cache_dir, 'validation') if memory == 'external' else None
+        )
+
+    if memory == 'quantile':
+        train = xgb.QuantileDMatrix(iters['train'], max_bin=max_bin, nthread=nthread)
+        validation = xgb.QuantileDMatrix(
+            iters['validation'], max_bin=max_bin, ref=train, nthread=nthread
+        ) if 'validation' in iters else None
+    else:
+        train = xgb.DMatrix(iters['train'], nthread=nthread)
+        validation = xgb.DMatrix(iters['validation'], nthread=nthread) if 'validation' in iters else None
+
+    return train, validation, iters
+
+
+def train_booster(params, path, target_col='is_high_risk', chunk_size=100000, test_size=0.2,
+                  seed=42, memory='quantile', max_bin=256, nthread=None, verbose=True):
+    # returns (booster, evals_result, row counts)
+    params, num_boost_round = native_params(params, seed)
+    params['tree_method'] = 'hist'
+    params['max_bin'] = max_bin
+    params['nthread'] = nthread or os.cpu_count() or 1
+
+    cache_dir = tempfile.mkdtemp(prefix='xgb_cache_') if memory == 'external' else None
+    try:
+        train, validation, iters = build_matrices(
+            path, target_col, chunk_size, test_size, seed, memory, max_bin, params['nthread'], cache_dir
+        )
+        evals = [(train, 'train')] + ([(validation, 'validation')] if validation is not None else [])
+        evals_result = {}
+        booster = xgb.train(
+            params, train, num_boost_round=num_boost_round, evals=evals,
+            evals_result=evals_result, verbose_eval=verbose
+        )
+        counts = {
+            name: {'rows': it.n_rows, 'positive': it.n_positive} for name, it in iters.items()
+        }
+        # matrices must be freed before their cache pages can be removed
+        del train, validation, evals
+        gc.collect()
+    finally:
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    return booster, evals_result, counts
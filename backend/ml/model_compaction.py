@@ -0,0 +1,244 @@
+import argparse
+import copy
+import json
+import os
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+try:
+    from .benchmark_model import measure_latency
+    from .credit_risk_model import CreditRiskModel
+    from .dataset_store import load_dataset
+except ImportError:
+    from benchmark_model import measure_latency
+    from credit_risk_model import CreditRiskModel
+    from dataset_store import load_dataset
+
+# compaction of a trained CreditRiskModel for low latency scoring
+#
+# the holdout is split in two (stratified): a selection half that every search
+# decision uses, and an evaluation half nothing is tuned on. candidates, each
+# kept only if its selection roc-auc is within max_auc_loss of the original model:
+#   - truncate: keep the first k trees (binary search for the smallest k)
+#   - prune: drop splits whose gain is below gamma (prune updater), then truncate
+#   - distill: shallower trees fitted to the original model's probabilities
+# the smallest admissible candidate (bytes or latency) becomes the new artifact.
+# reported roc_auc and auc_loss come from the evaluation half only, so they are
+# not biased by the search that picked the candidate
+
+PER_NODE_FIELDS = [
+    'base_weights', 'default_left', 'left_children', 'right_children', 'parents',
+    'loss_changes', 'split_conditions', 'split_indices', 'split_type', 'sum_hessian'
+]
+DEFAULT_GAMMAS = [1, 2, 5, 10, 20, 50]
+DEFAULT_DISTILL_DEPTHS = [2, 3, 4]
+
+
+def _auc(booster, dmatrix, y):
+    return float(roc_auc_score(y, booster.predict(dmatrix)))
+
+
+def drop_unreachable_nodes(booster):
+    # the prune updater only marks nodes as deleted, they stay in the serialized
+    # model. rewriting every tree with just its reachable nodes makes the saved
+    # artifact actually shrink
+    raw = json.loads(booster.save_raw('json'))
+    for tree in raw['learner']['gradient_booster']['model']['trees']:
+        order, queue = [], [0]
+        while queue:
+            node = queue.pop(0)
+            order.append(node)
+            if tree['left_children'][node] != -1:
+                queue.extend([tree['left_children'][node], tree['right_children'][node]])
+        new_id = {old: new for new, old in enumerate(order)}
+
+        fields = {name: [tree[name][old] for old in order] for name in PER_NODE_FIELDS}
+        fields['left_children'] = [new_id.get(c, -1) for c in fields['left_children']]
+        fields['right_children'] = [new_id.get(c, -1) for c in fields['right_children']]
+        fields['parents'] = [new_id.get(p, p) for p in fields['parents']]
+        tree.update(fields)
+        tree['tree_param']['num_nodes'] = str(len(order))
+        tree['tree_param']['num_deleted'] = '0'
+
+    return xgb.Booster(model_file=bytearray(json.dumps(raw).encode('utf-8')))
+
+
+def model_size(booster):
+    trees = booster.trees_to_dataframe()
+    return {
+        'model_bytes': len(booster.save_raw('ubj')),
+        'n_trees': booster.num_boosted_rounds(),
+        'n_nodes': len(trees),
+        'n_leaves': int((trees['Feature'] == 'Leaf').sum()),
+        'max_depth': _max_depth(trees)
+    }
+
+
+def _max_depth(trees):
+    # depth from the node ids, trees_to_dataframe has no depth column
+    depth = {}
+    for row in trees[['Tree', 'ID', 'Yes', 'No']].itertuples(index=False):
+        depth.setdefault(row.ID, 0)
+        if isinstance(row.Yes, str):
+            depth[row.Yes] = depth[row.ID] + 1
+            depth[row.No] = depth[row.ID] + 1
+    return max(depth.values()) if depth else 0
+
+
+def truncate(booster, dholdout, y_holdout, min_auc):
+    # smallest prefix of trees that keeps the auc (auc is near monotone in k)
+    n_trees = booster.num_boosted_rounds()
+    if _auc(booster, dholdout, y_holdout) < min_auc:
+        return None
+
+    low, high = 1, n_trees
+    while low < high:
+        middle = (low + high) // 2
+        if _auc(booster[:middle], dholdout, y_holdout) >= min_auc:
+            high = middle
+        else:
+            low = middle + 1
+    return booster[:low]
+
+
+def prune(booster, dtrain, gamma):
+    params = {'process_type': 'update', 'updater': 'prune', 'gamma': gamma}
+    pruned = xgb.train(params, dtrain, num_boost_round=booster.num_boosted_rounds(),
+                       xgb_model=booster.copy())
+    return drop_unreachable_nodes(pruned)
+
+
+def distill(booster, X_train, base_params, max_depth, n_estimators, seed=42):
+    # student fitted to the teacher's probabilities (logistic loss accepts soft labels)
+    soft_labels = booster.predict(xgb.DMatrix(X_train))
+    params = dict(base_params, objective='binary:logistic', max_depth=max_depth, seed=seed)
+    params.pop('n_estimators', None)
+    params.pop('random_state', None)
+    return xgb.train(params, xgb.DMatrix(X_train, label=soft_labels), num_boost_round=n_estimators)
+
+
+def compact_model(model, X_train, y_train, X_holdout, y_holdout, max_auc_loss=0.005,
+                  methods=('truncate', 'prune', 'distill'), objective='bytes',
+                  gammas=DEFAULT_GAMMAS, distill_depths=DEFAULT_DISTILL_DEPTHS,
+                  latency_batch_sizes=(1, 1000), evaluation_size=0.5, seed=42):
+    # returns (compacted CreditRiskModel or None, report dict)
+    # objective: 'bytes' picks the smallest artifact, 'latency' the fastest single-row predict
+    # evaluation_size: share of the holdout kept out of the search for the reported auc
+    if not model.is_fitted:
+        raise ValueError("Model must be trained before compaction")
+    if objective not in ('bytes', 'latency'):
+        raise ValueError(f"Unknown objective: {objective}")
+
+    X_train = X_train[model.feature_names]
+    X_select, X_eval, y_select, y_eval = train_test_split(
+        X_holdout[model.feature_names], y_holdout, test_size=evaluation_size,
+        random_state=seed, stratify=y_holdout
+    )
+    booster = model.model.get_booster()
+    dtrain = xgb.DMatrix(X_train, label=y_train)
+    dselect = xgb.DMatrix(X_select)
+    deval = xgb.DMatrix(X_eval)
+
+    min_auc = _auc(booster, dselect, y_select) - max_auc_loss
+
+    candidates = {}
+    if 'truncate' in methods:
+        candidates['truncate'] = truncate(booster, dselect, y_select, min_auc)
+    if 'prune' in methods:
+        for gamma in gammas:
+            pruned = prune(booster, dtrain, gamma)
+            candidates[f'prune(gamma={gamma})'] = truncate(pruned, dselect, y_select, min_auc)
+    if 'distill' in methods:
+        for depth in distill_depths:
+            student = distill(booster, X_train, model.default_params, depth,
+                              booster.num_boosted_rounds())
+            candidates[f'distill(depth={depth})'] = truncate(student, dselect, y_select, min_auc)
+
+    original_auc = _auc(booster, deval, y_eval)
+
+    def describe(candidate_booster):
+        wrapped = model._wrap_booster(candidate_booster)
+        scorer = copy.copy(model)
+        scorer.model = wrapped
+        roc_auc = _auc(candidate_booster, deval, y_eval)
+        return {
+            'roc_auc': roc_auc,
+            'auc_loss': original_auc - roc_auc,
+            'selection_roc_auc': _auc(candidate_booster, dselect, y_select),
+            **model_size(candidate_booster),
+            'latency': measure_latency(scorer, X_eval, list(latency_batch_sizes))
+        }
+
+    report = {
+        'max_auc_loss': max_auc_loss,
+        'objective': objective,
+        'selection_samples': len(X_select),
+        'evaluation_samples': len(X_eval),
+        'original': describe(booster),
+        'candidates': {}
+    }
+    for name, candidate in candidates.items():
+        if candidate is None:
+            report['candidates'][name] = None
+            continue
+        report['candidates'][name] = describe(candidate)
+        print(f"{name}: auc {report['candidates'][name]['roc_auc']:.4f}, "
+              f"{report['candidates'][name]['n_trees']} trees, "
+              f"{report['candidates'][name]['model_bytes'] / 1024:.0f} KB")
+
+    admissible = {name: info for name, info in report['candidates'].items() if info is not None}
+    if not admissible:
+        report['selected'] = None
+        print("No candidate stays within the AUC budget")
+        return None, report
+
+    def cost(info):
+        if objective == 'bytes':
+            return info['model_bytes']
+        return info['latency'][str(latency_batch_sizes[0])]['p50_ms']
+
+    selected = min(admissible, key=lambda name: cost(admissible[name]))
+    report['selected'] = selected
+    report['compacted'] = admissible[selected]
+
+    compacted = copy.deepcopy(model)
+    compacted.model = model._wrap_booster(candidates[selected])
+    if getattr(compacted, 'partial_dependence', None) is not None:
+        compacted.partial_dependence.rescore(compacted)
+
+    original, result = report['original'], report['compacted']
+    print(f"Selected {selected}: {original['model_bytes'] / 1024:.0f} KB -> {result['model_bytes'] / 1024:.0f} KB, "
+          f"evaluation auc {original['roc_auc']:.4f} -> {result['roc_auc']:.4f} (loss {result['auc_loss']:.4f})")
+    return compacted, report
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Compact a trained CreditRiskModel")
+    parser.add_argument('--model', default=os.path.join(base_dir, "outputs", "credit_risk_model.pkl"))
+    parser.add_argument('--data', default=os.path.join(base_dir, "outputs", "credit_data_synthetic.csv"))
+    parser.add_argument('--output', default=os.path.join(base_dir, "outputs", "credit_risk_model_compact.pkl"))
+    parser.add_argument('--report', help="write the report as json (default: next to the output)")
+    parser.add_argument('--max-auc-loss', type=float, default=0.005)
+    parser.add_argument('--methods', nargs='+', choices=['truncate', 'prune', 'distill'],
+                        default=['truncate', 'prune', 'distill'])
+    parser.add_argument('--objective', choices=['bytes', 'latency'], default='bytes')
+    args = parser.parse_args()
+
+    model = CreditRiskModel.load_model(args.model)
+    # same split as training (prepare_data is seeded), so the holdout is unseen.
+    # compact_model splits it again into selection and evaluation halves
+    X_train, X_test, y_train, y_test = model.prepare_data(load_dataset(args.data))
+
+    compacted, report = compact_model(model, X_train, y_train, X_test, y_test,
+                                      args.max_auc_loss, args.methods, args.objective)
+    if compacted is not None:
+        compacted.save_model(args.output)
+
+    report_path = args.report or os.path.splitext(args.output)[0] + '_report.json'
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, default=lambda value: np.asarray(value).tolist())
+    print(f"Report written to {report_path}")
@@ -7,6 +7,10 @@ try:
     from .credit_risk_model import CreditRiskModel
 except ImportError:
     from credit_risk_model import CreditRiskModel
+try:
+    from .dataset_store import load_dataset
+except ImportError:
+    from dataset_store import load_dataset
 
 class ModelInterpreter:
     #this is where the XAI comes in - explaining decisions
@@ -246,7 +250,7 @@ class ModelInterpreter:
 
 if __name__ == "__main__":
     print("Loading synthetic credit data...")
-    df = pd.read_csv("credit_data_synthetic.csv")
+    df = load_dataset("credit_data_synthetic.csv")
 
     print("Loading trained model...")
     model = CreditRiskModel.load_model('credit_risk_model.pkl')
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _interp_rows(curves, grid, x):
+    # linear interpolation of every row of `curves` (rows x len(grid)) at x
+    # same result as np.interp row by row, but done once for all rows
+    if len(grid) == 1:
+        return curves[:, 0]
+    x = min(max(x, grid[0]), grid[-1])
+    hi = int(np.clip(np.searchsorted(grid, x, side='right'), 1, len(grid) - 1))
+    lo = hi - 1
+    span = grid[hi] - grid[lo]
+    w = 0.0 if span == 0 else (x - grid[lo]) / span
+    return curves[:, lo] * (1 - w) + curves[:, hi] * w
+
+
+class PartialDependenceTable:
+    # precomputed partial dependence (PD) and ICE grids for every feature
+    # lets us answer "what if feature X were v" by interpolating in memory
+    # instead of rescoring the model for every question
+    #
+    # curves are stored in log-odds (margin) space so they can be added to a
+    # user's own score, then squashed back to a probability
+
+    def __init__(self, grid_points=20, ice_samples=200, neighbours=10,
+                 radius_quantile=0.95, random_state=42):
+        self.grid_points = grid_points
+        self.ice_samples = ice_samples
+        self.neighbours = neighbours
+        self.radius_quantile = radius_quantile
+        self.random_state = random_state
+
+        self.feature_names = None
+        self.grids = {}
+        self.pd_curves = {}
+        self.ice_curves = {}
+        self.reference = None
+        self.center = None
+        self.scale = None
+        self.radius = None
+        self.is_built = False
+
+    def build(self, model, X):
+        # model is a fitted CreditRiskModel, X the training features
+        # ICE curves are computed for a sample of reference rows, PD is their mean
+
+        self.feature_names = X.columns.tolist()
+        reference = X.sample(
+            n=min(self.ice_samples, len(X)), random_state=self.random_state
+        )
+        ref_values = reference.values.astype(float)
+        n_ref = len(reference)
+
+        quantiles = np.linspace(0, 1, self.grid_points)
+        for feature in self.feature_names:
+            self.grids[feature] = np.unique(np.quantile(X[feature].values, quantiles))
+        self._score_curves(model, ref_values)
+
+        # scaling for the "how far is this user from the grid" check
+        self.center = X.mean().values.astype(float)
+        scale = X.std().values.astype(float)
+        scale[scale == 0] = 1.0
+        self.scale = scale
+        self.reference = (ref_values - self.center) / self.scale
+
+        # radius = how far typical training rows sit from their nearest reference
+        # anything further than that is treated as off-grid
+        holdout = X.drop(index=reference.index, errors='ignore')
+        if len(holdout) == 0:
+            holdout = X
+        holdout = holdout.sample(
+            n=min(1000, len(holdout)), random_state=self.random_state
+        )
+        holdout_scaled = (holdout.values.astype(float) - self.center) / self.scale
+        nearest = np.array([
+            np.sqrt(((self.reference - row) ** 2).sum(axis=1)).min()
+            for row in holdout_scaled
+        ])
+        self.radius = float(np.quantile(nearest, self.radius_quantile))
+
+        self.is_built = True
+        print(f"Partial dependence tables built: {len(self.feature_names)} features, "
+              f"{n_ref} ICE curves, grid <= {self.grid_points} points")
+        return self
+
+    def _score_curves(self, model, ref_values):
+        n_ref = len(ref_values)
+        for j, feature in enumerate(self.feature_names):
+            grid = self.grids[feature]
+            batch = np.repeat(ref_values, len(grid), axis=0)
+            batch[:, j] = np.tile(grid, n_ref)
+            batch_df = pd.DataFrame(batch, columns=self.feature_names)
+
+            margins = model.model.predict(batch_df, output_margin=True)
+            ice = np.asarray(margins, dtype=float).reshape(n_ref, len(grid))
+
+            self.ice_curves[feature] = ice
+            self.pd_curves[feature] = ice.mean(axis=0)
+
+    def rescore(self, model):
+        # recomputing the curves for an updated model, same reference rows and grids
+        # (used after incremental updates, much cheaper than a full build)
+        if not self.is_built:
+            raise ValueError("Partial dependence tables have not been built")
+
+        self._score_curves(model, self.reference * self.scale + self.center)
+        return self
+
+    def _nearest_references(self, user_vector):
+        scaled = (np.asarray(user_vector, dtype=float) - self.center) / self.scale
+        distances = np.sqrt(((self.reference - scaled) ** 2).sum(axis=1))
+        k = min(self.neighbours, len(distances))
+        idx = np.argpartition(distances, k - 1)[:k]
+        return idx, float(distances[idx].min())
+
+    def estimate(self, user_vector, feature, value, base_margin):
+        # approximate the margin after setting `feature` to `value`
+        # uses the ICE curves of the user's nearest reference rows so local
+        # interactions are kept, then shifts the user's own margin by the delta
+
+        if not self.is_built:
+            raise ValueError("Partial dependence tables have not been built")
+        if feature not in self.grids:
+            raise ValueError(f"Unknown feature: {feature}")
+
+        grid = self.grids[feature]
+        j = self.feature_names.index(feature)
+        current = float(user_vector[j])
+
+        idx, distance = self._nearest_references(user_vector)
+        curves = self.ice_curves[feature][idx]
+        delta = float(np.mean(
+            _interp_rows(curves, grid, value) - _interp_rows(curves, grid, current)
+        ))
+
+        reasons = []
+        if not grid[0] <= value <= grid[-1]:
+            reasons.append(f"{feature}={value} is outside the grid [{grid[0]:.4g}, {grid[-1]:.4g}]")
+        if not grid[0] <= current <= grid[-1]:
+            reasons.append(f"current {feature}={current} is outside the grid")
+        if distance > self.radius:
+            reasons.append(f"profile is {distance:.2f} from the nearest reference "
+                           f"(radius {self.radius:.2f})")
+
+        margin = base_margin + delta
+        return {
+            'feature': feature,
+            'value': float(value),
+            'current_value': current,
+            'margin': float(margin),
+            'prediction_proba': float(_sigmoid(margin)),
+            'distance_to_grid': distance,
+            'needs_exact_rescore': bool(reasons),
+            'reasons': reasons
+        }
+
+    def curve(self, user_vector, feature, base_margin):
+        # the whole what-if curve over the feature grid for one user
+        if not self.is_built:
+            raise ValueError("Partial dependence tables have not been built")
+        if feature not in self.grids:
+            raise ValueError(f"Unknown feature: {feature}")
+
+        grid = self.grids[feature]
+        j = self.feature_names.index(feature)
+        current = float(user_vector[j])
+
+        idx, distance = self._nearest_references(user_vector)
+        curves = self.ice_curves[feature][idx]
+        shifted = curves - _interp_rows(curves, grid, current)[:, None]
+        margins = base_margin + shifted.mean(axis=0)
+
+        return {
+            'feature': feature,
+            'grid': grid.tolist(),
+            'prediction_proba': _sigmoid(margins).tolist(),
+            'partial_dependence': _sigmoid(self.pd_curves[feature]).tolist(),
+            'distance_to_grid': distance,
+            'needs_exact_rescore': bool(
+                distance > self.radius or not grid[0] <= current <= grid[-1]
+            )
+        }
@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .data_generator import CreditDataGenerator, percentile_out_of_core
+    from .dataset_store import write_columnar, load_dataset
+except ImportError:
+    from data_generator import CreditDataGenerator, percentile_out_of_core
+    from dataset_store import write_columnar, load_dataset
+
+# sharded, parallel synthetic data generation
+#
+# every shard gets its own child of one SeedSequence, so a shard's rows only
+# depend on (seed, shard index, shard size), never on which worker ran it or how
+# many workers there were -> output is bit-identical for any worker count
+#
+# the target is the top 30% of a global risk score, so generation is two-pass:
+#   1. each shard writes its risk scores into its slice of one memmap spilled to
+#      out_dir, the parent takes the exact 70th percentile of it out of core
+#   2. each shard regenerates its rows from the same seed, labels them and writes them
+# regenerating is much cheaper than spilling unlabelled shards to disk and rewriting
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def shard_sizes(n_samples, shard_size):
+    full, rest = divmod(n_samples, shard_size)
+    return [shard_size] * full + ([rest] if rest else [])
+
+
+def shard_seeds(seed, n_shards):
+    return np.random.SeedSequence(seed).spawn(n_shards)
+
+
+def _generate_shard_frame(n_rows, seed_seq):
+    generator = CreditDataGenerator(n_samples=n_rows, rng=np.random.default_rng(seed_seq))
+    return generator.generate_features()
+
+
+def _shard_path(out_dir, index, fmt):
+    name = f"part-{index:05d}"
+    return os.path.join(out_dir, name + '.csv' if fmt == 'csv' else name + '.columnar')
+
+
+def _risk_pass(task):
+    spill_path, offset, n_rows, seed_seq = task
+    _, risk_score = _generate_shard_frame(n_rows, seed_seq)
+    risk_scores = np.load(spill_path, mmap_mode='r+')
+    risk_scores[offset:offset + n_rows] = risk_score
+    risk_scores.flush()
+    return n_rows
+
+
+def _write_pass(task):
+    index, n_rows, seed_seq, threshold, out_dir, fmt = task
+    df, risk_score = _generate_shard_frame(n_rows, seed_seq)
+    df['is_high_risk'] = (risk_score > threshold).astype(int)
+
+    path = _shard_path(out_dir, index, fmt)
+    if fmt == 'csv':
+        df.to_csv(path, index=False)
+    else:
+        write_columnar(df, path)
+    return path
+
+
+def _run(fn, tasks, n_workers):
+    # results always come back in task order, whatever the worker count
+    if n_workers == 1:
+        return [fn(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        return list(pool.map(fn, tasks))
+
+
+def generate_sharded(n_samples, out_dir, shard_size=250000, seed=42, n_workers=None, fmt='csv'):
+    # generating n_samples rows as shards written straight into out_dir
+    # returns the manifest dict (also written to out_dir/manifest.json)
+    if fmt not in ('csv', 'columnar'):
+        raise ValueError(f"Unknown format: {fmt}")
+
+    n_workers = n_workers or os.cpu_count() or 1
+    sizes = shard_sizes(n_samples, shard_size)
+    seeds = shard_seeds(seed, len(sizes))
+    os.makedirs(out_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    print(f"Pass 1/2: risk scores for {len(sizes)} shards on {n_workers} workers...")
+    # no process holds more than one shard of risk scores
+    handle, spill_path = tempfile.mkstemp(suffix='.npy', dir=out_dir)
+    os.close(handle)
+    try:
+        np.lib.format.open_memmap(spill_path, mode='w+', dtype=np.float64, shape=(n_samples,)).flush()
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(int).tolist()
+        _run(_risk_pass, [(spill_path, *task) for task in zip(offsets, sizes, seeds)], n_workers)
+        threshold = percentile_out_of_core(np.load(spill_path, mmap_mode='r'), 70, shard_size)
+    finally:
+        os.remove(spill_path)
+
+    print(f"Pass 2/2: writing shards (risk threshold {threshold:.4f})...")
+    tasks = [
+        (i, n_rows, seed_seq, threshold, out_dir, fmt)
+        for i, (n_rows, seed_seq) in enumerate(zip(sizes, seeds))
+    ]
+    paths = _run(_write_pass, tasks, n_workers)
+
+    manifest = {
+        'n_samples': n_samples,
+        'shard_size': shard_size,
+        'seed': seed,
+        'format': fmt,
+        'risk_threshold': threshold,
+        'shards': [
+            {'file': os.path.basename(path), 'n_rows': n_rows}
+            for path, n_rows in zip(paths, sizes)
+        ]
+    }
+    with open(os.path.join(out_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    elapsed = time.perf_counter() - start
+    print(f"Generated {n_samples} rows in {len(sizes)} shards in {elapsed:.1f}s -> {out_dir}")
+    return manifest
+
+
+def iter_shards(out_dir):
+    # yields each shard as a DataFrame, in order
+    with open(os.path.join(out_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    for shard in manifest['shards']:
+        yield load_dataset(os.path.join(out_dir, shard['file']))
+
+
+def load_sharded(out_dir):
+    return pd.concat(iter_shards(out_dir), ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded synthetic credit data generation")
+    parser.add_argument('n_samples', type=int)
+    parser.add_argument('out_dir')
+    parser.add_argument('--shard-size', type=int, default=250000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--format', choices=['csv', 'columnar'], default='csv')
+    args = parser.parse_args()
+
+    generate_sharded(args.n_samples, args.out_dir, args.shard_size, args.seed,
+                     args.workers, args.format)
@@ -0,0 +1,129 @@
+import numpy as np
+
+# binary classification metrics accumulated chunk by chunk, no per-row arrays
+#
+# ranking metrics (roc-auc, average precision) only need, per distinct score,
+# how many positives and negatives got that score:
+#   - histogram mode: scores are binned into n_bins equal bins over [0, 1],
+#     memory is fixed, ties inside a bin make auc/ap approximate (error
+#     shrinks with n_bins)
+#   - exact mode: counts are kept per distinct score and merged per chunk.
+#     tree ensembles produce few distinct float32 scores, so this stays small
+#     and matches sklearn exactly
+
+
+class StreamingBinaryMetrics:
+
+    def __init__(self, threshold=0.5, n_bins=10000, exact=False):
+        self.threshold = threshold
+        self.n_bins = n_bins
+        self.exact = exact
+
+        self.confusion = np.zeros((2, 2), dtype=np.int64)
+        self.log_loss_sum = 0.0
+        self.brier_sum = 0.0
+        if exact:
+            self.scores = np.empty(0, dtype=np.float32)
+            self.positives = np.empty(0, dtype=np.int64)
+            self.negatives = np.empty(0, dtype=np.int64)
+        else:
+            self.positives = np.zeros(n_bins, dtype=np.int64)
+            self.negatives = np.zeros(n_bins, dtype=np.int64)
+
+    @property
+    def n_samples(self):
+        return int(self.confusion.sum())
+
+    def update(self, y_true, proba):
+        y_true = np.asarray(y_true).astype(bool)
+        proba = np.asarray(proba, dtype=np.float32)
+        if len(y_true) != len(proba):
+            raise ValueError(f"Got {len(y_true)} labels but {len(proba)} scores")
+
+        # same rule as XGBClassifier.predict
+        y_pred = proba > self.threshold
+        self.confusion += np.bincount(
+            y_true.astype(np.int64) * 2 + y_pred, minlength=4
+        ).reshape(2, 2)
+
+        clipped = np.clip(proba.astype(np.float64), 1e-15, 1 - 1e-15)
+        self.log_loss_sum -= float(np.sum(np.where(y_true, np.log(clipped), np.log(1 - clipped))))
+        self.brier_sum += float(np.sum((proba - y_true) ** 2))
+
+        if self.exact:
+            scores, inverse = np.unique(proba, return_inverse=True)
+            positives = np.bincount(inverse, weights=y_true, minlength=len(scores)).astype(np.int64)
+            negatives = np.bincount(inverse, minlength=len(scores)) - positives
+            self._merge_exact(scores, positives, negatives)
+        else:
+            bins = np.minimum((proba * self.n_bins).astype(np.int64), self.n_bins - 1)
+            self.positives += np.bincount(bins[y_true], minlength=self.n_bins)
+            self.negatives += np.bincount(bins[~y_true], minlength=self.n_bins)
+        return self
+
+    def _merge_exact(self, scores, positives, negatives):
+        merged, inverse = np.unique(np.concatenate((self.scores, scores)), return_inverse=True)
+        self.positives = np.bincount(
+            inverse, weights=np.concatenate((self.positives, positives)), minlength=len(merged)
+        ).astype(np.int64)
+        self.negatives = np.bincount(
+            inverse, weights=np.concatenate((self.negatives, negatives)), minlength=len(merged)
+        ).astype(np.int64)
+        self.scores = merged
+
+    def merge(self, other):
+        if (self.exact, self.n_bins, self.threshold) != (other.exact, other.n_bins, other.threshold):
+            raise ValueError("Can only merge metrics with the same mode, bins and threshold")
+
+        self.confusion += other.confusion
+        self.log_loss_sum += other.log_loss_sum
+        self.brier_sum += other.brier_sum
+        if self.exact:
+            self._merge_exact(other.scores, other.positives, other.negatives)
+        else:
+            self.positives += other.positives
+            self.negatives += other.negatives
+        return self
+
+    def roc_auc(self):
+        # P(score_pos > score_neg) + 0.5 * P(tie), groups in ascending score order
+        total_pos, total_neg = self.positives.sum(), self.negatives.sum()
+        if total_pos == 0 or total_neg == 0:
+            return float('nan')
+        negatives_below = np.cumsum(self.negatives) - self.negatives
+        wins = np.sum(self.positives * (negatives_below + 0.5 * self.negatives))
+        return float(wins / (total_pos * total_neg))
+
+    def average_precision(self):
+        # sklearn's definition: sum over thresholds of (R_n - R_n-1) * P_n,
+        # thresholds in descending score order
+        total_pos = self.positives.sum()
+        if total_pos == 0:
+            return float('nan')
+        tp = np.cumsum(self.positives[::-1])
+        fp = np.cumsum(self.negatives[::-1])
+        seen = (tp + fp) > 0
+        precision = tp[seen] / (tp[seen] + fp[seen])
+        recall = tp[seen] / total_pos
+        return float(np.sum(np.diff(np.concatenate(([0.0], recall))) * precision))
+
+    def summary(self):
+        (tn, fp), (fn, tp) = self.confusion
+        n = self.n_samples
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        return {
+            'n_samples': n,
+            'positives': int(tp + fn),
+            'threshold': self.threshold,
+            'confusion_matrix': self.confusion.tolist(),
+            'accuracy': float((tp + tn) / n) if n else float('nan'),
+            'precision': float(precision),
+            'recall': float(recall),
+            'f1': float(2 * precision * recall / (precision + recall)) if precision + recall else 0.0,
+            'roc_auc': self.roc_auc(),
+            'avg_precision': self.average_precision(),
+            'log_loss': self.log_loss_sum / n if n else float('nan'),
+            'brier': self.brier_sum / n if n else float('nan'),
+            'auc_method': 'exact' if self.exact else f'histogram({self.n_bins} bins)'
+        }
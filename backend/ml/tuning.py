@@ -0,0 +1,315 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import xgboost as xgb
+
+try:
+    from .external_memory import native_params
+except ImportError:
+    from external_memory import native_params
+
+# hyperparameter search for CreditRiskModel
+#
+# every trial is a stratified k-fold xgb.cv with early stopping, so a trial also
+# finds its own n_estimators. trials run in a process pool, each worker gets the
+# training data once (pool initializer) and a bounded number of xgboost threads,
+# so n_workers * nthread never oversubscribes the cores
+#
+# every finished trial is appended to a jsonl log. a rerun with the same log and
+# seed samples the same configurations and skips the ones already in the log.
+# the first line of the log records what the trials were scored on (base params,
+# nfold, seed, early stopping and a fingerprint of the training data), a rerun
+# with anything else refuses the log instead of mixing incomparable scores
+
+# (kind, low, high) or ('choice', options)
+DEFAULT_SEARCH_SPACE = {
+    'max_depth': ('int', 3, 10),
+    'learning_rate': ('loguniform', 0.01, 0.3),
+    'min_child_weight': ('loguniform', 1, 20),
+    'subsample': ('uniform', 0.5, 1.0),
+    'colsample_bytree': ('uniform', 0.5, 1.0),
+    'gamma': ('uniform', 0, 5),
+    'reg_alpha': ('loguniform', 1e-3, 10),
+    'reg_lambda': ('loguniform', 1e-2, 10)
+}
+
+_worker_data = {}
+
+
+def sample_params(space, rng):
+    params = {}
+    for name, spec in space.items():
+        kind = spec[0]
+        if kind == 'int':
+            params[name] = int(rng.integers(spec[1], spec[2] + 1))
+        elif kind == 'uniform':
+            params[name] = float(rng.uniform(spec[1], spec[2]))
+        elif kind == 'loguniform':
+            params[name] = float(np.exp(rng.uniform(np.log(spec[1]), np.log(spec[2]))))
+        elif kind == 'choice':
+            params[name] = spec[1][int(rng.integers(len(spec[1])))]
+        else:
+            raise ValueError(f"Unknown search space kind for {name}: {kind}")
+    return params
+
+
+def trial_id(params):
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def _canonical(value):
+    # through json and back, so tuples and lists (or numpy scalars) compare equal
+    return json.loads(json.dumps(value, sort_keys=True, default=lambda v: v.item()))
+
+
+def data_fingerprint(X, y):
+    # shape, columns and a hash of the labels: cheap, and catches a different
+    # dataset, split or target being tuned against an old log
+    labels = np.ascontiguousarray(np.asarray(y))
+    return {
+        'shape': list(np.shape(X)),
+        'columns': [str(c) for c in getattr(X, 'columns', [])],
+        'labels_sha1': hashlib.sha1(labels.tobytes()).hexdigest()
+    }
+
+
+class TrialLog:
+    # append-only jsonl of finished trials, keyed by (trial id, boosting budget)
+    # the first line is a {'settings': ...} header the trials are only valid for
+
+    def __init__(self, path=None, settings=None):
+        self.path = path
+        self.settings = _canonical(settings)
+        self.records = {}
+        header = None
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # a run killed mid-write leaves a partial last line
+                        continue
+                    if 'settings' in record:
+                        header = record['settings']
+                        continue
+                    self.records[(record['trial_id'], record['num_boost_round'])] = record
+
+        if self.records and header != self.settings:
+            raise ValueError(
+                f"Trial log {path} was written for different search settings or data, "
+                f"use another log path to start over"
+            )
+        if path and header is None:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'settings': self.settings}, sort_keys=True) + '\n')
+
+    def get(self, key):
+        return self.records.get(key)
+
+    def append(self, record):
+        self.records[(record['trial_id'], record['num_boost_round'])] = record
+        if self.path:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+
+
+def _init_worker(X, y):
+    _worker_data['dtrain'] = xgb.DMatrix(X, label=y)
+
+
+def _run_trial(task):
+    params, num_boost_round, nfold, early_stopping_rounds, seed = task
+    start = time.perf_counter()
+    cv_results = xgb.cv(
+        params, _worker_data['dtrain'], num_boost_round=num_boost_round, nfold=nfold,
+        stratified=True, metrics='auc', early_stopping_rounds=early_stopping_rounds,
+        seed=seed, verbose_eval=False
+    )
+    # with early stopping, cv_results ends at the best iteration
+    return {
+        'cv_auc_mean': float(cv_results['test-auc-mean'].iloc[-1]),
+        'cv_auc_std': float(cv_results['test-auc-std'].iloc[-1]),
+        'best_iteration': len(cv_results),
+        'seconds': time.perf_counter() - start
+    }
+
+
+class HyperparameterSearch:
+    # random search, or successive halving over the boosting budget
+
+    def __init__(self, base_params, space=None, nfold=5, early_stopping_rounds=20,
+                 n_workers=None, nthread=None, log_path=None, seed=42):
+        cores = os.cpu_count() or 1
+        self.base_params = dict(base_params)
+        self.space = space or DEFAULT_SEARCH_SPACE
+        self.nfold = nfold
+        self.early_stopping_rounds = early_stopping_rounds
+        self.n_workers = n_workers or cores
+        self.nthread = nthread or max(1, cores // self.n_workers)
+        self.log_path = log_path
+        self.log = None
+        self.seed = seed
+        self.results = []
+
+    def settings(self, X, y):
+        # everything a trial's score depends on besides its params and budget
+        return {
+            'base_params': self.base_params,
+            'nfold': self.nfold,
+            'early_stopping_rounds': self.early_stopping_rounds,
+            'seed': self.seed,
+            'data': data_fingerprint(X, y)
+        }
+
+    def _open_log(self, X, y):
+        # opened on the first rung, when the data to fingerprint is known
+        settings = self.settings(X, y)
+        if self.log is None:
+            self.log = TrialLog(self.log_path, settings)
+        elif self.log.settings != _canonical(settings):
+            raise ValueError("A search can't be continued on different data")
+
+    def _candidates(self, n_trials):
+        rng = np.random.default_rng(self.seed)
+        return [sample_params(self.space, rng) for _ in range(n_trials)]
+
+    def _evaluate(self, X, y, candidates, num_boost_round, rung=0):
+        # runs the candidates not already in the log, returns records in candidate order
+        self._open_log(X, y)
+        records = [None] * len(candidates)
+        tasks, positions = [], []
+        for i, candidate in enumerate(candidates):
+            cached = self.log.get((trial_id(candidate), num_boost_round))
+            if cached is not None:
+                records[i] = cached
+                continue
+            params, _ = native_params(dict(self.base_params, **candidate), self.seed)
+            params.update(tree_method='hist', nthread=self.nthread, eval_metric='auc')
+            tasks.append((params, num_boost_round, self.nfold, self.early_stopping_rounds, self.seed))
+            positions.append(i)
+
+        skipped = len(candidates) - len(tasks)
+        print(f"Rung {rung}: {len(tasks)} trials at {num_boost_round} rounds"
+              + (f" ({skipped} resumed from log)" if skipped else ""))
+
+        if tasks:
+            if self.n_workers == 1:
+                _init_worker(X, y)
+                outcomes = map(_run_trial, tasks)
+                pool = None
+            else:
+                pool = ProcessPoolExecutor(
+                    max_workers=min(self.n_workers, len(tasks)), initializer=_init_worker, initargs=(X, y)
+                )
+                outcomes = pool.map(_run_trial, tasks)
+            try:
+                for i, outcome in zip(positions, outcomes):
+                    record = {
+                        'trial_id': trial_id(candidates[i]),
+                        'rung': rung,
+                        'num_boost_round': num_boost_round,
+                        'params': candidates[i],
+                        **outcome
+                    }
+                    self.log.append(record)
+                    records[i] = record
+                    print(f"  {record['trial_id']}: auc {record['cv_auc_mean']:.4f} "
+                          f"+/- {record['cv_auc_std']:.4f} ({record['best_iteration']} rounds)")
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+
+        self.results.extend(records)
+        return records
+
+    def random_search(self, X, y, n_trials=20, num_boost_round=500):
+        candidates = self._candidates(n_trials)
+        return self._evaluate(X, y, candidates, num_boost_round)
+
+    def successive_halving(self, X, y, n_trials=27, min_rounds=50, max_rounds=800, eta=3):
+        # every rung multiplies the boosting budget by eta and keeps the best 1/eta
+        candidates = self._candidates(n_trials)
+        n_rungs = max(1, int(math.floor(math.log(max_rounds / min_rounds, eta))) + 1)
+
+        records = []
+        for rung in range(n_rungs):
+            budget = min(max_rounds, int(min_rounds * eta ** rung))
+            records = self._evaluate(X, y, candidates, budget, rung)
+            if rung == n_rungs - 1 or len(candidates) <= 1:
+                break
+            keep = max(1, len(candidates) // eta)
+            order = np.argsort([-r['cv_auc_mean'] for r in records])[:keep]
+            candidates = [candidates[i] for i in order]
+        return records
+
+    def best(self):
+        # best trial from the largest budget reached (lower rungs are not comparable)
+        if not self.results:
+            raise ValueError("No trials have been run")
+        top_budget = max(r['num_boost_round'] for r in self.results)
+        final = [r for r in self.results if r['num_boost_round'] == top_budget]
+        return max(final, key=lambda r: r['cv_auc_mean'])
+
+    def best_params(self):
+        # ready-to-train CreditRiskModel params, n_estimators from early stopping
+        best = self.best()
+        return dict(self.base_params, **best['params'], n_estimators=best['best_iteration'])
+
+    def export_best(self, path):
+        best = self.best()
+        payload = {
+            'params': self.best_params(),
+            'cv_auc_mean': best['cv_auc_mean'],
+            'cv_auc_std': best['cv_auc_std'],
+            'nfold': self.nfold,
+            'trial_id': best['trial_id'],
+            'n_trials': len({r['trial_id'] for r in self.results})
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2)
+        print(f"Best params (cv auc {best['cv_auc_mean']:.4f}) written to {path}")
+        return payload
+
+
+def load_params(path):
+    # params file written by export_best -> dict for CreditRiskModel(params=...)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['params']
+
+
+if __name__ == "__main__":
+    try:
+        from .credit_risk_model import CreditRiskModel
+        from .dataset_store import load_dataset
+    except ImportError:
+        from credit_risk_model import CreditRiskModel
+        from dataset_store import load_dataset
+
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Hyperparameter search for CreditRiskModel")
+    parser.add_argument('--data', default=os.path.join(base_dir, "outputs", "credit_data_synthetic.csv"))
+    parser.add_argument('--method', choices=['random', 'halving'], default='halving')
+    parser.add_argument('--trials', type=int, default=27)
+    parser.add_argument('--nfold', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--nthread', type=int, default=None, help="xgboost threads per trial")
+    parser.add_argument('--log', default=os.path.join(base_dir, "outputs", "tuning_trials.jsonl"))
+    parser.add_argument('--output', default=os.path.join(base_dir, "outputs", "best_params.json"))
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    model = CreditRiskModel()
+    X_train, X_test, y_train, y_test = model.prepare_data(load_dataset(args.data))
+    model.tune(X_train, y_train, method=args.method, n_trials=args.trials, nfold=args.nfold,
+               n_workers=args.workers, nthread=args.nthread, log_path=args.log,
+               params_path=args.output, seed=args.seed)
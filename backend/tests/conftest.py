@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# tests import the backend packages the same way the scripts do (ml.x, data.x, api.x)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def credit_frame():
+    # small labelled dataset with the real schema, shared by the model tests
+    from ml.data_generator import CreditDataGenerator
+    chunks = CreditDataGenerator(n_samples=3000).iter_chunks(chunk_size=1000, seed=11)
+    return pd.concat(chunks, ignore_index=True)
+
+
+@pytest.fixture(scope='session')
+def credit_csv(credit_frame, tmp_path_factory):
+    path = tmp_path_factory.mktemp('credit') / 'credit.csv'
+    credit_frame.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def flask_app(tmp_path_factory):
+    # the analyst needs an OpenAI client, the upload and statement routes don't.
+    # the statement cache goes to a temporary directory, not outputs/
+    import llm.credit_analyst as credit_analyst
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(credit_analyst, 'CreditAnalyst', lambda: None)
+        patch.setenv('STATEMENT_CACHE_DIR', str(tmp_path_factory.mktemp('statement_cache')))
+        from api import flask_app as module
+    module.app.config['TESTING'] = True
+    yield module
+    module.bulk_ingestor.close()
+    module.statement_jobs.shutdown()
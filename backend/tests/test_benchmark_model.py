@@ -0,0 +1,60 @@
+import importlib
+import json
+import sys
+
+import numpy as np
+
+from ml import benchmark_model
+from ml.benchmark_model import (
+    BASELINE_PATH, QUICK_GRID, RssSampler, compare_to_baseline, config_key, iter_configs
+)
+
+
+def test_module_imports_without_resource(monkeypatch):
+    # resource is unix only, the benchmark must not need it
+    monkeypatch.setitem(sys.modules, 'resource', None)
+    importlib.reload(benchmark_model)
+
+
+def test_sampler_measures_growth_inside_the_block_only():
+    before = np.ones(20 * 1024 * 1024 // 8)
+    with RssSampler(interval=0.001) as rss:
+        inside = np.ones(64 * 1024 * 1024 // 8)
+        inside[::512] = 2.0
+        del inside
+
+    assert rss.baseline is not None
+    assert 50 < rss.growth < 200
+    assert rss.peak >= rss.baseline + rss.growth - 1e-9
+    del before
+
+
+def test_grid_expands_to_every_combination():
+    configs = list(iter_configs({'a': [1, 2], 'b': [3]}))
+    assert configs == [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}]
+    assert config_key({'b': 3, 'a': 1}) == 'a=1|b=3'
+
+
+def test_regressions_are_flagged_past_the_tolerance():
+    def result(seconds, latency_ms):
+        return {'key': 'k', 'train_seconds': seconds, 'train_peak_rss_mb': None, 'model_bytes': 100,
+                'latency': {'1': {'p50_ms': latency_ms}}}
+
+    baseline = {'results': [result(1.0, 1.0)]}
+    comparison = compare_to_baseline({'results': [result(1.5, 1.1)]}, baseline, tolerance=0.2)
+
+    assert comparison[0]['regressions'] == ['train_seconds']
+    assert 'train_peak_rss_mb' not in comparison[0]['ratios']
+
+
+def test_committed_baseline_is_a_quick_run():
+    # n_jobs in the quick grid is the cpu count of the machine, so it isn't compared
+    with open(BASELINE_PATH, encoding='utf-8') as f:
+        text = f.read()
+    # written the way --output writes it, regenerating gives no whitespace diff
+    assert text.endswith('}\n')
+    baseline = json.loads(text)
+    for result in baseline['results']:
+        config = {name: value for name, value in result['config'].items() if name != 'n_jobs'}
+        assert config in [{name: values[0] for name, values in QUICK_GRID.items() if name != 'n_jobs'}]
+        assert result['key'] == config_key(result['config'])
@@ -0,0 +1,101 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from api.bulk_ingest import BulkStatementIngestor, merge_transactions
+from api.pdf_parser import StatementParser
+from api.statement_corpus import write_statement
+
+
+@pytest.fixture(scope='module')
+def statements(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('statements')
+    parser = StatementParser(backend='pypdf2')
+    paths = []
+    for seed, pages in ((1, 3), (2, 1)):
+        path = str(directory / f'statement_{seed}.pdf')
+        write_statement(path, pages, 'MM/DD/YYYY', seed=seed, parser=parser)
+        paths.append(path)
+    return paths
+
+
+def test_pool_exists_from_start_up_and_never_forks():
+    ingestor = BulkStatementIngestor(max_workers=2, backend='pypdf2')
+    try:
+        assert ingestor._pool is not None
+        assert ingestor._pool._mp_context.get_start_method() in ('forkserver', 'spawn')
+    finally:
+        ingestor.close()
+    assert ingestor._pool is None
+    assert BulkStatementIngestor(max_workers=1, backend='pypdf2')._pool is None
+
+
+SERVER_SCRIPT = textwrap.dedent('''
+    import sys
+    sys.path.insert(0, {api_dir!r})
+    print('server module run', flush=True)
+    import bulk_ingest
+    if {spawn}:
+        bulk_ingest.multiprocessing.get_all_start_methods = lambda: ['spawn', 'fork']
+    if __name__ == '__main__':
+        ingestor = bulk_ingest.BulkStatementIngestor(max_workers=2)
+        print(sorted(ingestor._pool.map(abs, [-1, -2, -3, -4])))
+        ingestor.close()
+''')
+
+
+@pytest.mark.parametrize('spawn', [False, True])
+def test_workers_never_run_the_server_script(tmp_path, spawn):
+    # a server started as a script would otherwise be re-run in every worker
+    api_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api')
+    script = tmp_path / 'server.py'
+    script.write_text(SERVER_SCRIPT.format(api_dir=api_dir, spawn=spawn))
+
+    output = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=120)
+    assert output.returncode == 0, output.stderr
+    assert output.stdout.splitlines() == ['server module run', '[1, 2, 3, 4]']
+
+
+def test_parallel_ingestion_matches_serial(statements):
+    files = [('a.pdf', statements[0]), ('b.pdf', statements[1]), ('a again.pdf', statements[0])]
+    serial = BulkStatementIngestor(max_workers=1, min_pages_per_task=1, backend='pypdf2').ingest(files)
+
+    parallel_ingestor = BulkStatementIngestor(max_workers=2, min_pages_per_task=1, backend='pypdf2')
+    try:
+        parallel = parallel_ingestor.ingest(files)
+    finally:
+        parallel_ingestor.close()
+
+    assert parallel == serial
+    assert [s['pages'] for s in parallel['statements']] == [3, 1, 3]
+    # the re-uploaded statement only adds duplicates
+    assert parallel['duplicatesRemoved'] == parallel['statements'][0]['transactions']
+
+
+def test_a_broken_statement_is_reported_not_fatal(statements):
+    ingestor = BulkStatementIngestor(max_workers=1, backend='pypdf2')
+    result = ingestor.ingest([('good.pdf', statements[1]), ('bad.pdf', b'not a pdf')])
+
+    assert 'error' in result['statements'][1]
+    assert result['statements'][1]['transactions'] == 0
+    assert len(result['transactions']) == result['statements'][0]['transactions'] > 0
+
+
+def test_page_ranges_cover_the_document():
+    ingestor = BulkStatementIngestor(max_workers=3, min_pages_per_task=2, backend='pypdf2')
+    try:
+        assert ingestor.page_ranges(7) == [(0, 3), (3, 6), (6, 7)]
+        assert ingestor.page_ranges(3) == [(0, 2), (2, 3)]
+    finally:
+        ingestor.close()
+
+
+def test_merge_keeps_repeat_purchases_within_a_statement():
+    coffee = {'date': '01/02', 'merchant': 'CAFE', 'amount': 3.0}
+    lunch = {'date': '01/02', 'merchant': 'DELI', 'amount': 9.0}
+    merged, duplicates = merge_transactions([[coffee, coffee], [coffee, lunch]])
+    assert merged == [coffee, coffee, lunch]
+    assert duplicates == 1
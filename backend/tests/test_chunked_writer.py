@@ -0,0 +1,47 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.data_generator import CreditDataGenerator, percentile_out_of_core
+from ml.dataset_store import load_dataset
+
+
+@pytest.mark.parametrize('q', [0, 30, 70, 99.9, 100])
+def test_out_of_core_percentile_is_exact(q):
+    rng = np.random.default_rng(0)
+    for values in (rng.normal(size=10001), rng.integers(0, 5, size=999).astype(float), np.array([2.0])):
+        assert percentile_out_of_core(values, q, chunk_size=1000, n_bins=64) == np.percentile(values, q)
+
+
+def test_chunks_are_compact_and_labelled_on_the_global_threshold():
+    generator = CreditDataGenerator(n_samples=1000)
+    chunks = list(generator.iter_chunks(chunk_size=300, seed=1))
+    data = pd.concat(chunks, ignore_index=True)
+
+    assert [len(chunk) for chunk in chunks] == [300, 300, 300, 100]
+    assert data['late_30_days'].dtype == np.int8
+    assert data['credit_score'].dtype == np.int16
+    assert data['monthly_income'].dtype == np.float32
+    assert data['is_high_risk'].sum() == 300
+
+
+def test_write_stream_leaves_only_the_output(tmp_path):
+    generator = CreditDataGenerator(n_samples=500)
+    csv_path = generator.write_stream(str(tmp_path / 'data.csv'), chunk_size=200, seed=2)
+    store = generator.write_stream(str(tmp_path / 'data.columnar'), chunk_size=200, seed=2, fmt='columnar')
+
+    assert sorted(os.listdir(tmp_path)) == ['data.columnar', 'data.csv']
+    from_csv, from_store = pd.read_csv(csv_path), load_dataset(store)
+    assert (from_csv['is_high_risk'].to_numpy() == from_store['is_high_risk'].to_numpy()).all()
+    assert np.allclose(from_csv['monthly_income'], from_store['monthly_income'], rtol=1e-6)
+
+
+def test_zero_samples_write_an_empty_dataset(tmp_path):
+    generator = CreditDataGenerator(n_samples=0)
+    assert list(generator.iter_chunks()) == []
+
+    data = pd.read_csv(generator.write_stream(str(tmp_path / 'empty.csv')))
+    assert len(data) == 0
+    assert list(data.columns) == list(generator.compact_dtypes())
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from ml.benchmark_data_generator import compare_distributions, ks_2samp
+from ml.data_generator import CreditDataGenerator
+
+
+def test_features_have_the_documented_ranges():
+    df, risk_score = CreditDataGenerator(n_samples=2000, rng=0).generate_features()
+
+    assert len(df) == len(risk_score) == 2000
+    assert df['credit_utilization'].between(0, 150).all()
+    assert df['payment_history_pct'].between(0, 100).all()
+    assert df['credit_score'].between(300, 850).all()
+    # late payments are only drawn below the payment history cutoffs
+    assert (df.loc[df['payment_history_pct'] >= 90, 'late_30_days'] == 0).all()
+    assert (df.loc[df['payment_history_pct'] >= 70, 'late_90_days'] == 0).all()
+
+
+def test_seeded_generators_are_reproducible():
+    first, _ = CreditDataGenerator(n_samples=100, rng=7).generate_features()
+    second, _ = CreditDataGenerator(n_samples=100, rng=7).generate_features()
+    assert first.equals(second)
+
+
+def test_ks_2samp_matches_scipy_reference_values():
+    rng = np.random.default_rng(0)
+    # scipy.stats.ks_2samp gives statistic 0.023167, p 0.5347 for these samples
+    statistic, p_value = ks_2samp(rng.normal(size=2000), rng.normal(size=3000))
+    assert statistic == pytest.approx(0.023167, abs=1e-6)
+    assert p_value == pytest.approx(0.5347, abs=0.005)
+
+    assert ks_2samp(rng.normal(size=3000), rng.normal(0.2, size=3000))[1] < 1e-6
+    assert ks_2samp([1.0, 2.0, 3.0], [1.0, 2.0, 3.0]) == (0.0, 1.0)
+
+
+def test_vectorized_generator_matches_the_rowwise_reference():
+    report = compare_distributions(n_samples=2000, seed=0)
+    assert max(column['ks_statistic'] for column in report.values()) < 0.08
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.dataset_store import (
+    ColumnarWriter, convert_csv, dataset_columns, iter_chunks, load_dataset
+)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    rng = np.random.default_rng(4)
+    data = pd.DataFrame({
+        'income': rng.normal(50000, 10000, size=250),
+        'late_payments': rng.integers(0, 10, size=250),
+        'is_high_risk': rng.integers(0, 2, size=250)
+    })
+    path = tmp_path / 'credit.csv'
+    data.to_csv(path, index=False)
+    return str(path)
+
+
+def test_converted_store_is_downcast_and_preferred(csv_path):
+    convert_csv(csv_path)
+    data = load_dataset(csv_path)
+
+    assert data['income'].dtype == np.float32
+    assert data['late_payments'].dtype == np.int8
+    expected = pd.read_csv(csv_path)
+    assert np.allclose(data['income'], expected['income'], rtol=1e-6)
+    assert (data['is_high_risk'] == expected['is_high_risk']).all()
+
+
+def test_stale_store_falls_back_to_the_csv(csv_path):
+    convert_csv(csv_path)
+    pd.read_csv(csv_path).iloc[:10].to_csv(csv_path, index=False)
+    assert len(load_dataset(csv_path)) == 10
+
+
+def test_column_subset_and_unknown_columns(csv_path):
+    store = convert_csv(csv_path)
+    assert list(load_dataset(store, columns=['income']).columns) == ['income']
+    assert dataset_columns(store) == ['income', 'late_payments', 'is_high_risk']
+    with pytest.raises(ValueError, match="not in store"):
+        load_dataset(store, columns=['nope'])
+
+
+def test_iter_chunks_covers_every_row_in_order(csv_path):
+    convert_csv(csv_path)
+    chunks = list(iter_chunks(csv_path, chunk_size=100))
+    assert [len(c) for c in chunks] == [100, 100, 50]
+    assert np.allclose(pd.concat(chunks)['income'], pd.read_csv(csv_path)['income'], rtol=1e-6)
+
+
+def test_columnar_writer_checks_the_row_count(tmp_path):
+    writer = ColumnarWriter(str(tmp_path / 'store'), 3, {'a': np.int8})
+    writer.write(pd.DataFrame({'a': [1, 2]}))
+    with pytest.raises(ValueError, match="declared 3 rows"):
+        writer.close()
+    with pytest.raises(ValueError, match="past the declared"):
+        writer.write(pd.DataFrame({'a': [1, 2]}))
+    assert not os.path.exists(tmp_path / 'store' / 'manifest.json')
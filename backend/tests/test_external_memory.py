@@ -0,0 +1,30 @@
+import pytest
+from sklearn.metrics import roc_auc_score
+
+from ml.credit_risk_model import CreditRiskModel
+from ml.external_memory import iter_split
+
+
+def test_split_is_deterministic_and_complete(credit_csv):
+    train = list(iter_split(credit_csv, 'train', chunk_size=700))
+    validation = list(iter_split(credit_csv, 'validation', chunk_size=700))
+    again = list(iter_split(credit_csv, 'validation', chunk_size=700))
+
+    assert sum(map(len, train)) + sum(map(len, validation)) == 3000
+    assert all(a.equals(b) for a, b in zip(validation, again))
+    assert 0.1 < sum(map(len, validation)) / 3000 < 0.3
+
+
+@pytest.mark.parametrize('memory', ['quantile', 'external'])
+def test_out_of_core_training_learns_the_target(credit_csv, credit_frame, memory):
+    model = CreditRiskModel({'n_estimators': 30})
+    evals = model.train_external(credit_csv, chunk_size=700, memory=memory, verbose=False)
+
+    assert len(evals['validation']['auc']) == 30
+    X = credit_frame[model.feature_names]
+    assert roc_auc_score(credit_frame['is_high_risk'], model.model.predict_proba(X)[:, 1]) > 0.8
+
+
+def test_unknown_memory_mode_is_rejected(credit_csv):
+    with pytest.raises(ValueError, match="Unknown memory mode"):
+        CreditRiskModel().train_external(credit_csv, memory='gpu')
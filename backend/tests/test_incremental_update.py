@@ -0,0 +1,76 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.credit_risk_model import CreditRiskModel
+
+
+@pytest.fixture
+def fitted(credit_frame):
+    model = CreditRiskModel({'n_estimators': 20})
+    data = credit_frame.iloc[:1500]
+    X, y = data.drop(columns=['is_high_risk']), data['is_high_risk']
+    model.feature_names = X.columns.tolist()
+    model.train(X, y, verbose=False)
+    return model
+
+
+def split(frame):
+    return frame.drop(columns=['is_high_risk']), frame['is_high_risk']
+
+
+def test_continue_adds_trees_when_the_holdout_allows(fitted, credit_frame, tmp_path):
+    X_new, y_new = split(credit_frame.iloc[1500:2500])
+    X_holdout, y_holdout = split(credit_frame.iloc[2500:])
+
+    report = fitted.update(X_new, y_new, X_holdout, y_holdout, mode='continue', n_rounds=5,
+                           max_auc_drop=1.0, model_path=str(tmp_path / 'model.pkl'))
+
+    assert report['published']
+    assert report['n_trees'] == 25
+    assert fitted.model.get_booster().num_boosted_rounds() == 25
+    assert fitted.update_history[-1] is report
+    assert (tmp_path / 'model.pkl').exists()
+
+
+def tree_structure(model):
+    # splits and children of every node, without the leaf values and statistics
+    return model.model.get_booster().trees_to_dataframe()[['Tree', 'Node', 'Feature', 'Split', 'Yes', 'No']]
+
+
+def test_refresh_refits_leaves_and_keeps_the_trees(fitted, credit_frame):
+    X_new, y_new = split(credit_frame.iloc[1500:2500])
+    X_holdout, y_holdout = split(credit_frame.iloc[2500:])
+    structure = tree_structure(fitted)
+    before = fitted.model.predict_proba(X_holdout)[:, 1]
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        report = fitted.update(X_new, y_new, X_holdout, y_holdout, mode='refresh', max_auc_drop=1.0)
+
+    assert not [w for w in caught if 'tree_method' in str(w.message)]
+    assert report['published']
+    assert report['n_trees'] == 20
+    pd.testing.assert_frame_equal(tree_structure(fitted), structure)
+    assert not np.allclose(fitted.model.predict_proba(X_holdout)[:, 1], before)
+
+
+def test_a_worse_candidate_is_not_published(fitted, credit_frame):
+    # labels flipped: the candidate learns the opposite and loses holdout auc
+    X_new, y_new = split(credit_frame.iloc[1500:2500])
+    X_holdout, y_holdout = split(credit_frame.iloc[2500:])
+    before = fitted.model
+
+    report = fitted.update(X_new, 1 - y_new, X_holdout, y_holdout, mode='continue', n_rounds=50)
+
+    assert not report['published']
+    assert report['candidate_auc'] < report['previous_auc']
+    assert fitted.model is before
+
+
+def test_update_needs_a_trained_model(credit_frame):
+    X, y = split(credit_frame.iloc[:10])
+    with pytest.raises(ValueError, match="must be trained"):
+        CreditRiskModel().update(X, y, X, y)
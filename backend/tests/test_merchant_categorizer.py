@@ -0,0 +1,53 @@
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from api.merchant_categorizer import MerchantCategorizer
+from api.pdf_parser import StatementParser
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api')
+
+
+@pytest.fixture(scope='module')
+def parser():
+    return StatementParser(backend='pypdf2')
+
+
+def test_matches_the_keyword_loop_on_random_merchants(parser):
+    rng = random.Random(0)
+    keywords = [k for keywords in parser.categories.values() for k in keywords]
+    for _ in range(2000):
+        words = rng.sample(keywords, rng.randint(0, 3)) + [rng.choice(['ACME', 'XYZ', 'the', '*', ''])]
+        rng.shuffle(words)
+        merchant = ' '.join(words).upper() if rng.random() < 0.5 else ''.join(words)
+        assert parser.categorize_transaction(merchant) == parser._categorize_legacy(merchant), merchant
+
+
+def test_first_category_wins_on_overlapping_keywords():
+    categorizer = MerchantCategorizer({'A': ['shop'], 'B': ['face shop', 'hop'], 'C': ['he']})
+    assert categorizer.categorize('THE FACE SHOP') == 'A'
+    assert categorizer.categorize('hopper') == 'B'
+    assert categorizer.categorize('ahem') == 'C'
+    assert categorizer.categorize('nothing') == 'Other'
+
+
+def test_memo_is_bounded():
+    categorizer = MerchantCategorizer({'A': ['a']}, cache_size=2)
+    for merchant in ('a', 'b', 'c', 'a'):
+        categorizer.categorize(merchant)
+    info = categorizer.cache_info()
+    assert info.currsize == 2
+    assert info.misses == 4
+
+
+def test_parser_imports_with_the_api_dir_on_the_path():
+    # scripts run from backend/api import pdf_parser as a top level module
+    result = subprocess.run(
+        [sys.executable, '-c', 'import pdf_parser; print(pdf_parser.StatementParser("pypdf2").backend.name)'],
+        cwd=API_DIR, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'pypdf2'
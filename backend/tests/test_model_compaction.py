@@ -0,0 +1,62 @@
+import pytest
+import xgboost as xgb
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from ml.credit_risk_model import CreditRiskModel
+from ml.model_compaction import compact_model, drop_unreachable_nodes, model_size, prune, truncate
+
+
+@pytest.fixture(scope='module')
+def trained(credit_frame):
+    model = CreditRiskModel({'n_estimators': 60})
+    X, y = credit_frame.drop(columns=['is_high_risk']), credit_frame['is_high_risk']
+    model.feature_names = X.columns.tolist()
+    X_train, y_train = X.iloc[:2000], y.iloc[:2000]
+    model.train(X_train, y_train, verbose=False)
+    return model, X_train, y_train, X.iloc[2000:], y.iloc[2000:]
+
+
+def test_reported_auc_comes_from_the_evaluation_half(trained):
+    model, X_train, y_train, X_holdout, y_holdout = trained
+    compacted, report = compact_model(model, X_train, y_train, X_holdout, y_holdout, max_auc_loss=0.01,
+                                      methods=('truncate',), latency_batch_sizes=(1,), seed=3)
+
+    _, X_eval, _, y_eval = train_test_split(X_holdout, y_holdout, test_size=0.5, random_state=3,
+                                            stratify=y_holdout)
+    assert report['evaluation_samples'] == len(X_eval) == 500
+    assert report['selection_samples'] == 500
+
+    eval_auc = roc_auc_score(y_eval, compacted.model.predict_proba(X_eval)[:, 1])
+    assert report['compacted']['roc_auc'] == pytest.approx(eval_auc)
+    assert report['original']['roc_auc'] == pytest.approx(
+        roc_auc_score(y_eval, model.model.predict_proba(X_eval)[:, 1]))
+    assert report['compacted']['auc_loss'] == pytest.approx(
+        report['original']['roc_auc'] - report['compacted']['roc_auc'])
+    # truncation is decided on the selection half
+    assert report['compacted']['selection_roc_auc'] >= report['original']['selection_roc_auc'] - 0.01
+    assert report['compacted']['n_trees'] <= 60
+
+
+def test_truncate_gives_up_when_the_full_model_is_below_budget(trained):
+    model, _, _, X_holdout, y_holdout = trained
+    booster = model.model.get_booster()
+    assert truncate(booster, xgb.DMatrix(X_holdout), y_holdout, min_auc=1.01) is None
+
+
+def test_pruned_trees_shrink_on_disk(trained):
+    model, X_train, y_train, _, _ = trained
+    booster = model.model.get_booster()
+    pruned = prune(booster, xgb.DMatrix(X_train, label=y_train), gamma=20)
+
+    assert model_size(pruned)['n_nodes'] < model_size(booster)['n_nodes']
+    assert model_size(pruned)['model_bytes'] < model_size(booster)['model_bytes']
+    # rewriting an unpruned model changes nothing about its predictions
+    dholdout = xgb.DMatrix(X_train.iloc[:100])
+    assert (drop_unreachable_nodes(booster).predict(dholdout) == booster.predict(dholdout)).all()
+
+
+def test_compaction_needs_a_trained_model(trained):
+    _, X_train, y_train, X_holdout, y_holdout = trained
+    with pytest.raises(ValueError, match="must be trained"):
+        compact_model(CreditRiskModel(), X_train, y_train, X_holdout, y_holdout)
@@ -0,0 +1,96 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.online_stats import OnlineStatistics, PREDICTION_KEY
+from data.population_stats import PopulationIndex
+from data.prediction_manager import PredictionManager
+
+
+@pytest.fixture
+def reference():
+    rng = np.random.default_rng(5)
+    return pd.DataFrame({'income': rng.normal(50000, 10000, 2000), 'debt': rng.normal(10000, 3000, 2000)})
+
+
+def test_moments_match_numpy_for_single_and_batched_updates(reference):
+    stats = OnlineStatistics.from_population(PopulationIndex.from_frame(reference))
+    values = reference[['income', 'debt']].to_numpy()
+    for row in values[:50]:
+        stats.update(row, 0.5)
+    stats.update(values[50:], np.full(len(values) - 50, 0.25))
+
+    summary = stats.summary('income')
+    assert summary['count'] == len(values)
+    assert summary['mean'] == pytest.approx(values[:, 0].mean())
+    assert summary['std'] == pytest.approx(values[:, 0].std(ddof=1))
+    assert summary['median'] == pytest.approx(np.median(values[:, 0]), rel=0.02)
+
+
+def test_merge_equals_one_stream(reference):
+    index = PopulationIndex.from_frame(reference)
+    values = reference.to_numpy()
+    whole, left, right = (OnlineStatistics.from_population(index) for _ in range(3))
+    whole.update(values)
+    left.update(values[:700])
+    right.update(values[700:])
+    left.merge(right)
+
+    assert np.allclose(left.mean, whole.mean, equal_nan=True)
+    assert np.allclose(left.m2, whole.m2, equal_nan=True)
+    assert (left._hist == whole._hist).all()
+
+
+def test_psi_flags_a_shifted_population(reference):
+    index = PopulationIndex.from_frame(reference)
+    same, shifted = OnlineStatistics.from_population(index), OnlineStatistics.from_population(index)
+    same.update(reference.to_numpy())
+    shifted.update(reference.to_numpy() + [20000, 0])
+
+    assert not same.drift()['income']['drifted']
+    assert shifted.drift()['income']['drifted']
+    assert not shifted.drift()['debt']['drifted']
+
+
+def test_checkpoint_round_trip(reference, tmp_path):
+    stats = OnlineStatistics.from_population(PopulationIndex.from_frame(reference))
+    stats.update(reference.to_numpy()[:300], np.linspace(0, 1, 300))
+    stats.checkpoint(tmp_path / 'stats.npz')
+    loaded = OnlineStatistics.load(tmp_path / 'stats.npz')
+
+    assert loaded.features == stats.features
+    assert loaded.summary(PREDICTION_KEY) == stats.summary(PREDICTION_KEY)
+    assert loaded.drift(min_observations=1) == stats.drift(min_observations=1)
+
+
+class FeatureModel:
+    feature_names = ['income', 'debt']
+
+
+def test_concurrent_predictions_checkpoint_exactly_on_schedule(reference, tmp_path):
+    stats = OnlineStatistics.from_population(PopulationIndex.from_frame(reference))
+    checkpoints = []
+    checkpoint = stats.checkpoint
+    stats.checkpoint = lambda path: (checkpoints.append(path), checkpoint(path))
+
+    manager = PredictionManager()
+    manager.model = FeatureModel()
+    manager.attach_online_stats(stats, checkpoint_path=str(tmp_path / 'live.npz'), checkpoint_every=10)
+
+    user = reference.iloc[:1]
+
+    def predict_many():
+        for _ in range(100):
+            manager._record_prediction(user, 0.5)
+
+    threads = [threading.Thread(target=predict_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stats.n_observations == 800
+    assert len(checkpoints) == 80
+    assert manager._updates_since_checkpoint == 0
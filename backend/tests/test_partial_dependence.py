@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.partial_dependence import PartialDependenceTable
+
+
+class LinearModel:
+    # stands in for the fitted xgboost classifier: margin = X @ weights
+    def __init__(self, weights):
+        self.weights = np.asarray(weights, dtype=float)
+
+    def predict(self, X, output_margin=True):
+        return np.asarray(X, dtype=float) @ self.weights
+
+
+class Wrapper:
+    def __init__(self, weights):
+        self.model = LinearModel(weights)
+
+
+@pytest.fixture
+def table_and_data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 3)), columns=['a', 'b', 'c'])
+    model = Wrapper([0.5, -1.0, 2.0])
+    table = PartialDependenceTable(grid_points=11, ice_samples=50).build(model, X)
+    return table, model, X
+
+
+def test_estimate_matches_exact_rescore_for_additive_model(table_and_data):
+    table, model, X = table_and_data
+    user = X.iloc[0].values
+    base = float(model.model.predict(user[None, :])[0])
+
+    result = table.estimate(user, 'b', 0.3, base)
+
+    changed = user.copy()
+    changed[1] = 0.3
+    assert result['margin'] == pytest.approx(float(model.model.predict(changed[None, :])[0]))
+    assert not result['needs_exact_rescore']
+
+
+def test_value_outside_grid_asks_for_exact_rescore(table_and_data):
+    table, model, X = table_and_data
+    result = table.estimate(X.iloc[0].values, 'a', 100.0, 0.0)
+    assert result['needs_exact_rescore']
+    assert any('outside the grid' in reason for reason in result['reasons'])
+
+
+def test_curve_is_zero_shifted_at_current_value(table_and_data):
+    table, model, X = table_and_data
+    user = X.iloc[1].values
+    base = float(model.model.predict(user[None, :])[0])
+
+    curve = table.curve(user, 'c', base)
+
+    expected = 1 / (1 + np.exp(-(base + 2.0 * (np.array(curve['grid']) - user[2]))))
+    assert np.allclose(curve['prediction_proba'], expected)
+    assert len(curve['partial_dependence']) == len(curve['grid'])
+
+
+def test_lookups_require_a_built_table():
+    table = PartialDependenceTable()
+    with pytest.raises(ValueError, match="not been built"):
+        table.estimate([0.0], 'a', 1.0, 0.0)
+    with pytest.raises(ValueError, match="not been built"):
+        table.curve([0.0], 'a', 0.0)
+
+
+def test_unknown_feature_is_a_clear_error(table_and_data):
+    table, _, X = table_and_data
+    with pytest.raises(ValueError, match="Unknown feature: nope"):
+        table.estimate(X.iloc[0].values, 'nope', 1.0, 0.0)
+    with pytest.raises(ValueError, match="Unknown feature: nope"):
+        table.curve(X.iloc[0].values, 'nope', 0.0)
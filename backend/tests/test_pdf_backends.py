@@ -0,0 +1,82 @@
+import io
+import mmap
+import os
+import tempfile
+
+import pytest
+
+from api.pdf_backends import BACKENDS, PyMuPDFBackend, get_backend, pdf_buffer
+from api.pdf_parser import StatementParser
+from api.statement_cache import StatementCache
+from api.statement_corpus import benchmark_backends, benchmark_statement, generate_statement, render_pdf, write_statement
+
+
+@pytest.fixture(scope='module')
+def pdf():
+    return render_pdf(generate_statement(3, seed=2, parser=StatementParser(backend='pypdf2'))['pages'])
+
+
+def failing_pages(self, pdf_file, start=0, stop=None):
+    raise RuntimeError('cannot open document')
+    yield
+
+
+def test_pdf_buffer_maps_files_instead_of_reading_them(pdf, tmp_path):
+    path = tmp_path / 'statement.pdf'
+    path.write_bytes(pdf)
+    temporary = tempfile.TemporaryFile('rb+')
+    temporary.write(pdf)
+
+    with open(path, 'rb') as f, pdf_buffer(f) as buffer:
+        assert isinstance(buffer.obj, mmap.mmap) and buffer == pdf
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with pdf_buffer(mapped) as buffer:
+            assert buffer.obj is mapped
+    with pdf_buffer(io.BytesIO(pdf)) as buffer:
+        assert buffer == pdf
+    with temporary, pdf_buffer(temporary) as buffer:
+        assert isinstance(buffer.obj, mmap.mmap) and buffer == pdf
+
+
+def test_pymupdf_reads_every_kind_of_source(pdf, tmp_path):
+    pytest.importorskip('pymupdf')
+    backend = get_backend('pymupdf')
+    path = tmp_path / 'statement.pdf'
+    path.write_bytes(pdf)
+    expected = list(backend.iter_pages(io.BytesIO(pdf)))
+
+    with open(path, 'rb') as f:
+        assert backend.page_count(f) == 3
+        assert list(backend.iter_pages(f, 1, 3)) == expected[1:]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            assert list(backend.iter_pages(mapped)) == expected
+    assert 'SYNTHETIC BANK' in expected[0]
+
+
+def test_benchmark_marks_a_failing_backend_incorrect(tmp_path, monkeypatch):
+    path = str(tmp_path / 'statement.pdf')
+    write_statement(path, n_pages=2, seed=1, parser=StatementParser(backend='pypdf2'))
+    monkeypatch.setattr(BACKENDS['pdfminer'], 'available', lambda: True)
+    monkeypatch.setattr(type(BACKENDS['pdfminer']), 'iter_pages', failing_pages)
+
+    # no PyPDF2 fallback hides the failure
+    result = benchmark_statement(path, StatementParser(backend='pdfminer'))
+    assert result['error'] == 'cannot open document'
+    assert result['recall'] == 0.0
+
+    report = benchmark_backends(str(tmp_path), ['pypdf2', 'pdfminer'])
+    assert report['pypdf2']['correct']
+    assert not report['pdfminer']['correct']
+
+
+def test_fallback_results_are_not_cached(pdf, tmp_path, monkeypatch):
+    pytest.importorskip('pymupdf')
+    monkeypatch.setattr(PyMuPDFBackend, 'iter_pages', failing_pages)
+    cache = StatementCache(StatementParser(backend='pymupdf'), str(tmp_path))
+
+    first = cache.parse_statement_json(pdf)
+    assert first[1] == 'miss'
+    assert first[0] == cache.parse_statement_json(pdf)[0]
+    assert cache.stats['miss'] == 2
+    assert os.listdir(cache.cache_dir) == []
+    assert len(cache.parse_statement(pdf)['transactions']) > 0
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.population_snapshot import build_snapshot, load_snapshot
+from data.population_stats import PopulationIndex
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    rng = np.random.default_rng(3)
+    data = pd.DataFrame({
+        'income': rng.normal(50000, 10000, size=200),
+        'debt': rng.normal(10000, 3000, size=200),
+        'is_high_risk': rng.integers(0, 2, size=200)
+    })
+    path = tmp_path / 'credit.csv'
+    data.to_csv(path, index=False)
+    return str(path), data
+
+
+def test_snapshot_round_trips_the_index(dataset):
+    path, data = dataset
+    build_snapshot(path)
+    index, manifest = load_snapshot(path)
+
+    expected = PopulationIndex.from_frame(data)
+    assert index.features == expected.features
+    assert np.allclose(index.sorted_values['income'], expected.sorted_values['income'])
+    assert index.percentile('debt', 9000.0) == pytest.approx(expected.percentile('debt', 9000.0))
+    assert manifest['data_stats']['total_records'] == 200
+
+
+def test_snapshot_goes_stale_when_the_data_changes(dataset):
+    path, data = dataset
+    build_snapshot(path)
+    data.iloc[:100].to_csv(path, index=False)
+    assert load_snapshot(path) is None
+
+
+def test_same_content_with_a_new_mtime_is_still_fresh(dataset):
+    path, _ = dataset
+    build_snapshot(path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert load_snapshot(path) is not None
+
+
+def test_missing_snapshot_loads_nothing(dataset):
+    path, _ = dataset
+    assert load_snapshot(path) is None
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.population_stats import PopulationIndex
+
+
+@pytest.fixture
+def population():
+    rng = np.random.default_rng(1)
+    return pd.DataFrame({
+        'income': rng.normal(50000, 10000, size=500),
+        'age': rng.integers(18, 80, size=500),
+        'name': ['x'] * 500
+    })
+
+
+def test_percentile_matches_a_full_scan(population):
+    index = PopulationIndex.from_frame(population)
+    for value in (20000.0, 48000.0, 50000.0, 90000.0):
+        expected = (population['income'] < value).mean() * 100
+        assert index.percentile('income', value) == pytest.approx(expected)
+
+
+def test_non_numeric_columns_are_not_indexed(population):
+    index = PopulationIndex.from_frame(population)
+    assert 'income' in index and 'age' in index
+    assert 'name' not in index
+
+
+def test_compare_many_matches_compare(population):
+    index = PopulationIndex.from_frame(population)
+    users = [{'income': 40000.0, 'age': 30}, {'income': 65000.0, 'age': 70, 'unknown': 1}]
+    assert index.compare_many(users) == [index.compare(user) for user in [
+        {'income': 40000.0, 'age': 30}, {'income': 65000.0, 'age': 70}
+    ]]
+
+
+def test_missing_values_are_skipped_in_the_statistics():
+    index = PopulationIndex.from_frame(pd.DataFrame({'a': [1.0, np.nan, 3.0]}))
+    assert index.means['a'] == pytest.approx(2.0)
+    assert len(index.sorted_values['a']) == 2
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from ml.data_generator import CreditDataGenerator
+from ml.sharded_generation import _generate_shard_frame, generate_sharded, load_sharded, shard_seeds, shard_sizes
+
+
+def test_shard_sizes_cover_every_row():
+    assert shard_sizes(10, 4) == [4, 4, 2]
+    assert shard_sizes(8, 4) == [4, 4]
+
+
+def test_output_does_not_depend_on_the_worker_count(tmp_path):
+    one = generate_sharded(900, str(tmp_path / 'one'), shard_size=300, seed=3, n_workers=1)
+    two = generate_sharded(900, str(tmp_path / 'two'), shard_size=300, seed=3, n_workers=2)
+
+    assert one['risk_threshold'] == two['risk_threshold']
+    pd.testing.assert_frame_equal(load_sharded(str(tmp_path / 'one')), load_sharded(str(tmp_path / 'two')))
+
+
+def test_target_is_the_global_top_30_percent(tmp_path):
+    out_dir = str(tmp_path / 'columnar')
+    manifest = generate_sharded(1000, out_dir, shard_size=300, seed=5, n_workers=1, fmt='columnar')
+    data = load_sharded(out_dir)
+
+    assert len(data) == 1000
+    assert [shard['n_rows'] for shard in manifest['shards']] == [300, 300, 300, 100]
+    assert data['is_high_risk'].mean() == np.float64(0.3)
+
+
+def test_chunked_stream_uses_the_same_seeding_as_the_shards(tmp_path):
+    manifest = generate_sharded(700, str(tmp_path / 'shards'), shard_size=200, seed=9, n_workers=1)
+    chunks = list(CreditDataGenerator(n_samples=700).iter_chunks(chunk_size=200, seed=9))
+    sharded = load_sharded(str(tmp_path / 'shards'))
+
+    streamed = pd.concat(chunks, ignore_index=True)
+    assert (streamed['is_high_risk'].to_numpy() == sharded['is_high_risk'].to_numpy()).all()
+    assert np.allclose(streamed['credit_score'], sharded['credit_score'])
+    assert manifest['n_samples'] == len(streamed)
+
+
+def test_threshold_is_exact_and_the_spill_is_removed(tmp_path):
+    out_dir = str(tmp_path / 'shards')
+    manifest = generate_sharded(1000, out_dir, shard_size=300, seed=5, n_workers=2)
+
+    risk_scores = np.concatenate([
+        _generate_shard_frame(n_rows, seed_seq)[1]
+        for n_rows, seed_seq in zip(shard_sizes(1000, 300), shard_seeds(5, 4))
+    ])
+    assert manifest['risk_threshold'] == float(np.percentile(risk_scores, 70))
+    assert not [name for name in os.listdir(out_dir) if name.endswith('.npy')]
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.similarity_index import SimilarityIndex
+
+
+@pytest.fixture
+def population():
+    rng = np.random.default_rng(2)
+    data = pd.DataFrame(rng.normal(size=(400, 20)), columns=[f'f{i}' for i in range(20)])
+    data['is_high_risk'] = rng.integers(0, 2, size=400)
+    return data
+
+
+def brute_force(index, user, features, n):
+    columns = [index.features.index(f) for f in features]
+    query = (np.array([user[f] for f in features]) - index.mean[columns]) / index.scale[columns]
+    distances = np.linalg.norm(index.scaled[:, columns] - query, axis=1)
+    return np.argsort(distances)[:n]
+
+
+def test_exact_query_matches_brute_force(population):
+    index = SimilarityIndex(population)
+    user = population.iloc[7].drop('is_high_risk').to_dict()
+    indices, distances = index.query(user, n=5, features=['f0', 'f1', 'f2'])
+    assert list(indices[0]) == list(brute_force(index, user, ['f0', 'f1', 'f2'], 5))
+    assert distances[0][0] == pytest.approx(0.0)
+
+
+def test_target_column_is_not_a_distance_feature(population):
+    assert 'is_high_risk' not in SimilarityIndex(population).features
+
+
+def test_approximate_mode_reranks_exactly(population):
+    index = SimilarityIndex(population, approximate_dims=4, candidate_factor=50)
+    user = population.iloc[3].drop('is_high_risk').to_dict()
+    indices, distances = index.query(user, n=3)
+    assert indices[0][0] == 3
+    assert np.all(np.diff(distances[0]) >= 0)
+
+
+def test_unknown_features_are_rejected(population):
+    with pytest.raises(ValueError, match="not in similarity index"):
+        SimilarityIndex(population).query({'f0': 0.0}, features=['nope'])
+
+
+def test_tree_cache_is_bounded(population):
+    index = SimilarityIndex(population, max_cached_trees=2)
+    user = population.iloc[0].to_dict()
+    for features in (['f0'], ['f1'], ['f2']):
+        index.query(user, n=1, features=features)
+    assert list(index._trees) == [('f1',), ('f2',)]
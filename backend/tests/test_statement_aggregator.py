@@ -0,0 +1,57 @@
+from api.statement_aggregator import StatementAggregator, parse_date
+
+
+def transactions(*entries):
+    return [{'date': date, 'amount': amount, 'category': category} for date, amount, category in entries]
+
+
+def test_parse_date_formats():
+    assert parse_date('12/31') == (0, 12, 31)
+    assert parse_date('1-5-2024') == (2024, 1, 5)
+    assert parse_date('13/01') is None
+    assert parse_date('Total') is None
+
+
+def test_mm_dd_dates_take_the_year_of_the_dated_transactions():
+    statement = transactions(('12/28', 10, 'a'), ('12/31', 20, 'a'), ('01/03', 30, 'b'), ('1-5-2024', 40, 'b'))
+    metrics = StatementAggregator().add(statement).metrics()
+
+    assert [day['date'] for day in metrics['dailySpending']] == ['12/28', '12/31', '01/03', '1-5-2024']
+    assert [week['amount'] for week in metrics['weeklySpending']] == [60.0, 40.0]
+    assert metrics['daysInPeriod'] == 4
+
+
+def test_anchor_from_a_later_batch_reorders_earlier_days():
+    statement = transactions(('01/03', 30, 'a'), ('12/28', 10, 'a'), ('1/2/2024', 5, 'a'))
+    aggregator = StatementAggregator()
+    for transaction in statement:
+        aggregator.add([transaction])
+
+    assert [day['date'] for day in aggregator.metrics()['dailySpending']] == ['12/28', '1/2/2024', '01/03']
+
+
+def test_days_far_from_the_statement_are_dropped_from_the_timeline():
+    statement = transactions(('3/1/2024', 10, 'a'), ('3/2/2024', 10, 'a'), ('3/3/2024', 10, 'a'), ('3/4/1994', 50, 'a'))
+    metrics = StatementAggregator().add(statement).metrics()
+
+    assert metrics['totalSpent'] == 80.0
+    assert metrics['daysInPeriod'] == 3
+    assert len(metrics['weeklySpending']) == 1
+
+
+def test_spending_rate_and_stability_use_the_same_daily_average():
+    statement = transactions(('3/1/2024', 10, 'a'), ('3/2/2024', 10, 'a'), ('no date', 100, 'a'))
+    metrics = StatementAggregator().add(statement).metrics()
+
+    assert metrics['totalSpent'] == 120.0
+    assert metrics['spendingRate'] == 10.0
+    assert metrics['cashStability'] == 100
+
+
+def test_batches_merge_to_the_single_pass_result():
+    statement = transactions(*[(f'{month}/{day}', month * day, str(month)) for month in (11, 12, 1) for day in (1, 15, 28)])
+    aggregator = StatementAggregator()
+    for start in range(0, len(statement), 4):
+        aggregator.add(statement[start:start + 4])
+
+    assert aggregator.metrics() == StatementAggregator().add(statement).metrics()
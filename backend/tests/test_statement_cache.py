@@ -0,0 +1,90 @@
+import json
+import os
+import time
+from io import BytesIO
+
+import pytest
+
+from api.pdf_parser import StatementParser
+from api.statement_cache import StatementCache, parser_fingerprint, remove_stale_fingerprints
+from api.statement_corpus import generate_statement, render_pdf
+
+
+@pytest.fixture(scope='module')
+def parser():
+    return StatementParser(backend='pypdf2')
+
+
+@pytest.fixture(scope='module')
+def pdfs(parser):
+    return [render_pdf(generate_statement(1, seed=seed, parser=parser)['pages']) for seed in range(4)]
+
+
+def test_tiers_return_the_parse_result(parser, pdfs, tmp_path):
+    cache = StatementCache(parser, str(tmp_path))
+    text, tier = cache.parse_statement_json(pdfs[0])
+    assert tier == 'miss'
+    assert json.loads(text) == parser.parse_statement(BytesIO(pdfs[0]))
+
+    assert cache.parse_statement_json(BytesIO(pdfs[0])) == (text, 'memory')
+    assert StatementCache(parser, str(tmp_path)).parse_statement_json(pdfs[0]) == (text, 'disk')
+    assert cache.stats == {'memory': 1, 'disk': 0, 'miss': 1}
+
+
+def test_fingerprint_follows_the_keywords(parser):
+    changed = StatementParser(backend='pypdf2')
+    changed.categories = dict(changed.categories, Pets=['vet'])
+    assert parser_fingerprint(changed) != parser_fingerprint(parser)
+
+
+def test_other_fingerprints_survive_until_stale(parser, tmp_path):
+    previous = tmp_path / 'previous-version'
+    previous.mkdir()
+    (previous / 'entry.json').write_text('{}')
+
+    StatementCache(parser, str(tmp_path), stale_after_seconds=3600)
+    assert previous.exists()
+
+    old = time.time() - 7200
+    os.utime(previous, (old, old))
+    StatementCache(parser, str(tmp_path), stale_after_seconds=3600)
+    assert not previous.exists()
+
+
+def test_remove_stale_keeps_the_current_fingerprint(tmp_path):
+    (tmp_path / 'current').mkdir()
+    old = time.time() - 100
+    os.utime(tmp_path / 'current', (old, old))
+    assert remove_stale_fingerprints(str(tmp_path), 10, keep='current') == []
+
+
+def test_disk_tier_evicts_least_recently_used(parser, pdfs, tmp_path):
+    cache = StatementCache(parser, str(tmp_path), max_entries=1, max_disk_entries=2)
+    keys = [cache.key(pdf) for pdf in pdfs]
+
+    cache.parse_statement_json(pdfs[0])
+    cache.parse_statement_json(pdfs[1])
+    # a disk hit on the first entry makes the second the oldest
+    past = time.time() - 60
+    for key in keys[:2]:
+        os.utime(cache._path(key), (past, past))
+    cache._memory.clear()
+    assert cache.parse_statement_json(pdfs[0])[1] == 'disk'
+    cache.parse_statement_json(pdfs[2])
+
+    assert sorted(os.listdir(cache.cache_dir)) == sorted(f"{key}.json" for key in (keys[0], keys[2]))
+
+
+def test_disk_tier_respects_a_byte_bound(parser, pdfs, tmp_path):
+    cache = StatementCache(parser, str(tmp_path), max_disk_bytes=1)
+    cache.parse_statement_json(pdfs[0])
+    assert os.listdir(cache.cache_dir) == []
+    # still served from memory
+    assert cache.parse_statement_json(pdfs[0])[1] == 'memory'
+
+
+def test_memory_only_cache(parser, pdfs):
+    cache = StatementCache(parser, cache_dir=None, max_entries=1)
+    cache.parse_statement_json(pdfs[0])
+    cache.parse_statement_json(pdfs[1])
+    assert cache.parse_statement_json(pdfs[0])[1] == 'miss'
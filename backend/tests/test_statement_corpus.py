@@ -0,0 +1,49 @@
+import json
+
+import PyPDF2
+import pytest
+
+from api.pdf_parser import StatementParser
+from api.statement_corpus import (
+    DATE_FORMATS, benchmark_statement, generate_statement, ground_truth_path, score_transactions,
+    write_statement
+)
+
+
+@pytest.fixture(scope='module')
+def parser():
+    return StatementParser(backend='pypdf2')
+
+
+@pytest.mark.parametrize('date_format', DATE_FORMATS)
+def test_statements_parse_back_to_their_ground_truth(tmp_path, parser, date_format):
+    path = str(tmp_path / 'statement.pdf')
+    truth = write_statement(path, n_pages=3, date_format=date_format, seed=4, parser=parser)
+    result = benchmark_statement(path, parser)
+
+    assert len(PyPDF2.PdfReader(path).pages) == 3
+    assert result['recall'] == result['precision'] == 1.0
+    assert result['category_accuracy'] == 1.0
+    assert result['expected'] == truth['n_transactions']
+    with open(ground_truth_path(path), encoding='utf-8') as f:
+        assert json.load(f)['pdf'] == 'statement.pdf'
+
+
+def test_generation_is_seeded(parser):
+    first = generate_statement(2, seed=8, parser=parser)
+    assert first == generate_statement(2, seed=8, parser=parser)
+    assert first != generate_statement(2, seed=9, parser=parser)
+
+
+def test_unknown_date_format_is_rejected(parser):
+    with pytest.raises(ValueError, match="Unknown date format"):
+        generate_statement(1, date_format='YYYY-MM-DD', parser=parser)
+
+
+def test_score_is_a_multiset_match():
+    expected = [{'date': '01/02', 'merchant': 'A', 'amount': 1.0, 'category': 'x'}] * 2
+    predicted = expected[:1] + [{'date': '01/03', 'merchant': 'B', 'amount': 2.0, 'category': 'y'}]
+
+    score = score_transactions(predicted, expected)
+    assert score['matched'] == 1
+    assert score['precision'] == score['recall'] == 0.5
@@ -0,0 +1,148 @@
+import io
+import os
+import threading
+import time
+
+import pytest
+
+from api.pdf_parser import StatementParser
+from api.statement_corpus import generate_statement, render_pdf
+from api.statement_jobs import JobQueueFull, StatementJobQueue
+
+
+class BlockingParser(StatementParser):
+    # holds every job in page_count until released
+    def __init__(self):
+        super().__init__(backend='pypdf2')
+        self.release = threading.Event()
+
+    def page_count(self, pdf_file):
+        self.release.wait(10)
+        return super().page_count(pdf_file)
+
+
+@pytest.fixture(scope='module')
+def pdf():
+    return render_pdf(generate_statement(2, seed=3, parser=StatementParser(backend='pypdf2'))['pages'])
+
+
+def wait_finished(queue, job_id, timeout=10):
+    deadline = time.time() + timeout
+    job = queue.get(job_id)
+    while job['status'] not in ('done', 'failed') and time.time() < deadline:
+        job = queue.wait(job_id, job['version'], timeout=1)
+    return job
+
+
+def test_job_runs_to_done_with_the_parse_result(pdf):
+    parser = StatementParser(backend='pypdf2')
+    queue = StatementJobQueue(parser, max_workers=1)
+    try:
+        job = wait_finished(queue, queue.submit(pdf, 'statement.pdf'))
+    finally:
+        queue.shutdown()
+
+    assert job['status'] == 'done'
+    assert job['pages_done'] == job['total_pages'] == 2
+    assert job['result'] == parser.parse_statement(io.BytesIO(pdf))
+    assert job['finished'] is not None and job['error'] is None
+
+
+def test_unreadable_pdf_fails_the_job():
+    queue = StatementJobQueue(StatementParser(backend='pypdf2'), max_workers=1)
+    try:
+        job = wait_finished(queue, queue.submit(b'not a pdf'))
+    finally:
+        queue.shutdown()
+
+    assert job['status'] == 'failed'
+    assert job['error']
+    assert job['result'] is None
+
+
+def test_wait_returns_each_new_version(pdf):
+    parser = BlockingParser()
+    queue = StatementJobQueue(parser, max_workers=1)
+    try:
+        job_id = queue.submit(pdf)
+        # nothing changes while the parser is held, wait times out on the same version
+        assert queue.wait(job_id, 0, timeout=0.2)['version'] == 0
+
+        parser.release.set()
+        versions = [0]
+        job = queue.get(job_id)
+        while job['status'] != 'done':
+            job = queue.wait(job_id, versions[-1], timeout=5)
+            assert job['version'] > versions[-1]
+            versions.append(job['version'])
+    finally:
+        parser.release.set()
+        queue.shutdown()
+
+    # running, one update per page, done
+    assert job['version'] == 4
+
+
+def test_full_queue_refuses_jobs(pdf):
+    parser = BlockingParser()
+    queue = StatementJobQueue(parser, max_workers=1, max_queued=1)
+    try:
+        job_ids = [queue.submit(pdf), queue.submit(pdf)]
+        with pytest.raises(JobQueueFull):
+            queue.submit(pdf)
+        assert queue.stats()['queued'] + queue.stats()['running'] == 2
+
+        parser.release.set()
+        assert [wait_finished(queue, job_id)['status'] for job_id in job_ids] == ['done', 'done']
+        # finished jobs free their slots
+        wait_finished(queue, queue.submit(pdf))
+    finally:
+        parser.release.set()
+        queue.shutdown()
+
+
+def test_finished_jobs_expire_after_the_ttl(pdf):
+    queue = StatementJobQueue(StatementParser(backend='pypdf2'), max_workers=1, ttl_seconds=0.2)
+    try:
+        job_id = queue.submit(pdf)
+        assert wait_finished(queue, job_id)['status'] == 'done'
+        assert queue.get(job_id) is not None
+        time.sleep(0.3)
+        assert queue.get(job_id) is None
+    finally:
+        queue.shutdown()
+
+
+def test_job_removes_the_file_it_owns(pdf, tmp_path):
+    path = tmp_path / 'upload.pdf'
+    path.write_bytes(pdf)
+    queue = StatementJobQueue(StatementParser(backend='pypdf2'), max_workers=1)
+    try:
+        assert wait_finished(queue, queue.submit(str(path)))['status'] == 'done'
+    finally:
+        queue.shutdown()
+    assert not path.exists()
+
+
+def test_full_queue_answers_429(flask_app, pdf, monkeypatch, tmp_path):
+    parser = BlockingParser()
+    queue = StatementJobQueue(parser, max_workers=1, max_queued=0)
+    monkeypatch.setattr(flask_app, 'statement_jobs', queue)
+    monkeypatch.setattr('tempfile.tempdir', str(tmp_path))
+    client = flask_app.app.test_client()
+    try:
+        upload = lambda: {'file': (io.BytesIO(pdf), 'statement.pdf')}
+        accepted = client.post('/api/parse-statement/jobs', data=upload())
+        refused = client.post('/api/parse-statement/jobs', data=upload())
+        assert accepted.status_code == 202
+        assert refused.status_code == 429
+        assert refused.headers['Retry-After'] == '5'
+
+        parser.release.set()
+        job = wait_finished(queue, accepted.get_json()['job_id'])
+        assert client.get(f"/api/parse-statement/jobs/{job['job_id']}").get_json()['status'] == 'done'
+    finally:
+        parser.release.set()
+        queue.shutdown()
+    # neither the refused upload nor the finished job leaves its spooled copy behind
+    assert os.listdir(tmp_path) == []
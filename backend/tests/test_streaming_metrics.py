@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import average_precision_score, log_loss, roc_auc_score
+
+from ml.credit_risk_model import CreditRiskModel
+from ml.streaming_metrics import StreamingBinaryMetrics
+
+
+@pytest.fixture
+def scored():
+    rng = np.random.default_rng(6)
+    y = rng.integers(0, 2, 5000)
+    # rounded scores, so there are ties like a tree ensemble produces
+    proba = np.round(np.clip(0.35 * y + rng.uniform(0, 0.65, 5000), 0, 1), 3).astype(np.float32)
+    return y, proba
+
+
+def test_exact_mode_matches_sklearn_in_any_chunking(scored):
+    y, proba = scored
+    metrics = StreamingBinaryMetrics(exact=True)
+    for start in range(0, len(y), 777):
+        metrics.update(y[start:start + 777], proba[start:start + 777])
+    summary = metrics.summary()
+
+    assert summary['roc_auc'] == pytest.approx(roc_auc_score(y, proba))
+    assert summary['avg_precision'] == pytest.approx(average_precision_score(y, proba))
+    assert summary['log_loss'] == pytest.approx(log_loss(y, proba.astype(np.float64)), rel=1e-6)
+    assert summary['confusion_matrix'] == pd.crosstab(y, proba > 0.5).to_numpy().tolist()
+
+
+def test_histogram_mode_is_close(scored):
+    y, proba = scored
+    summary = StreamingBinaryMetrics(n_bins=1000).update(y, proba).summary()
+    assert summary['roc_auc'] == pytest.approx(roc_auc_score(y, proba), abs=1e-3)
+
+
+def test_merge_equals_one_pass(scored):
+    y, proba = scored
+    whole = StreamingBinaryMetrics(exact=True).update(y, proba)
+    merged = StreamingBinaryMetrics(exact=True).update(y[:2000], proba[:2000]).merge(
+        StreamingBinaryMetrics(exact=True).update(y[2000:], proba[2000:]))
+    assert merged.summary() == whole.summary()
+
+    with pytest.raises(ValueError, match="same mode"):
+        whole.merge(StreamingBinaryMetrics())
+
+
+def test_single_class_auc_is_nan():
+    assert np.isnan(StreamingBinaryMetrics().update([1, 1], [0.2, 0.9]).roc_auc())
+
+
+def test_evaluate_streaming_agrees_with_evaluate(credit_frame):
+    model = CreditRiskModel({'n_estimators': 20})
+    X, y = credit_frame.drop(columns=['is_high_risk']), credit_frame['is_high_risk']
+    model.feature_names = X.columns.tolist()
+    model.train(X.iloc[:2000], y.iloc[:2000], verbose=False)
+
+    summary = model.evaluate_streaming(credit_frame.iloc[2000:], chunk_size=300, exact=True)
+    proba = model.model.predict_proba(X.iloc[2000:])[:, 1]
+    assert summary['n_samples'] == 1000
+    assert summary['roc_auc'] == pytest.approx(roc_auc_score(y.iloc[2000:], proba))
@@ -0,0 +1,40 @@
+from io import BytesIO
+
+import pytest
+
+from api.pdf_parser import StatementParser
+from api.statement_corpus import generate_statement, render_pdf
+
+
+@pytest.fixture(scope='module')
+def parser():
+    return StatementParser(backend='pypdf2')
+
+
+@pytest.fixture(scope='module')
+def statement(parser):
+    return generate_statement(4, 'MM/DD/YYYY', seed=21, parser=parser)
+
+
+def test_one_update_per_page_with_running_metrics(parser, statement):
+    updates = list(parser.parse_statement_stream(BytesIO(render_pdf(statement['pages']))))
+
+    assert [update['page'] for update in updates] == [1, 2, 3, 4]
+    assert sum(len(update['transactions']) for update in updates) == statement['truth']['n_transactions']
+    spent = [update['totalSpent'] for update in updates]
+    assert spent == sorted(spent)
+    assert spent[-1] == pytest.approx(statement['truth']['totalSpent'])
+
+
+def test_stream_adds_up_to_the_whole_text_parse(parser, statement):
+    pdf = render_pdf(statement['pages'])
+    result = parser.parse_statement(BytesIO(pdf))
+
+    whole_text = parser.parse_transactions(parser.extract_text_from_pdf(BytesIO(pdf)))
+    assert result['transactions'] == whole_text
+    assert {k: v for k, v in result.items() if k != 'transactions'} == parser.calculate_metrics(whole_text)
+
+
+def test_unreadable_pdf_is_an_error(parser):
+    with pytest.raises(Exception, match="Error parsing statement"):
+        parser.parse_statement(BytesIO(b'not a pdf'))
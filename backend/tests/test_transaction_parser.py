@@ -0,0 +1,52 @@
+import pytest
+
+from api.pdf_parser import StatementParser
+from api.statement_corpus import generate_statement
+
+LINES = [
+    '01/15 STARBUCKS COFFEE BOSTON MA 5.75',
+    '01/15/2025 UBER TRIP HELP.UBER.COM $23.10',
+    '1-5-2025 WHOLE FOODS MARKET 1,234.56',
+    '02/03 PAYMENT THANK YOU -100.00',
+    '12/31 AMAZON MKTP US*2K4 $12.00 $1,200.00',
+    '03/04 SHELL OIL 12/31/2024 40.00',
+    '03/04 REFUND 1-2-2024 40.00',
+    'Payment Due Date 02/25/2025',
+    'Previous Balance $1,000.00',
+    '04/01 TOO SHORT',
+    '05/06     MULTIPLE    SPACES   HERE   7.00',
+    'Page 1 of 3',
+    '',
+]
+
+
+@pytest.fixture(scope='module')
+def parser():
+    return StatementParser(backend='pypdf2')
+
+
+@pytest.mark.parametrize('line', LINES)
+def test_compiled_engine_matches_legacy_line_by_line(parser, line):
+    assert parser.parse_transactions(line, 'compiled') == parser.parse_transactions(line, 'legacy')
+
+
+def test_compiled_engine_matches_legacy_on_a_statement(parser):
+    for date_format in ('MM/DD', 'MM/DD/YYYY', 'M-D-YYYY'):
+        pages = generate_statement(3, date_format, seed=12, parser=parser)['pages']
+        text = '\n'.join(line for page in pages for line in page)
+        compiled = parser.parse_transactions(text, 'compiled')
+        assert compiled == parser.parse_transactions(text, 'legacy')
+        assert len(compiled) > 100
+
+
+def test_transaction_fields(parser):
+    [transaction] = parser.parse_transactions('01/15/2025 UBER   TRIP $1,023.10')
+    assert transaction == {
+        'date': '01/15/2025', 'merchant': 'UBER TRIP', 'amount': 1023.10,
+        'category': 'Travel & Entertainment'
+    }
+
+
+def test_unknown_engine_is_rejected(parser):
+    with pytest.raises(ValueError, match="Unknown parser engine"):
+        parser.parse_transactions('', engine='fast')
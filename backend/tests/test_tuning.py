@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from ml.credit_risk_model import CreditRiskModel
+from ml.tuning import HyperparameterSearch, load_params
+
+SPACE = {'max_depth': ('int', 2, 4), 'learning_rate': ('loguniform', 0.05, 0.3)}
+
+
+@pytest.fixture
+def training_data(credit_frame):
+    data = credit_frame.iloc[:1200]
+    return data.drop(columns=['is_high_risk']), data['is_high_risk']
+
+
+def search(log_path, **kwargs):
+    options = dict(space=SPACE, nfold=3, early_stopping_rounds=5, n_workers=1, nthread=1, log_path=log_path)
+    options.update(kwargs)
+    return HyperparameterSearch(CreditRiskModel().default_params, **options)
+
+
+def test_rerun_resumes_every_trial_from_the_log(training_data, tmp_path, capsys):
+    X, y = training_data
+    log_path = str(tmp_path / 'trials.jsonl')
+    first = search(log_path).successive_halving(X, y, n_trials=4, min_rounds=10, max_rounds=30, eta=2)
+    capsys.readouterr()
+
+    second = search(log_path).successive_halving(X, y, n_trials=4, min_rounds=10, max_rounds=30, eta=2)
+    assert second == first
+    assert 'resumed from log' in capsys.readouterr().out
+
+    with open(log_path, encoding='utf-8') as f:
+        header = json.loads(f.readline())
+    assert header['settings']['nfold'] == 3
+    assert header['settings']['data']['shape'] == list(X.shape)
+
+
+@pytest.mark.parametrize('change', [{'nfold': 4}, {'seed': 7}, {'early_stopping_rounds': 10}])
+def test_log_from_other_settings_is_refused(training_data, tmp_path, change):
+    X, y = training_data
+    log_path = str(tmp_path / 'trials.jsonl')
+    search(log_path).random_search(X, y, n_trials=1, num_boost_round=10)
+
+    with pytest.raises(ValueError, match="different search settings"):
+        search(log_path, **change).random_search(X, y, n_trials=1, num_boost_round=10)
+
+
+def test_log_from_other_data_is_refused(training_data, tmp_path):
+    X, y = training_data
+    log_path = str(tmp_path / 'trials.jsonl')
+    search(log_path).random_search(X, y, n_trials=1, num_boost_round=10)
+
+    with pytest.raises(ValueError, match="different search settings"):
+        search(log_path).random_search(X, 1 - y, n_trials=1, num_boost_round=10)
+    with pytest.raises(ValueError, match="different search settings"):
+        search(log_path).random_search(X.iloc[:-1], y.iloc[:-1], n_trials=1, num_boost_round=10)
+
+
+def test_log_without_a_header_is_refused(training_data, tmp_path):
+    X, y = training_data
+    log_path = tmp_path / 'trials.jsonl'
+    log_path.write_text(json.dumps({'trial_id': 'abc', 'num_boost_round': 10, 'cv_auc_mean': 0.9}) + '\n')
+
+    with pytest.raises(ValueError, match="different search settings"):
+        search(str(log_path)).random_search(X, y, n_trials=1, num_boost_round=10)
+
+
+def test_best_params_come_from_the_top_budget(training_data, tmp_path):
+    X, y = training_data
+    tuner = search(None)
+    tuner.successive_halving(X, y, n_trials=4, min_rounds=10, max_rounds=40, eta=2)
+
+    best = tuner.best()
+    assert best['num_boost_round'] == 40
+    tuner.export_best(tmp_path / 'best.json')
+    params = load_params(tmp_path / 'best.json')
+    assert params['n_estimators'] == best['best_iteration']
+    assert params['max_depth'] == best['params']['max_depth']
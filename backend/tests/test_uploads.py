@@ -0,0 +1,135 @@
+import hashlib
+import io
+import mmap
+import os
+import time
+
+import pytest
+from werkzeug.test import EnvironBuilder
+
+from api.pdf_backends import pdf_buffer
+from api.pdf_parser import StatementParser
+from api.statement_cache import StatementCache
+from api.statement_corpus import generate_statement, render_pdf
+from api.uploads import SpooledUploadRequest, open_pdf, spool_to_disk, stream_sha256
+
+
+class Upload:
+    # the part of werkzeug's FileStorage the helpers use
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+
+@pytest.fixture(scope='module')
+def pdf():
+    return render_pdf(generate_statement(2, seed=5, parser=StatementParser(backend='pypdf2'))['pages'])
+
+
+def multipart(pdf, boundary='statement-boundary'):
+    return (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="statement.pdf"\r\n'
+        f'Content-Type: application/pdf\r\n\r\n'.encode() + pdf + f'\r\n--{boundary}--\r\n'.encode()
+    ), f'multipart/form-data; boundary={boundary}'
+
+
+def test_stream_sha256_hashes_in_chunks_and_rewinds(monkeypatch):
+    monkeypatch.setattr('api.uploads.CHUNK_SIZE', 7)
+    data = bytes(range(256)) * 3
+    stream = io.BytesIO(data)
+    stream.seek(100)
+
+    assert stream_sha256(stream, b'prefix') == hashlib.sha256(b'prefix' + data).hexdigest()
+    assert stream.tell() == 0
+
+
+def test_spool_to_disk_copies_the_upload(pdf, tmp_path):
+    path = spool_to_disk(Upload(pdf), str(tmp_path))
+    assert os.path.dirname(path) == str(tmp_path)
+    with open(path, 'rb') as f:
+        assert f.read() == pdf
+
+
+def test_open_pdf_accepts_bytes_paths_and_streams(pdf, tmp_path):
+    path = tmp_path / 'statement.pdf'
+    path.write_bytes(pdf)
+    empty = tmp_path / 'empty.pdf'
+    empty.write_bytes(b'')
+    stream = io.BytesIO(pdf)
+    stream.seek(10)
+
+    with open_pdf(pdf) as f:
+        assert f.read() == pdf
+    with open_pdf(str(path)) as f:
+        assert isinstance(f, mmap.mmap)
+        assert f[:] == pdf
+    with open_pdf(str(empty)) as f:
+        assert f.read() == b''
+    with open_pdf(stream) as f:
+        assert f is stream and f.tell() == 0
+
+
+@pytest.mark.parametrize('spool_kb, chunked, in_memory', [('64', False, True), ('1', False, False), ('64', True, False)])
+def test_uploads_are_a_bytesio_or_a_temporary_file(pdf, monkeypatch, spool_kb, chunked, in_memory):
+    monkeypatch.setenv('UPLOAD_SPOOL_KB', spool_kb)
+    body, content_type = multipart(pdf)
+    builder = EnvironBuilder(method='POST', input_stream=io.BytesIO(body), content_type=content_type,
+                             content_length=len(body))
+    environ = builder.get_environ()
+    if chunked:
+        del environ['CONTENT_LENGTH']
+        environ.update({'HTTP_TRANSFER_ENCODING': 'chunked', 'wsgi.input_terminated': True})
+
+    stream = SpooledUploadRequest(environ).files['file'].stream
+    # public types only: a BytesIO's buffer or a file descriptor to map
+    assert isinstance(stream, io.BytesIO) == in_memory
+    if not in_memory:
+        assert stream.fileno() >= 0
+    with open_pdf(stream) as f, pdf_buffer(f) as buffer:
+        assert buffer == pdf
+
+
+def test_declared_length_over_the_limit_is_refused(flask_app, pdf, monkeypatch):
+    monkeypatch.setitem(flask_app.app.config, 'MAX_CONTENT_LENGTH', 1024)
+    body, content_type = multipart(pdf)
+    response = flask_app.app.test_client().post('/api/parse-statement', data=body, content_type=content_type)
+
+    assert response.status_code == 413
+    assert 'limit' in response.get_json()['error']
+
+
+def test_body_without_a_length_is_cut_off_at_the_limit(flask_app, pdf, monkeypatch):
+    monkeypatch.setitem(flask_app.app.config, 'MAX_CONTENT_LENGTH', 1024)
+    body, content_type = multipart(pdf)
+    # a chunked body: no Content-Length, the server reads until the stream ends
+    response = flask_app.app.test_client().post(
+        '/api/parse-statement', input_stream=io.BytesIO(body), content_type=content_type,
+        environ_overrides={'HTTP_TRANSFER_ENCODING': 'chunked', 'wsgi.input_terminated': True}
+    )
+    assert response.request.content_length is None
+
+    assert response.status_code == 413
+
+
+def test_uploads_leave_no_temporary_files(flask_app, pdf, monkeypatch, tmp_path):
+    # an empty cache of its own, so the upload is really parsed
+    cache = StatementCache(flask_app.statement_parser, str(tmp_path / 'cache'))
+    monkeypatch.setattr(flask_app, 'statement_cache', cache)
+    spool_dir = tmp_path / 'spool'
+    spool_dir.mkdir()
+    monkeypatch.setattr('tempfile.tempdir', str(spool_dir))
+    monkeypatch.setenv('UPLOAD_SPOOL_KB', '1')
+    client = flask_app.app.test_client()
+
+    body, content_type = multipart(pdf)
+    assert client.post('/api/parse-statement', data=body, content_type=content_type).status_code == 200
+    assert cache.stats['miss'] == 1
+
+    submitted = client.post('/api/parse-statement/jobs', data=body, content_type=content_type)
+    assert submitted.status_code == 202
+    job_url = f"/api/parse-statement/jobs/{submitted.get_json()['job_id']}"
+    deadline = time.time() + 10
+    while client.get(job_url).get_json()['status'] not in ('done', 'failed') and time.time() < deadline:
+        time.sleep(0.05)
+
+    assert client.get(job_url).get_json()['status'] == 'done'
+    assert os.listdir(spool_dir) == []